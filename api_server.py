@@ -0,0 +1,156 @@
+"""API read-only HTTP/JSON untuk snapshot terbaru dan event pump.
+
+    python api_server.py --host 0.0.0.0 --port 8080
+
+Semua request dilayani dari memori (services/api_store); DB hanya dibaca
+sekali per snapshot baru oleh thread feeder yang mengikuti NOTIFY.
+
+Endpoint:
+    GET /health
+    GET /snapshot              harga & volume semua ticker di snapshot terakhir
+    GET /tickers/<ticker>      window harga terbaru satu ticker
+    GET /pumps                 event pump terbaru
+    GET /pumps/stream          server-sent events untuk pump baru & perubahan episode
+Respons JSON mendukung ETag / If-None-Match (304).
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import unquote
+
+from services import api_store
+
+MAX_HEADER_BYTES = 8192
+SSE_KEEPALIVE = 15        # detik
+
+_STATUS = {200: b"OK", 304: b"Not Modified", 400: b"Bad Request", 404: b"Not Found", 405: b"Method Not Allowed"}
+
+
+def _response(status, body=b"", etag=None, keep_alive=True, content_type=b"application/json"):
+    headers = [
+        b"HTTP/1.1 %d %s" % (status, _STATUS[status]),
+        b"Content-Type: " + content_type,
+        b"Content-Length: %d" % len(body),
+        b"Cache-Control: no-cache",
+        b"Connection: " + (b"keep-alive" if keep_alive else b"close"),
+    ]
+    if etag:
+        headers.append(b"ETag: " + etag.encode())
+    return b"\r\n".join(headers) + b"\r\n\r\n" + body
+
+
+def _json_or_304(result, if_none_match, keep_alive):
+    if result is None:
+        return _response(404, b'{"error":"not found"}', keep_alive=keep_alive)
+    etag, body = result
+    if if_none_match == etag:
+        return _response(304, etag=etag, keep_alive=keep_alive)
+    return _response(200, body, etag=etag, keep_alive=keep_alive)
+
+
+def route(path, if_none_match, keep_alive):
+    if path == "/snapshot":
+        return _json_or_304(api_store.snapshot_response(), if_none_match, keep_alive)
+    if path == "/pumps":
+        return _json_or_304(api_store.pumps_response(), if_none_match, keep_alive)
+    if path.startswith("/tickers/"):
+        ticker = unquote(path[len("/tickers/"):]).lower()
+        return _json_or_304(api_store.ticker_response(ticker), if_none_match, keep_alive)
+    if path == "/health":
+        return _response(200, b'{"status":"ok"}', keep_alive=keep_alive)
+    return _response(404, b'{"error":"not found"}', keep_alive=keep_alive)
+
+
+async def _stream_pumps(writer):
+    """Server-sent events: satu event ``pump`` per baris pump_history baru atau berubah (status/peak/durasi)."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def on_events(events):
+        loop.call_soon_threadsafe(queue.put_nowait, events)
+
+    writer.write(
+        b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+        b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+    )
+    api_store.subscribe(on_events)
+    try:
+        while True:
+            try:
+                events = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                writer.write(b": keepalive\n\n")
+            else:
+                for event in events:
+                    data = json.dumps(event, separators=(",", ":")).encode()
+                    writer.write(b"id: %d\nevent: pump\ndata: %s\n\n" % (event["id"], data))
+            await writer.drain()
+    finally:
+        api_store.unsubscribe(on_events)
+
+
+async def handle(reader, writer):
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            lines = head.split(b"\r\n")
+            try:
+                method, target, version = lines[0].split(b" ", 2)
+            except ValueError:
+                writer.write(_response(400, keep_alive=False))
+                break
+
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(b":")
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get(b"connection", b"").lower() != b"close" and version == b"HTTP/1.1"
+
+            if method != b"GET":
+                writer.write(_response(405, keep_alive=False))
+                break
+
+            path = target.split(b"?", 1)[0].decode("latin-1")
+            if path == "/pumps/stream":
+                await _stream_pumps(writer)
+                break
+
+            if_none_match = headers.get(b"if-none-match", b"").decode("latin-1") or None
+            writer.write(route(path, if_none_match, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port):
+    server = await asyncio.start_server(handle, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+    print(f"✅ API read-only di http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pump Indodax read-only API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    api_store.start_feeder()
+    try:
+        import uvloop  # opsional, event loop lebih cepat bila terpasang
+        uvloop.install()
+    except ImportError:
+        pass
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
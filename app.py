@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from streamlit_autorefresh import st_autorefresh
 import sys
 import os
 
@@ -9,11 +8,15 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'services')))
 
 try:
-    from services import database_pg, detector
+    from services import coordination, database_pg, detector, leader, live, pipeline, scheduler, timeframes
 except ImportError as e:
     st.error(f"❌ Failed to import required modules: {str(e)}")
     st.stop()
 
+# Sesi hanya membandingkan nomor versi di memori tiap detik; rerun penuh
+# (query + render) hanya terjadi saat ada snapshot baru.
+LIVE_POLL_SECONDS = 1
+
 # --- App Initialization ---
 def initialize_database():
     """Initialize database connection with error handling"""
@@ -53,17 +56,10 @@ def main():
         st.header("⚙️ Konfigurasi")
         preset = st.radio(
             "🎛️ Preset Sensitivitas", 
-            ["Custom", "Aggressive", "Moderate", "Safe"], 
+            ["Custom", *detector.PRESETS], 
             index=0
         )
         
-        # Parameter presets
-        presets = {
-            "Aggressive":  {"interval": 3, "price_threshold": 1.0, "volume_threshold": 30.0, "price_delta": 1.0, "spike_factor": 1.5},
-            "Moderate":    {"interval": 3, "price_threshold": 1.5, "volume_threshold": 50.0, "price_delta": 1.0, "spike_factor": 1.7},
-            "Safe":        {"interval": 5, "price_threshold": 2.0, "volume_threshold": 80.0, "price_delta": 1.0, "spike_factor": 2.0},
-        }
-
         if preset == "Custom":
             interval = st.selectbox("⏱️ Interval Refresh (detik)", [3, 5, 10], index=0)
             price_threshold = st.slider("📈 Threshold Harga (%)", 0.5, 5.0, 1.5, 0.1)
@@ -71,7 +67,7 @@ def main():
             price_delta = st.slider("📈 Price Delta (%)", 0.5, 5.0, 1.0, 0.1)
             spike_factor = st.slider("📊 Spike Factor Volume (x)", 1.0, 5.0, 1.5, 0.1)
         else:
-            p = presets[preset]
+            p = detector.PRESETS[preset]
             interval, price_threshold, volume_threshold, price_delta, spike_factor = (
                 p["interval"], p["price_threshold"], p["volume_threshold"], p["price_delta"], p["spike_factor"]
             )
@@ -81,52 +77,143 @@ def main():
                         f"**📈 Delta Harga:** {price_delta}%  \n"
                         f"**📊 Spike Factor:** {spike_factor}x")
 
-    # Auto refresh
-    st_autorefresh(interval=interval * 1000, key="data_refresh")
+        with st.expander("📚 Aturan Order Book (opsional)"):
+            use_book_rules = st.checkbox("Aktifkan aturan order book", value=False)
+            min_imbalance = st.slider("⚖️ Min Imbalance Bid/Ask", -1.0, 1.0, 0.2, 0.05)
+            max_ask_thinning = st.slider("🧊 Max Ask Depth vs Rata-rata (x)", 0.1, 1.5, 0.7, 0.05)
+            max_spread_bps = st.slider("↔️ Max Spread (bps)", 5.0, 500.0, 100.0, 5.0)
+        if not use_book_rules:
+            min_imbalance = max_ask_thinning = max_spread_bps = None
+
+        require_breakout = st.checkbox(
+            "🧱 Wajib tembus resistance (volume profile)", value=False,
+            help="Pump hanya valid bila harga naik melewati high-volume node terdekat."
+        )
+
+        multi_timeframe = st.checkbox(
+            "🕰️ Deteksi multi-timeframe", value=False,
+            help="Aturan pump dicek di jendela " + ", ".join(name for name, _ in timeframes.TIMEFRAMES)
+                 + " sekaligus; menangkap akumulasi lambat dan meredam noise satu tick."
+        )
+        min_confidence = 0.0
+        if multi_timeframe:
+            min_confidence = st.slider(
+                "🎯 Min Confidence (porsi timeframe lolos)", 0.0, 1.0, 0.25, 0.25
+            )
+
+        coordinated = st.checkbox(
+            "🤝 Gabungkan pump terkoordinasi", value=False,
+            help=f"Coin yang naik bersamaan dengan korelasi return ≥ {coordination.MIN_CORR} "
+                 f"(minimal {coordination.MIN_GROUP} coin) dikirim sebagai satu alert grup."
+        )
+
+        adaptive_interval = st.checkbox(
+            "⚡ Interval adaptif", value=True,
+            help=f"Interval dipercepat saat banyak coin bergerak dan diperlambat saat pasar sepi "
+                 f"({scheduler.MIN_INTERVAL}–{scheduler.MAX_INTERVAL} detik)."
+        )
+
+        min_market_z = st.slider(
+            "🌐 Min z-score vs Pasar (0 = nonaktif)", 0.0, 10.0, 0.0, 0.5,
+            help="Hanya cek pump untuk coin yang naik jauh di atas median pasar (median/MAD)."
+        )
+
+        if leader.is_leader():
+            st.caption(f"👑 Leader ({leader.INSTANCE_ID}): ingest & alert aktif")
+        else:
+            st.caption(f"👀 Follower ({leader.INSTANCE_ID}): read-only, data dari leader")
+
+    settings = {
+        "interval": interval,
+        "price_threshold": price_threshold,
+        "volume_threshold": volume_threshold,
+        "price_delta": price_delta,
+        "spike_factor": spike_factor,
+        "min_imbalance": min_imbalance,
+        "max_ask_thinning": max_ask_thinning,
+        "max_spread_bps": max_spread_bps,
+        "min_market_z": min_market_z,
+        "require_breakout": require_breakout,
+        "adaptive_interval": adaptive_interval,
+        "multi_timeframe": multi_timeframe,
+        "min_confidence": min_confidence,
+        "coordinated": coordinated,
+    }
 
     # Main content
     st.header("📊 Monitoring harga realtime Indodax")
-    
-    try:
-        data = detector.fetch_indodax_data()
-        detected_pumps = []
-        
-        with st.spinner("Memproses data..."):
-            for d in data:
-                ticker = d['ticker']
-                last = d['last']
-                vol_idr = d['vol_idr']
-
-                database_pg.save_ticker_history(ticker, last, vol_idr)
-
-                is_pump, result = detector.is_valid_pump(
-                    ticker, price_threshold, volume_threshold, window=5, 
-                    min_consecutive_up=3, price_delta=price_delta, spike_factor=spike_factor
-                )
-
-                if is_pump:
-                    detector.send_telegram_message(
-                        f"🚨 PUMP DETECTED {result['ticker'].upper()}\n"
-                        f"Harga: {result['harga_sebelum']} ➡️ {result['harga_sekarang']} (+{result['kenaikan_harga']:.2f}%)\n"
-                        f"Volume: +{result['kenaikan_volume']:.2f}%\n"
-                        f"Jam: {result['timestamp']}"
-                    )
-                    detected_pumps.append(result)
-
-        if detected_pumps:
+    render_latest(interval)
+
+    leader.ensure_started()
+    live.ensure_listener()
+    live_watch(settings)
+
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def live_watch(settings):
+    """Cek ringan tiap detik: jalankan siklus bila tick baru mulai, rerun bila ada data baru."""
+    # Hanya replika leader yang fetch, insert dan kirim alert; satu sesi per tick
+    tick_interval = leader.is_leader() and scheduler.claim(settings["interval"], settings["adaptive_interval"])
+    if tick_interval:
+        try:
+            pipeline.run_cycle(dict(settings, interval=tick_interval))
+        except Exception as e:
+            st.error(f"❌ Error saat memproses data: {str(e)}")
+    if live.version() != st.session_state.get("live_seen_version"):
+        st.rerun()
+
+def render_latest(interval):
+    st.session_state.live_seen_version = live.version()
+    payload, result = live.latest()
+
+    if result is None:
+        # Siklus dijalankan proses/replika lain: tampilkan ringkasan dari NOTIFY
+        if payload is None:
+            st.info("⏳ Menunggu snapshot pertama...")
+            return
+        if payload["pumps"]:
             st.subheader("📈 Pump Terdeteksi Saat Ini")
-            st.dataframe(
-                pd.DataFrame(detected_pumps),
-                use_container_width=True,
-                hide_index=True
-            )
+            st.write(", ".join(t.upper() for t in payload["pumps"]))
         else:
             st.info("🔍 Tidak ada pump yang terdeteksi")
-            
-    except Exception as e:
-        st.error(f"❌ Error saat memproses data: {str(e)}")
-    
-    st.write(f"🕒 Update terakhir: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} WIB")
+        st.write(f"🕒 Update terakhir: {datetime.fromtimestamp(payload['ts']).strftime('%Y-%m-%d %H:%M:%S')} WIB")
+        return
+
+    if result["anomalies"]:
+        with st.expander("🌐 Top Anomali Pasar (robust z-score)"):
+            st.dataframe(pd.DataFrame(result["anomalies"]).round(2), use_container_width=True, hide_index=True)
+
+    cycle_stats = result["cycle"]
+    if cycle_stats["overrun"]:
+        st.warning(
+            f"⚠️ Siklus refresh {cycle_stats['wall']:.2f}s melebihi interval {cycle_stats['interval']}s "
+            f"({cycle_stats['counters'].get('db_round_trips', 0)} query DB). "
+            f"Lihat halaman Diagnostics untuk rinciannya."
+        )
+
+    if result.get("groups"):
+        st.subheader("🤝 Pump Terkoordinasi")
+        for group in result["groups"]:
+            st.write(
+                f"**{len(group['tickers'])} coin** (korelasi {group['avg_corr']:.2f}, "
+                f"sejak {datetime.fromtimestamp(group['started']).strftime('%H:%M:%S')}): "
+                + ", ".join(t.upper() for t in group["tickers"])
+            )
+
+    if result["detected_pumps"]:
+        st.subheader("📈 Pump Terdeteksi Saat Ini")
+        st.dataframe(
+            pd.DataFrame(result["detected_pumps"]),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("🔍 Tidak ada pump yang terdeteksi")
+
+    for src in result["sources"]:
+        if src["last_error"]:
+            st.warning(f"⚠️ Sumber {src['source']} gagal ({src['failures']}x, backoff): {src['last_error']}")
+
+    st.write(f"🕒 Update terakhir: {datetime.fromtimestamp(result['time']).strftime('%Y-%m-%d %H:%M:%S')} WIB")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,195 @@
+"""Benchmark layout ticker_history: NUMERIC(18,8)/TEXT vs float8/integer id.
+
+    DATABASE_URL=postgres://... python benchmarks/bench_storage.py
+    DATABASE_URL=postgres://... python benchmarks/bench_storage.py --tickers 400 --snapshots 5000
+
+Data sintetis yang sama diisi ke dua tabel di schema sementara
+``bench_storage`` (di-drop di akhir), lalu dibandingkan:
+
+- ukuran tabel + index (pg_total_relation_size)
+- scan agregat satu jam terakhir semua ticker (AVG/MAX per ticker)
+- baca histori satu ticker sampai jadi array float64 NumPy
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import psycopg2
+
+SCHEMA = "bench_storage"
+
+LAYOUTS = {
+    "numeric": {
+        "ddl": [
+            """
+            CREATE TABLE {schema}.ticker_history (
+                id SERIAL PRIMARY KEY,
+                ticker TEXT NOT NULL,
+                last NUMERIC(18,8) NOT NULL,
+                vol_idr NUMERIC(18,2) NOT NULL,
+                timestamp TIMESTAMPTZ NOT NULL,
+                source TEXT NOT NULL DEFAULT 'indodax',
+                UNIQUE (ticker, timestamp, source)
+            )
+            """,
+            "CREATE INDEX ON {schema}.ticker_history(ticker)",
+            "CREATE INDEX ON {schema}.ticker_history(timestamp)",
+        ],
+        "load": """
+            INSERT INTO {schema}.ticker_history (ticker, last, vol_idr, timestamp)
+            SELECT 'coin' || t, p, v, ts FROM {schema}.raw
+        """,
+        "table": "ticker_history",
+        "scan": """
+            SELECT ticker, AVG(last), MAX(vol_idr) FROM {schema}.ticker_history
+            WHERE timestamp > (SELECT MAX(timestamp) FROM {schema}.raw_ts) - INTERVAL '1 hour'
+            GROUP BY ticker
+        """,
+        "one": """
+            SELECT timestamp, last, vol_idr FROM {schema}.ticker_history
+            WHERE ticker = %s AND source = 'indodax' ORDER BY timestamp
+        """,
+    },
+    "float8": {
+        "ddl": [
+            """
+            CREATE TABLE {schema}.tickers (
+                id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                source TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                UNIQUE (source, symbol)
+            )
+            """,
+            """
+            CREATE TABLE {schema}.ticker_ticks (
+                id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                ticker_id INTEGER NOT NULL REFERENCES {schema}.tickers(id),
+                timestamp TIMESTAMPTZ NOT NULL,
+                last DOUBLE PRECISION NOT NULL,
+                vol_idr DOUBLE PRECISION NOT NULL,
+                UNIQUE (ticker_id, timestamp)
+            )
+            """,
+            "CREATE INDEX ON {schema}.ticker_ticks(timestamp)",
+        ],
+        "load": """
+            WITH ids AS (
+                INSERT INTO {schema}.tickers (source, symbol)
+                SELECT DISTINCT 'indodax', 'coin' || t FROM {schema}.raw
+                RETURNING id, symbol
+            )
+            INSERT INTO {schema}.ticker_ticks (ticker_id, timestamp, last, vol_idr)
+            SELECT ids.id, r.ts, r.p, r.v FROM {schema}.raw r JOIN ids ON ids.symbol = 'coin' || r.t
+        """,
+        "table": "ticker_ticks",
+        "scan": """
+            SELECT ticker_id, AVG(last), MAX(vol_idr) FROM {schema}.ticker_ticks
+            WHERE timestamp > (SELECT MAX(timestamp) FROM {schema}.raw_ts) - INTERVAL '1 hour'
+            GROUP BY ticker_id
+        """,
+        "one": """
+            SELECT EXTRACT(EPOCH FROM k.timestamp)::float8, k.last, k.vol_idr
+            FROM {schema}.ticker_ticks k
+            WHERE k.ticker_id = (
+                SELECT id FROM {schema}.tickers WHERE source = 'indodax' AND symbol = %s
+            )
+            ORDER BY k.timestamp
+        """,
+    },
+}
+
+
+def connect(url):
+    result = urlparse(url)
+    return psycopg2.connect(
+        dbname=result.path[1:], user=result.username, password=result.password,
+        host=result.hostname, port=result.port,
+        sslmode=os.environ.get("PGSSLMODE", "prefer"),
+    )
+
+
+def timed(cur, query, params=None, repeat=5, convert=None):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cur.execute(query, params)
+        rows = cur.fetchall()
+        if convert:
+            convert(rows)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def to_numpy_decimal(rows):
+    # Layout lama: timestamp datetime + Decimal → konversi per nilai
+    return np.array([(r[0].timestamp(), float(r[1]), float(r[2])) for r in rows], dtype=np.float64)
+
+
+def to_numpy_float(rows):
+    return np.array(rows, dtype=np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark storage ticker_history")
+    parser.add_argument("--url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--tickers", type=int, default=400)
+    parser.add_argument("--snapshots", type=int, default=2000, help="jumlah poll (interval 3 detik)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if not args.url:
+        sys.exit("DATABASE_URL belum di-set (atau pakai --url)")
+
+    conn = connect(args.url)
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        # Random walk harga & volume yang sama untuk kedua layout
+        cur.execute(f"""
+            CREATE TABLE {SCHEMA}.raw AS
+            SELECT t, NOW() - make_interval(secs => (%s - s) * 3) AS ts,
+                   (100 + t) * exp(sum((random() - 0.5) * 0.002) OVER w) AS p,
+                   round((1e8 * (1 + random()))::numeric, 2)::float8 AS v
+            FROM generate_series(1, %s) t, generate_series(1, %s) s
+            WINDOW w AS (PARTITION BY t ORDER BY s)
+        """, (args.snapshots, args.tickers, args.snapshots))
+        cur.execute(f"CREATE TABLE {SCHEMA}.raw_ts AS SELECT MAX(ts) AS timestamp FROM {SCHEMA}.raw")
+        total_rows = args.tickers * args.snapshots
+        print(f"{total_rows:,} baris ({args.tickers} ticker × {args.snapshots} snapshot)\n")
+
+        results = {}
+        for name, layout in LAYOUTS.items():
+            for ddl in layout["ddl"]:
+                cur.execute(ddl.format(schema=SCHEMA))
+            start = time.perf_counter()
+            cur.execute(layout["load"].format(schema=SCHEMA))
+            load_s = time.perf_counter() - start
+            cur.execute(f"VACUUM ANALYZE {SCHEMA}.{layout['table']}")
+            cur.execute(
+                "SELECT pg_relation_size(%s), pg_indexes_size(%s)",
+                (f"{SCHEMA}.{layout['table']}",) * 2
+            )
+            heap, index = cur.fetchone()
+            scan_ms = timed(cur, layout["scan"].format(schema=SCHEMA), repeat=args.repeat)
+            convert = to_numpy_decimal if name == "numeric" else to_numpy_float
+            one_ms = timed(cur, layout["one"].format(schema=SCHEMA), ("coin1",), args.repeat, convert)
+            results[name] = (heap, index, load_s, scan_ms, one_ms)
+
+        print(f"{'layout':<10} {'heap MB':>9} {'index MB':>9} {'B/baris':>8} {'load s':>8} {'scan 1j ms':>11} {'1 ticker→np ms':>15}")
+        for name, (heap, index, load_s, scan_ms, one_ms) in results.items():
+            print(
+                f"{name:<10} {heap / 1e6:>9.1f} {index / 1e6:>9.1f} {(heap + index) / total_rows:>8.1f} "
+                f"{load_s:>8.2f} {scan_ms:>11.1f} {one_ms:>15.1f}"
+            )
+    finally:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
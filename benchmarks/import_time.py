@@ -0,0 +1,98 @@
+"""Benchmark first paint tiap halaman: waktu import + statement top-level
+sampai ``st.title`` pertama, diukur di proses Python baru (cold start).
+
+    python benchmarks/import_time.py                 # tree saat ini
+    python benchmarks/import_time.py --ref baseline  # bandingkan dengan git ref
+
+Dijalankan tanpa ``streamlit run`` (bare mode) dan tanpa DATABASE_URL, jadi
+angka ini hanya biaya import/inisialisasi modul, belum termasuk DDL.
+"""
+import argparse
+import ast
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS = ["app.py"] + sorted(
+    os.path.join("pages", f) for f in os.listdir(os.path.join(ROOT, "pages")) if f.endswith(".py")
+)
+
+RUNNER = """
+import sys, time, warnings, logging
+warnings.filterwarnings("ignore")
+logging.disable(logging.CRITICAL)
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+exec(compile({prefix!r}, {path!r}, "exec"), {{"__name__": "__bench__", "__file__": {path!r}}})
+print(time.perf_counter() - start)
+"""
+
+
+def first_paint_prefix(source):
+    """Statement top-level sampai st.title pertama (atau sebelum def pertama)."""
+    tree = ast.parse(source)
+    lines = source.splitlines()
+    end = 0
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            break
+        end = node.end_lineno
+        if "st.title" in ast.get_source_segment(source, node):
+            break
+    return "\n".join(lines[:end])
+
+
+def measure(root, script, repeat):
+    path = os.path.join(root, script)
+    if not os.path.exists(path):
+        return None
+    prefix = first_paint_prefix(open(path).read())
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", RUNNER.format(root=root, path=path, prefix=prefix)],
+            cwd=root, capture_output=True, text=True,
+        )
+        lines = [l for l in out.stdout.strip().splitlines() if l]
+        try:
+            samples.append(float(lines[-1]))
+        except (IndexError, ValueError):
+            return None
+    return statistics.median(samples)
+
+
+def export_ref(ref, dest):
+    data = subprocess.run(["git", "archive", ref], cwd=ROOT, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        tar.extractall(dest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ref", help="git ref pembanding (mis. baseline commit)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.ref:
+            export_ref(args.ref, tmp)
+        print(f"{'script':32} {'sekarang (ms)':>14}" + (f" {args.ref + ' (ms)':>16} {'speedup':>8}" if args.ref else ""))
+        for script in SCRIPTS:
+            now = measure(ROOT, script, args.repeat)
+            row = f"{script:32} {now * 1000 if now else float('nan'):14.0f}"
+            if args.ref:
+                before = measure(tmp, script, args.repeat)
+                if before and now:
+                    row += f" {before * 1000:16.0f} {before / now:7.1f}x"
+                else:
+                    row += f" {'-':>16} {'-':>8}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
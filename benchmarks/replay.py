@@ -0,0 +1,226 @@
+"""Replay rekaman response Indodax (services/recorder) ke pipeline asli untuk soak & throughput test.
+
+    PUMP_RECORD_DIR=/data/rekaman streamlit run app.py          # rekam selama app jalan
+    python benchmarks/replay.py /data/rekaman --speed 10         # 1, 10, ... atau max
+    python benchmarks/replay.py /data/rekaman --speed max --report-every 30
+
+Stub HTTP lokal menyajikan response rekaman di path aslinya (/api/tickers,
+/api/summaries, /api/depth/...) menurut jam virtual = waktu rekaman ×
+kecepatan; ``max`` = record berikutnya tiap request. Stub yang sama menerima
+/bot<token>/sendMessage sebagai Telegram palsu. Pipeline asli (collector →
+write-behind → deteksi → alert) diarahkan ke stub lewat PUMP_INDODAX_BASE_URL
+dan PUMP_TELEGRAM_API_URL.
+
+Pipeline menulis ke DATABASE_URL di .streamlit/secrets.toml direktori kerja:
+jalankan dari direktori berisi secrets DB scratch (plus TELEGRAM_TOKEN dan
+TELEGRAM_CHAT_ID sembarang), jangan DB produksi. Timestamp yang ditulis = jam
+dinding saat replay, jadi waktu rekaman dipadatkan sesuai kecepatan.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MAX_SPEED_INTERVAL = 0.01  # detik; interval siklus pada --speed max
+
+
+class ReplayStub:
+    """Sajikan record rekaman per path mengikuti jam virtual (atau satu per request)."""
+
+    def __init__(self, records, speed):
+        self._records = records
+        self._speed = speed                  # None = max
+        self._lock = threading.Lock()
+        self._current = {}                   # path -> record terakhir yang sudah "terjadi"
+        self._pending = next(records, None)
+        self._origin = None                  # (monotonic mulai, ts record pertama)
+        self.served = 0
+        self.virtual_ts = None
+        self.first_ts = self._pending["ts"] if self._pending else None
+        self.telegram = []                   # (diterima, chat_id)
+
+    @property
+    def exhausted(self):
+        return self._pending is None
+
+    def _consume(self):
+        rec = self._pending
+        self._current[rec["path"]] = rec
+        self._pending = next(self._records, None)
+        self.virtual_ts = rec["ts"]
+        return rec
+
+    def body(self, path):
+        with self._lock:
+            if self._speed is None:
+                # Maju sampai record berikutnya untuk path ini; path lain ikut terbarui
+                while self._pending is not None:
+                    if self._consume()["path"] == path:
+                        break
+            else:
+                if self._origin is None and self._pending is not None:
+                    self._origin = (time.monotonic(), self._pending["ts"])
+                if self._origin is not None:
+                    now = self._origin[1] + (time.monotonic() - self._origin[0]) * self._speed
+                    while self._pending is not None and self._pending["ts"] <= now:
+                        self._consume()
+            rec = self._current.get(path)
+            if rec is None:
+                return None
+            self.served += 1
+            return rec["body"]
+
+    def telegram_message(self, chat_id):
+        with self._lock:
+            self.telegram.append((time.time(), chat_id))
+            return len(self.telegram)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _reply(self, status, body):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        body = self.server.stub.body(self.path)
+        if body is None:
+            self._reply(404, json.dumps({"error": "belum ada rekaman untuk path ini"}))
+        else:
+            self._reply(200, body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+        if not self.path.endswith("/sendMessage"):
+            self._reply(404, json.dumps({"ok": False}))
+            return
+        message_id = self.server.stub.telegram_message(form.get("chat_id", [""])[0])
+        self._reply(200, json.dumps({"ok": True, "result": {"message_id": message_id}}))
+
+    def log_message(self, *args):
+        pass
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay rekaman Indodax ke pipeline")
+    parser.add_argument("directory", help="folder segment rekaman (PUMP_RECORD_DIR)")
+    parser.add_argument("--speed", default="1", help="pengali waktu (1, 10, ...) atau 'max'")
+    parser.add_argument("--duration", type=float, default=None, help="batas wall time (detik)")
+    parser.add_argument("--report-every", type=float, default=10.0, help="detik antar laporan")
+    parser.add_argument("--preset", default="Moderate")
+    parser.add_argument("--multi-timeframe", action="store_true")
+    parser.add_argument("--coordinated", action="store_true")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    speed = None if args.speed == "max" else float(args.speed)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    # Env dibaca saat import services → set sebelum import
+    os.environ.update({
+        "PUMP_INDODAX_BASE_URL": base_url,
+        "PUMP_TELEGRAM_API_URL": base_url,
+        "PUMP_LEADER_ELECTION": "0",
+        "PUMP_RECORD_DIR": "",
+        "PUMP_SPILL_DIR": os.environ.get("PUMP_SPILL_DIR") or tempfile.mkdtemp(prefix="replay-spill-"),
+    })
+    sys.path.insert(0, ROOT)
+    from services import detector, pipeline, recorder, write_behind
+
+    stub = ReplayStub(recorder.read(args.directory), speed)
+    if stub.exhausted:
+        sys.exit(f"Tidak ada rekaman di {args.directory}")
+    server.stub = stub
+    threading.Thread(target=server.serve_forever, name="replay-stub", daemon=True).start()
+
+    settings = dict(
+        detector.PRESETS[args.preset],
+        min_imbalance=None, max_ask_thinning=None, max_spread_bps=None, min_market_z=0.0,
+        require_breakout=False, adaptive_interval=False,
+        multi_timeframe=args.multi_timeframe, min_confidence=0.0, coordinated=args.coordinated,
+    )
+    interval = settings["interval"] / speed if speed else MAX_SPEED_INTERVAL
+    print(f"▶️ Replay {args.directory} @ {args.speed}x via {base_url} (interval siklus {interval:.3f}s)")
+
+    walls, snapshots, pumps, groups = [], 0, 0, 0
+    rss_start = rss_mb()
+    started = time.monotonic()
+    next_report = started + args.report_every
+
+    def report(final=False):
+        elapsed = time.monotonic() - started
+        virtual = (stub.virtual_ts or stub.first_ts) - stub.first_ts
+        summary = {
+            "wall_s": round(elapsed, 1),
+            "virtual_h": round(virtual / 3600, 2),
+            "effective_speed": round(virtual / elapsed, 1) if elapsed else 0.0,
+            "cycles": len(walls),
+            "cycles_per_s": round(len(walls) / elapsed, 1) if elapsed else 0.0,
+            "snapshots": snapshots,
+            "cycle_p50_ms": round(percentile(walls, 50) * 1000, 1),
+            "cycle_p95_ms": round(percentile(walls, 95) * 1000, 1),
+            "cycle_p99_ms": round(percentile(walls, 99) * 1000, 1),
+            "cycle_max_ms": round(max(walls, default=0) * 1000, 1),
+            "rss_mb": round(rss_mb(), 1),
+            "rss_growth_mb": round(rss_mb() - rss_start, 1),
+            "write_backlog": write_behind.stats()["backlog"],
+            "pumps": pumps,
+            "groups": groups,
+            "alerts_received": len(stub.telegram),
+        }
+        print(json.dumps(summary) if final else " | ".join(f"{k}={v}" for k, v in summary.items()))
+        return summary
+
+    try:
+        while not stub.exhausted and (args.duration is None or time.monotonic() - started < args.duration):
+            tick = time.monotonic()
+            result = pipeline.run_cycle(dict(settings, interval=interval))
+            wall = time.monotonic() - tick
+            walls.append(wall)
+            snapshots += result["has_snapshot"]
+            pumps += len(result["detected_pumps"])
+            groups += sum(g["event"] == "open" for g in result["groups"])
+            if time.monotonic() >= next_report:
+                report()
+                next_report += args.report_every
+            if speed:
+                time.sleep(max(0.0, interval - wall))
+    except KeyboardInterrupt:
+        print("⏹️ Dihentikan")
+    finally:
+        write_behind.flush(timeout=30)
+        report(final=True)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import streamlit as st
+import pandas as pd
+from services import alerts, database_pg, detector
+
+st.set_page_config(page_title="🔔 Langganan Alert", layout="wide")
+st.title("🔔 Langganan Alert Telegram")
+
+NO_PRESET = "(tanpa preset)"
+
+# --- Status router ---
+status = alerts.status()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Langganan Aktif", status["subscriptions"])
+col2.metric("Terkirim", status["sent"])
+col3.metric("Gagal", status["failed"])
+col4.metric("Antrian", sum(status["queued"].values()))
+if status["dropped"]:
+    st.warning(f"⚠️ {status['dropped']} pesan dibuang karena antrian chat penuh.")
+if status["last_error"]:
+    st.caption(f"Error terakhir: {status['last_error']}")
+if not status["subscriptions"]:
+    st.info("ℹ️ Belum ada langganan aktif: semua alert dikirim ke TELEGRAM_CHAT_ID di secrets.")
+
+# --- Tambah langganan ---
+with st.form("add_subscription", clear_on_submit=True):
+    st.subheader("➕ Tambah Langganan")
+    col1, col2 = st.columns(2)
+    name = col1.text_input("Nama")
+    chat_id = col2.text_input("Chat ID Telegram")
+    preset = col1.selectbox("Preset (threshold minimal)", [NO_PRESET, *detector.PRESETS])
+    tickers = col2.text_input("Watchlist (pisahkan koma, kosong = semua coin)")
+    min_price_rise = col1.number_input("Min Kenaikan Harga (%)", 0.0, 100.0, 0.0, 0.1)
+    min_volume_rise = col2.number_input("Min Kenaikan Volume (%)", 0.0, 1000.0, 0.0, 5.0)
+    min_confidence = col1.slider("Min Confidence Multi-Timeframe", 0.0, 1.0, 0.0, 0.25)
+    if st.form_submit_button("Simpan"):
+        if not name.strip() or not chat_id.strip():
+            st.error("❌ Nama dan Chat ID wajib diisi.")
+        else:
+            database_pg.add_alert_subscription(
+                name.strip(), chat_id.strip(),
+                preset=None if preset == NO_PRESET else preset,
+                tickers=[t.strip().lower() for t in tickers.split(",") if t.strip()],
+                min_price_rise=min_price_rise,
+                min_volume_rise=min_volume_rise,
+                min_confidence=min_confidence,
+            )
+            alerts.reload()
+            st.success(f"✅ Langganan {name} tersimpan.")
+
+# --- Daftar langganan ---
+rows = database_pg.get_alert_subscriptions()
+if not rows:
+    st.stop()
+
+df = pd.DataFrame(rows, columns=[
+    "ID", "Nama", "Chat ID", "Preset", "Watchlist", "Min Harga (%)", "Min Volume (%)", "Min Confidence", "Aktif"
+])
+df["Watchlist"] = df["Watchlist"].apply(lambda t: ", ".join(t) if t else "semua")
+st.subheader("📋 Daftar Langganan")
+st.dataframe(df, use_container_width=True, hide_index=True)
+
+labels = {r[0]: f"#{r[0]} {r[1]} ({r[2]})" for r in rows}
+selected = st.selectbox("Pilih langganan", list(labels), format_func=labels.get)
+enabled = next(r[8] for r in rows if r[0] == selected)
+col1, col2 = st.columns(2)
+if col1.button("⏸️ Nonaktifkan" if enabled else "▶️ Aktifkan"):
+    database_pg.set_alert_subscription_enabled(selected, not enabled)
+    alerts.reload()
+    st.rerun()
+if col2.button("🗑️ Hapus"):
+    database_pg.delete_alert_subscription(selected)
+    alerts.reload()
+    st.rerun()
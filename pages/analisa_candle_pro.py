@@ -1,11 +1,9 @@
+import zlib
 import streamlit as st
 import pandas as pd
 import numpy as np
-import mplfinance as mpf
 from datetime import datetime
-from services import analisa_pg
-import ta
-import matplotlib.pyplot as plt
+from services import analisa_pg, charts, coverage
 
 st.set_page_config(page_title="📊 Analisa Candle Pro", layout="wide")
 st.title("📊 Analisa Candlestick & Indikator Pro")
@@ -25,21 +23,31 @@ try:
         st.warning("⚠️ Data candle kurang dari 10 — minimal butuh 10 candle untuk analisa.")
         st.stop()
 
+    # Close harian diambil per hari yang ada datanya; hari kosong tidak terlihat di candle
+    hari_kosong = coverage.missing_days(selected_coin, 30)
+    if hari_kosong:
+        st.warning(
+            f"⚠️ {len(hari_kosong)} hari tanpa data dalam 30 hari terakhir "
+            f"(terakhir {hari_kosong[-1]}); candle tidak kontinu."
+        )
+
     # --- Simulasi open, high, low ---
+    # Seed dari data close: rerun tanpa candle baru menghasilkan OHLC (dan chart cache) yang sama
+    rng = np.random.default_rng(zlib.crc32(repr((selected_coin, list(closes))).encode()))
     opens = [closes[0]]
     highs, lows = [], []
     for i in range(1, len(closes)):
-        open_price = closes[i-1] + np.random.uniform(-0.5, 0.5)
-        high_price = max(open_price, closes[i]) + np.random.uniform(0.1, 0.5)
-        low_price = min(open_price, closes[i]) - np.random.uniform(0.1, 0.5)
+        open_price = closes[i-1] + rng.uniform(-0.5, 0.5)
+        high_price = max(open_price, closes[i]) + rng.uniform(0.1, 0.5)
+        low_price = min(open_price, closes[i]) - rng.uniform(0.1, 0.5)
         opens.append(open_price)
         highs.append(high_price)
         lows.append(low_price)
-    highs.insert(0, max(opens[0], closes[0]) + np.random.uniform(0.1, 0.5))
-    lows.insert(0, min(opens[0], closes[0]) - np.random.uniform(0.1, 0.5))
+    highs.insert(0, max(opens[0], closes[0]) + rng.uniform(0.1, 0.5))
+    lows.insert(0, min(opens[0], closes[0]) - rng.uniform(0.1, 0.5))
 
     # --- Buat DataFrame candle ---
-    dates = pd.date_range(end=datetime.today(), periods=len(closes))
+    dates = pd.date_range(end=datetime.today(), periods=len(closes), normalize=True)
     df = pd.DataFrame({
         'Date': dates,
         'Open': opens,
@@ -48,6 +56,10 @@ try:
         'Close': closes
     }).set_index('Date')
 
+    # Library indikator di-import setelah input tampil (first paint lebih cepat);
+    # matplotlib/mplfinance hanya dipakai worker services/charts
+    import ta
+
     # --- Hitung indikator teknikal ---
     df['MA20'] = df['Close'].rolling(20).mean()
     df['Upper_BB'] = df['MA20'] + 2 * df['Close'].rolling(20).std()
@@ -59,36 +71,12 @@ try:
 
     # --- Candlestick Chart ---
     st.subheader("📈 Candlestick Chart")
-    mc = mpf.make_marketcolors(up='green', down='red', inherit=True)
-    s = mpf.make_mpf_style(marketcolors=mc)
-    mpf_fig, _ = mpf.plot(df, type='candle', mav=(20,), volume=False, style=s, returnfig=True)
-    st.pyplot(mpf_fig)
+    candles = df[['Open', 'High', 'Low', 'Close']].rename(columns=str.lower)
+    analisa_pg.show_chart(charts.render("candlestick", selected_coin, "1d", candles, mav=(20,)))
 
     # --- Plot Indikator Teknis ---
     st.subheader("📊 Indikator Teknis")
-    fig, axs = plt.subplots(3, 1, figsize=(10, 8), sharex=True)
-
-    # MA20 & Bollinger Bands
-    axs[0].plot(df.index, df['Close'], label='Close', color='black')
-    axs[0].plot(df.index, df['MA20'], label='MA20', color='blue')
-    axs[0].fill_between(df.index, df['Upper_BB'], df['Lower_BB'], color='lightgray', alpha=0.4)
-    axs[0].set_title("Harga + MA20 + Bollinger Bands")
-    axs[0].legend()
-
-    # RSI
-    axs[1].plot(df.index, df['RSI'], label='RSI', color='purple')
-    axs[1].axhline(70, color='red', linestyle='--')
-    axs[1].axhline(30, color='green', linestyle='--')
-    axs[1].set_title("RSI (14)")
-
-    # MACD
-    axs[2].plot(df.index, df['MACD'], label='MACD', color='blue')
-    axs[2].plot(df.index, df['MACD_signal'], label='Signal', color='orange')
-    axs[2].set_title("MACD")
-    axs[2].legend()
-
-    plt.tight_layout()
-    st.pyplot(fig)
+    analisa_pg.show_chart(charts.render("indicators", selected_coin, "1d", df))
 
     # --- Update waktu ---
     st.success(f"✅ Data terakhir: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} WIB")
@@ -1,26 +1,19 @@
 import streamlit as st
 import pandas as pd
-from services import database_pg
+from services import cache_policy, database_pg
 from datetime import timedelta, datetime
 
 st.set_page_config(page_title="Coin Stagnan Detector", layout="wide")
 st.title("📊 Coin Stagnan & Low Movement Detector")
 
-# --- Caching data coin & price history
-@st.cache_data(ttl=60)
-def get_all_tickers():
-    return database_pg.get_all_tickers()
+# Cutoff dibulatkan ke 5 menit supaya rerun memakai key cache yang sama;
+# ttl = granularity sehingga satu bucket cutoff hanya dihitung sekali
+CUTOFF_GRANULARITY = 300
 
-@st.cache_data(ttl=60)
-def get_price_history(ticker, since_date):
-    return database_pg.get_price_history_since(ticker, since_date)
-
-# --- Ambil semua coin dari database
-all_coins = get_all_tickers()
-
-if not all_coins:
-    st.warning("⚠️ Belum ada histori harga di database.")
-    st.stop()
+# --- Caching ringkasan harga per ticker (rollup harian + tick hari berjalan, diagregasi di Postgres)
+@cache_policy.cached(ttl=CUTOFF_GRANULARITY, max_entries=20, time_args=("since_date",), granularity=CUTOFF_GRANULARITY)
+def get_price_summary(since_date):
+    return database_pg.get_price_range_summary(since_date)
 
 # --- Filter periode hari & threshold analisis
 day_range = st.sidebar.selectbox("Periode Analisis (hari)", [3, 7, 14, 30, 60], index=0)
@@ -28,34 +21,33 @@ range_threshold = st.sidebar.slider("📈 Max Range Harga (%)", 0.1, 5.0, 1.0, 0
 min_price = st.sidebar.number_input("Harga Minimal Coin (IDR)", value=0.0, step=500.0)
 
 # --- Tanggal cutoff
-cutoff_date = (datetime.now() - timedelta(days=day_range)).strftime('%Y-%m-%d %H:%M:%S')
+cutoff_date = cache_policy.bucket_time(
+    (datetime.now() - timedelta(days=day_range)).strftime('%Y-%m-%d %H:%M:%S'), CUTOFF_GRANULARITY
+)
 st.write(f"📅 Analisis dari {cutoff_date} s.d. sekarang")
 
-# --- Analisis koin stagnan
-stagnan_coins = []
-
-for coin in all_coins:
-    logs = get_price_history(coin, cutoff_date)
-    if len(logs) < 5:
-        continue
-
-    prices = [l[0] for l in logs]
-    harga_max = max(prices)
-    harga_min = min(prices)
-
-    if harga_max == 0:
-        continue
-
-    price_range = ((harga_max - harga_min) / harga_min) * 100
-    harga_terakhir = prices[0]
+# --- Analisis koin stagnan (satu query agregat, satu baris per ticker)
+rows = get_price_summary(cutoff_date)
+if not rows:
+    st.warning("⚠️ Belum ada histori harga di database.")
+    st.stop()
 
-    if price_range <= range_threshold and harga_terakhir >= min_price:
-        stagnan_coins.append({
-            "Ticker": coin,
-            "Harga Terkini": harga_terakhir,
-            f"Range {day_range} Hari (%)": round(price_range, 3),
-            "Data Point": len(prices)
-        })
+summary = pd.DataFrame(
+    rows, columns=["ticker", "harga_max", "harga_min", "harga_terakhir", "data_point"]
+).set_index("ticker")
+summary = summary[(summary["data_point"] >= 5) & (summary["harga_max"] > 0) & (summary["harga_min"] > 0)]
+summary["price_range"] = (summary["harga_max"] - summary["harga_min"]) / summary["harga_min"] * 100
+summary = summary[(summary["price_range"] <= range_threshold) & (summary["harga_terakhir"] >= min_price)]
+
+stagnan_coins = [
+    {
+        "Ticker": coin,
+        "Harga Terkini": row["harga_terakhir"],
+        f"Range {day_range} Hari (%)": round(row["price_range"], 3),
+        "Data Point": int(row["data_point"])
+    }
+    for coin, row in summary.sort_index().iterrows()
+]
 
 # --- Tampilkan hasil
 if stagnan_coins:
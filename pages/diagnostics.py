@@ -0,0 +1,137 @@
+import streamlit as st
+import pandas as pd
+import os
+from datetime import datetime
+from services import cache_policy, coordination, coverage, metrics, collector, scheduler, write_behind
+
+st.set_page_config(page_title="🩺 Diagnostics", layout="wide")
+st.title("🩺 Diagnostics Siklus Refresh")
+
+cycles = metrics.recent_cycles()
+histograms, counters = metrics.snapshot()
+
+# --- Ringkasan ---
+# Replika follower tidak menjalankan siklus; bagian lain tetap ditampilkan
+if cycles:
+    overruns = counters.get("cycle_overruns_total", 0)
+    total = counters.get("cycles_total", 0)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Siklus", total)
+    col2.metric("Siklus Overrun", overruns)
+    col3.metric("Siklus Terakhir (s)", f"{cycles[-1]['wall']:.2f}")
+
+    if cycles[-1]["overrun"]:
+        st.warning(f"⚠️ Siklus terakhir melebihi interval {cycles[-1]['interval']}s")
+else:
+    st.info("ℹ️ Belum ada siklus refresh yang tercatat di instance ini (buka halaman utama dulu, atau instance ini follower).")
+
+# --- Scheduler ---
+sched = scheduler.status()
+lateness = histograms.get("tick_lateness")
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Interval Efektif (s)", sched["interval"] or "-", help=f"Faktor adaptif {sched['factor']}x")
+col2.metric("Tick Terlewat", counters.get("ticks_missed_total", 0))
+col3.metric("Rata-rata Telat Mulai (s)", f"{lateness['sum'] / lateness['count']:.2f}" if lateness and lateness["count"] else "-")
+col4.metric("Coin Bergerak", sched["hot"])
+if sched["shed"]:
+    st.caption("✂️ Pekerjaan dilewati dekat deadline: " + ", ".join(f"{k} ×{n}" for k, n in sched["shed"].items()))
+
+# --- Kualitas data ---
+cov = coverage.status()
+bad_ticks = coverage.outliers()
+col1, col2, col3 = st.columns(3)
+col1.metric("Ticker Ter-index", cov["tickers"])
+col2.metric("Interval Coverage", cov["intervals"], help=f"Celah ≤ {coverage.GAP_TOLERANCE} menit digabung")
+col3.metric("Bad Tick (7 hari)", len(bad_ticks))
+if bad_ticks:
+    with st.expander("🚫 Bad tick terbaru"):
+        st.dataframe(
+            pd.DataFrame(bad_ticks[-50:][::-1], columns=["Ticker", "Waktu", "Harga", "Sebelum", "Sesudah"])
+            .assign(Waktu=lambda d: pd.to_datetime(d["Waktu"], unit="s")),
+            use_container_width=True, hide_index=True
+        )
+
+# --- Korelasi antar coin ---
+coord = coordination.status()
+col1, col2, col3 = st.columns(3)
+col1.metric("Ticker di Matriks Korelasi", coord["tickers"])
+col2.metric("Korelasi Siap", coord["ready"], help=f"Minimal {coordination.MIN_SAMPLES} return per ticker")
+col3.metric("Grup Pump Aktif", coord["active_groups"])
+
+# --- Breakdown per siklus ---
+if cycles:
+    rows = []
+    for c in reversed(cycles):
+        row = {
+            "Mulai": datetime.fromtimestamp(c["started"]).strftime('%H:%M:%S'),
+            "Wall (s)": round(c["wall"], 3),
+            "Interval (s)": c["interval"],
+            "Overrun": c["overrun"],
+            "DB Round Trip": c["counters"].get("db_round_trips", 0),
+        }
+        for name, call in c["calls"].items():
+            row[f"{name} (s)"] = round(call["total"], 3)
+            row[f"{name} (n)"] = call["count"]
+        rows.append(row)
+
+    st.subheader("⏱️ Breakdown per Siklus")
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+# --- Histogram kumulatif per fungsi ---
+st.subheader("📊 Histogram Latensi")
+hist_rows = []
+for name, hist in sorted(histograms.items()):
+    hist_rows.append({
+        "Fungsi": name,
+        "Jumlah": hist["count"],
+        "Total (s)": round(hist["sum"], 3),
+        "Rata-rata (ms)": round(hist["sum"] / hist["count"] * 1000, 2) if hist["count"] else 0,
+        **{f"≤{b}s": n for b, n in zip(metrics.HIST_BUCKETS, hist["buckets"])},
+    })
+st.dataframe(pd.DataFrame(hist_rows), use_container_width=True, hide_index=True)
+
+# --- Status sumber data ---
+st.subheader("🌐 Sumber Data")
+st.dataframe(pd.DataFrame(collector.get_collector().status()), use_container_width=True, hide_index=True)
+
+# --- Write-behind ---
+st.subheader("💾 Write-Behind DB")
+wb = write_behind.stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Backlog", wb["backlog"])
+col2.metric("Umur Backlog (s)", f"{wb['oldest_age']:.1f}")
+col3.metric("Di Disk (spill)", wb["spilled"])
+col4.metric("Total Ditulis", wb["flushed"])
+if wb["spilling"]:
+    st.warning(f"⚠️ DB tertinggal, write di-spill ke {write_behind.SPILL_DIR}: {wb['last_error']}")
+if wb["overflows"]:
+    st.caption(f"📦 Antrian memori melewati {write_behind.MAX_QUEUE} record {wb['overflows']}× dan dipindah ke disk.")
+if wb["dead_letters"]:
+    st.error(
+        f"❌ {wb['dead_letters']} record gagal permanen, disimpan di "
+        f"{os.path.join(write_behind.SPILL_DIR, write_behind.DEAD_LETTER_FILE)}: {wb['last_error']}"
+    )
+
+# --- Cache analisa ---
+st.subheader("🗃️ Cache Analisa")
+cache_rows = [
+    {
+        "Fungsi": c["function"],
+        "Hit": c["hits"],
+        "Miss": c["misses"],
+        "Hit Rate (%)": round(c["hit_rate"] * 100, 1),
+        "Entry": f"{c['entries']}/{c['max_entries']}",
+        "Memori (KB)": round(c["bytes"] / 1024, 1),
+    }
+    for c in cache_policy.stats()
+]
+if cache_rows:
+    st.dataframe(pd.DataFrame(cache_rows), use_container_width=True, hide_index=True)
+else:
+    st.caption("Belum ada fungsi ter-cache yang dipanggil.")
+
+# --- Export Prometheus ---
+prom_text = metrics.render_prometheus()
+with st.expander("📄 Prometheus text format"):
+    st.code(prom_text, language="text")
+st.download_button("⬇️ Download metrics.prom", prom_text, file_name="metrics.prom")
@@ -0,0 +1,45 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from services import query_profiler
+
+st.set_page_config(page_title="🐢 Query Profiler", layout="wide")
+st.title("🐢 Query Profiler & Slow Query Log")
+
+if not query_profiler.ENABLED:
+    st.warning("⚠️ Profiling query nonaktif. Set env PUMP_PROFILE_QUERIES=1 untuk mengaktifkan.")
+    st.stop()
+
+order_labels = {
+    "Total waktu": "total_ms",
+    "p95": "p95_ms",
+    "p99": "p99_ms",
+    "Jumlah eksekusi": "count",
+    "Rows": "rows",
+    "Retry": "retries",
+}
+order = st.sidebar.selectbox("Urutkan berdasarkan", list(order_labels), index=0)
+limit = st.sidebar.slider("Jumlah query", 5, 100, 20, 5)
+
+# --- Top offenders ---
+report = query_profiler.top_queries(limit=limit, order_by=order_labels[order])
+if not report:
+    st.info("ℹ️ Belum ada query yang tercatat.")
+else:
+    df = pd.DataFrame(report).round(2)
+    st.subheader("🔥 Query Terberat")
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+# --- Slow query log ---
+st.subheader(f"🐢 Slow Query (≥ {query_profiler.SLOW_QUERY_MS:.0f} ms)")
+slow = query_profiler.slow_queries()
+if not slow:
+    st.success("✅ Belum ada slow query.")
+else:
+    df_slow = pd.DataFrame(reversed(slow))
+    df_slow["time"] = df_slow["time"].map(lambda t: datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S'))
+    st.dataframe(df_slow.round(1), use_container_width=True, hide_index=True)
+
+if st.sidebar.button("🧹 Reset statistik"):
+    query_profiler.reset()
+    st.rerun()
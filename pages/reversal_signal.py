@@ -1,29 +1,38 @@
 import streamlit as st
 import pandas as pd
-from services import database_pg
-import numpy as np
+from datetime import datetime, timedelta
+from services import coverage, database_pg
 
 st.set_page_config(page_title="📈 Reversal Signal Detector", layout="wide")
 st.title("📈 Reversal Signal Indodax (Breakout MA 5-9-14)")
 
 try:
-    # --- Ambil semua coin dari database ---
-    all_coins = database_pg.get_all_tickers()
-    if not all_coins:
+    # --- Close harian 30 hari semua coin (satu baris per hari) ---
+    since = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+    daily = database_pg.get_snapshot_matrix(since, daily=True)
+    if not daily["tickers"]:
         st.warning("⚠️ Belum ada histori harga di database.")
         st.stop()
+    closes = pd.DataFrame(daily["last"], columns=daily["tickers"])
 
     # --- Parameter periode analisis ---
     periode_cek = st.sidebar.slider("Jumlah hari histori dicek", 5, 30, 7, 1)
+    skip_bolong = st.sidebar.checkbox(
+        "Lewati coin dengan hari tanpa data", value=True,
+        help="Baris matriks harian hanya berisi hari yang ada datanya; hari kosong membuat MA tidak kontinu."
+    )
 
     hasil_reversal = []
 
-    for coin in all_coins:
-        harga_data = database_pg.get_last_30_daily_closes(coin)
-        if len(harga_data) < (periode_cek + 5):
+    for coin in closes.columns:
+        harga_series = closes[coin].dropna().reset_index(drop=True)  # urut lama ke baru
+        if len(harga_series) < (periode_cek + 5):
             continue  # skip kalau histori kurang
 
-        harga_series = pd.Series(harga_data[::-1])  # urut lama ke baru
+        # Hari tanpa data dalam jendela MA14 + periode (dari index coverage, tanpa scan DB)
+        hari_kosong = coverage.missing_days(coin, periode_cek + 14)
+        if hari_kosong and skip_bolong:
+            continue
 
         # Hitung MA
         ma5 = harga_series.rolling(5).mean()
@@ -32,7 +41,7 @@ try:
 
         # Cek apakah selama periode n hari harga selalu di bawah semua MA
         is_downtrend = all(
-            (harga_series[i] <= ma5[i]) and (harga_series[i] <= ma9[i]) and (harga_series[i] <= ma14[i])
+            (harga_series.iloc[i] <= ma5.iloc[i]) and (harga_series.iloc[i] <= ma9.iloc[i]) and (harga_series.iloc[i] <= ma14.iloc[i])
             for i in range(-periode_cek-1, -1)
         )
 
@@ -48,6 +57,7 @@ try:
                 "MA5": round(ma5.iloc[-1], 2),
                 "MA9": round(ma9.iloc[-1], 2),
                 "MA14": round(ma14.iloc[-1], 2),
+                "Hari Tanpa Data": len(hari_kosong),
             })
 
     # --- Tampilkan hasil ---
@@ -0,0 +1,70 @@
+import time
+import streamlit as st
+from services import cache_policy, screener
+
+st.set_page_config(page_title="🔎 Screener Teknikal", layout="wide")
+st.title("🔎 Screener Teknikal Semua Coin")
+
+# --- Ambil close semua ticker sekaligus (satu query) ---
+@cache_policy.cached(ttl=60, max_entries=20)
+def load_closes(n, timeframe):
+    return screener.load(n, timeframe)
+
+with st.sidebar:
+    st.header("⚙️ Data")
+    timeframe = st.selectbox("🕒 Timeframe", list(screener.TIMEFRAMES), index=2)
+    n_candles = st.slider("Jumlah Candle", 30, 200, 100, 10)
+
+    st.header("🎯 Kriteria")
+    rsi_range = st.slider("📈 RSI", 0.0, 100.0, (0.0, 100.0), 1.0)
+    cross_label = st.selectbox(
+        f"✂️ Cross MA{screener.MA_FAST}/MA{screener.MA_SLOW}", ["Semua", "Golden cross", "Death cross"]
+    )
+    pct_b_range = st.slider("🎚️ Bollinger %B", -0.5, 1.5, (-0.5, 1.5), 0.05)
+    macd_positive = st.checkbox("MACD histogram > 0")
+    macd_rising = st.checkbox("MACD histogram naik")
+    sort_by = st.selectbox("↕️ Urutkan", ["rsi", "pct_b", "macd_hist", "change_pct", "close"])
+    ascending = st.checkbox("Urut naik", value=True)
+
+try:
+    closes, tickers = load_closes(n_candles, timeframe)
+    if not tickers:
+        st.warning("⚠️ Belum ada snapshot pasar di database.")
+        st.stop()
+
+    start = time.perf_counter()
+    table = screener.compute(closes, tickers)
+    hasil = screener.screen(
+        table,
+        rsi_range=rsi_range,
+        cross={"Golden cross": "golden", "Death cross": "death"}.get(cross_label),
+        pct_b_range=pct_b_range,
+        macd_positive=macd_positive,
+        macd_rising=macd_rising,
+        min_candles=screener.MA_SLOW,
+        sort_by=sort_by,
+        ascending=ascending,
+    )
+    elapsed = time.perf_counter() - start
+
+    st.caption(
+        f"{len(tickers)} coin × {closes.shape[1]} candle {timeframe} · "
+        f"indikator dihitung dalam {elapsed * 1000:.0f} ms"
+    )
+    if hasil.empty:
+        st.info("ℹ️ Tidak ada coin yang memenuhi kriteria.")
+    else:
+        st.success(f"✅ {len(hasil)} coin memenuhi kriteria.")
+        st.dataframe(
+            hasil.rename(columns={
+                "ticker": "Ticker", "close": "Close", "change_pct": "Perubahan (%)",
+                "rsi": "RSI", "ma_fast": f"MA{screener.MA_FAST}", "ma_slow": f"MA{screener.MA_SLOW}",
+                "trend_up": "Trend Naik", "cross": "Cross", "pct_b": "%B",
+                "macd_hist": "MACD Hist", "macd_hist_rising": "Hist Naik", "candles": "Candle",
+            }).round(4),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+except Exception as e:
+    st.error(f"❌ Error saat screening: {e}")
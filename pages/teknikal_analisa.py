@@ -48,8 +48,10 @@ try:
             )
 
             # Support Resistance
-            support, resistance = analisa_pg.get_support_resistance_levels(closes)
-            st.write(f"🛡️ Support: {support:.2f}, 📌 Resistance: {resistance:.2f}")
+            support, resistance = analisa_pg.get_support_resistance_levels(selected_coin, float(closes[0]))
+            support_txt = f"{support:.8g}" if support else "-"
+            resistance_txt = f"{resistance:.8g}" if resistance else "-"
+            st.write(f"🛡️ Support: {support_txt}, 📌 Resistance: {resistance_txt}")
 
             # Chart price + MA
             df_full = analisa_pg.get_full_price_data(selected_coin)
@@ -1,30 +1,104 @@
 import streamlit as st
 import pandas as pd
+from datetime import datetime, time, timedelta
 from services import database_pg
 
 st.set_page_config(page_title="Valid Pump History", layout="wide")
 st.title("📈 Log Pump Valid (Harga Naik 3x Berturut-turut)")
 
-# Ambil data pump_history dari database
-pump_logs = database_pg.get_pump_history(limit=100)
+PAGE_SIZE = 100
 
-if not pump_logs:
-    st.info("Belum ada log pump valid yang terekam.")
+# --- Filter (dijalankan di SQL, bukan di pandas) ---
+with st.sidebar:
+    min_kenaikan = st.slider("Minimal Kenaikan Harga (%)", 0.5, 10.0, 2.0, 0.1)
+    min_kenaikan_volume = st.slider("Minimal Kenaikan Volume (%)", 0.0, 500.0, 0.0, 5.0)
+    ticker = st.text_input("Ticker (kosong = semua)", "").strip().lower()
+    tanggal = st.date_input(
+        "Rentang Tanggal",
+        value=(datetime.now().date() - timedelta(days=30), datetime.now().date()),
+    )
+
+since = until = None
+if isinstance(tanggal, (list, tuple)) and len(tanggal) == 2:
+    since = datetime.combine(tanggal[0], time.min)
+    until = datetime.combine(tanggal[1] + timedelta(days=1), time.min)
+
+filters = {
+    "min_rise": min_kenaikan,
+    "min_volume_rise": min_kenaikan_volume or None,
+    "ticker": ticker or None,
+    "since": since,
+    "until": until,
+}
+
+# Cursor keyset per halaman; reset saat filter berubah
+if st.session_state.get("pump_log_filters") != filters:
+    st.session_state.pump_log_filters = filters
+    st.session_state.pump_log_cursors = [None]
+
+# --- Statistik agregat ---
+stats = database_pg.get_pump_stats(**filters)
+if not stats["count"]:
+    st.info("Belum ada log pump valid yang memenuhi filter.")
+    st.stop()
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Total Pump", stats["count"])
+col2.metric("Median Kenaikan Harga (%)", f"{stats['median_rise']:.2f}")
+col3.metric("Median Kenaikan Volume (%)", f"{stats['median_volume_rise']:.2f}")
+
+# --- Hasil setelah deteksi (pump_labels, diisi job labeling tiap 5 menit) ---
+if stats["labeled"]:
+    st.subheader("🎯 Hasil Setelah Deteksi")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Pump Berlabel", stats["labeled"])
+    col2.metric("Median Return 1 Jam (%)", f"{stats['median_ret_1h']:.2f}")
+    col3.metric("Win Rate 1 Jam", f"{stats['win_rate_1h'] * 100:.0f}%")
+    col4.metric("Median Max Return 24 Jam (%)", f"{stats['median_max_return']:.2f}")
+    with st.expander("📐 Hasil per Kenaikan Harga saat Deteksi (tuning threshold)"):
+        st.dataframe(
+            pd.DataFrame(stats["by_rise"], columns=[
+                "Kenaikan ≥ (%)", "Jumlah", "Median Return 1 Jam (%)", "Win Rate 1 Jam", "Median Max Return (%)"
+            ]).round(3),
+            use_container_width=True, hide_index=True
+        )
 else:
-    # Ubah jadi DataFrame
-    df = pd.DataFrame(pump_logs, columns=[
-        "Ticker", "Harga Sebelum", "Harga Sekarang",
-        "Kenaikan Harga (%)", "Kenaikan Volume (%)", "Timestamp"
-    ])
+    st.caption("🏷️ Label return ke depan tersedia 24 jam setelah pump terdeteksi.")
+
+col_ticker, col_hour = st.columns(2)
+with col_ticker:
+    st.subheader("🏷️ Pump per Ticker")
+    st.dataframe(
+        pd.DataFrame(stats["per_ticker"], columns=[
+            "Ticker", "Jumlah", "Median Kenaikan (%)", "Max Kenaikan (%)", "Terakhir"
+        ]).round(2),
+        use_container_width=True, hide_index=True, height=300
+    )
+with col_hour:
+    st.subheader("🕒 Pump per Jam (WIB)")
+    per_hour = pd.DataFrame(stats["per_hour"], columns=["Jam", "Jumlah"]).set_index("Jam")
+    st.bar_chart(per_hour.reindex(range(24), fill_value=0))
 
-    # Tambahkan filter min kenaikan harga opsional
-    min_kenaikan = st.sidebar.slider("Minimal Kenaikan Harga (%)", 0.5, 10.0, 2.0, 0.1)
+# --- Log per halaman ---
+cursors = st.session_state.pump_log_cursors
+page = len(cursors) - 1
+pump_logs, next_cursor = database_pg.get_pump_history(limit=PAGE_SIZE, before=cursors[-1], **filters)
 
-    # Filter sesuai kenaikan harga
-    df_filtered = df[df["Kenaikan Harga (%)"] >= min_kenaikan]
+df = pd.DataFrame(pump_logs, columns=[
+    "ID", "Ticker", "Harga Sebelum", "Harga Sekarang",
+    "Kenaikan Harga (%)", "Kenaikan Volume (%)", "Timestamp",
+    "Harga Puncak", "Durasi (detik)", "Status",
+    "Return 5m (%)", "Return 1j (%)", "Return 24j (%)", "Max Return (%)", "Min Return (%)"
+])
 
-    st.write(f"📊 Menampilkan log pump dengan kenaikan harga minimal **{min_kenaikan}%**")
-    st.dataframe(df_filtered, use_container_width=True)
+st.subheader("📜 Log Pump")
+st.write(f"📊 Menampilkan log pump dengan kenaikan harga minimal **{min_kenaikan}%** — halaman {page + 1}")
+st.dataframe(df.drop(columns=["ID"]), use_container_width=True, hide_index=True)
 
-    # Tampilkan jumlah total valid pump yang memenuhi syarat
-    st.success(f"✅ Total valid pump: {len(df_filtered)}")
+prev_col, next_col = st.columns(2)
+if prev_col.button("⬅️ Sebelumnya", disabled=page == 0):
+    cursors.pop()
+    st.rerun()
+if next_col.button("Berikutnya ➡️", disabled=next_cursor is None):
+    cursors.append(next_cursor)
+    st.rerun()
@@ -0,0 +1,239 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import streamlit as st
+
+from services import database_pg, detector, metrics
+
+# --- Konfigurasi Alert Router ---
+# Langganan dari alert_subscriptions dimuat ke indeks di memori:
+# ticker watchlist (atau ALL = semua ticker) → langganan terurut menurut
+# min kenaikan harga. Satu pump dicocokkan lewat bisect (O(log n + hasil)),
+# bukan scan semua langganan. Pengiriman lewat antrian per chat yang dikuras
+# thread pool, jadi loop deteksi hanya mengantri dan tidak menunggu Telegram.
+RELOAD_EVERY = 60         # detik; perubahan dari replika lain terlihat dalam ≤ 1 menit
+RELOAD_RETRY = 10         # detik sebelum mencoba lagi setelah gagal memuat
+SEND_WORKERS = 8
+CHAT_INTERVAL = 1.0       # detik antar pesan ke chat yang sama (limit Telegram ±1 pesan/detik/chat)
+MAX_QUEUE = 100           # pesan tertunda per chat; bila penuh yang tertua dibuang
+MAX_RETRIES = 3
+ALL = "*"
+
+_lock = threading.Lock()
+_index = {}               # ticker / ALL -> (threshold harga terurut, langganan)
+_queues = {}              # chat_id -> deque[pesan]
+_draining = set()         # chat_id yang sedang dikuras worker
+_executor = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix="alert-send")
+# Reload punya thread sendiri: worker kirim bisa tidur lama karena rate limit
+_reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-reload")
+_state = {
+    "loaded_at": None,
+    "next_reload": 0.0,
+    "reloading": False,
+    "subscriptions": 0,
+    "sent": 0,
+    "failed": 0,
+    "dropped": 0,
+    "last_error": None,
+}
+
+
+# --- Indeks langganan ---
+def _subscription(row):
+    """Baris alert_subscriptions → dict; threshold preset jadi batas bawah threshold langganan."""
+    sub_id, name, chat_id, preset, tickers, min_price_rise, min_volume_rise, min_confidence, _ = row
+    preset_params = detector.PRESETS.get(preset, {})
+    return {
+        "id": sub_id,
+        "name": name,
+        "chat_id": str(chat_id),
+        "tickers": [t.lower() for t in tickers] if tickers else None,
+        "min_price_rise": max(min_price_rise, preset_params.get("price_threshold", 0.0)),
+        "min_volume_rise": max(min_volume_rise, preset_params.get("volume_threshold", 0.0)),
+        "min_confidence": min_confidence,
+    }
+
+
+def build_index(subscriptions):
+    """Kelompokkan langganan per ticker (ALL = tanpa watchlist), urut min_price_rise."""
+    groups = {}
+    for sub in subscriptions:
+        for key in sub["tickers"] or [ALL]:
+            groups.setdefault(key, []).append(sub)
+    index = {}
+    for key, subs in groups.items():
+        subs.sort(key=lambda s: s["min_price_rise"])
+        index[key] = ([s["min_price_rise"] for s in subs], subs)
+    return index
+
+
+def _default_subscription():
+    """Chat lama (TELEGRAM_CHAT_ID) tetap menerima semua alert selama belum ada langganan."""
+    try:
+        chat_id = st.secrets["TELEGRAM_CHAT_ID"]
+    except Exception:
+        return []
+    return [{
+        "id": None, "name": "default", "chat_id": str(chat_id), "tickers": None,
+        "min_price_rise": 0.0, "min_volume_rise": 0.0, "min_confidence": 0.0,
+    }]
+
+
+def _install_default():
+    """Pasang chat default bila indeks masih kosong (belum pernah berhasil dimuat)."""
+    with _lock:
+        if not _index:
+            _index.update(build_index(_default_subscription()))
+
+
+def reload():
+    """Muat ulang langganan aktif dari DB lalu ganti indeks secara atomik.
+
+    Bila gagal, indeks lama tetap dipakai (atau chat default bila belum
+    pernah termuat) dan percobaan berikutnya ditunda RELOAD_RETRY detik.
+    """
+    try:
+        subs = [_subscription(r) for r in database_pg.get_alert_subscriptions(enabled_only=True)]
+        index = build_index(subs or _default_subscription())
+        with _lock:
+            _index.clear()
+            _index.update(index)
+            now = time.time()
+            _state.update(loaded_at=now, next_reload=now + RELOAD_EVERY, subscriptions=len(subs))
+    except Exception as e:
+        _install_default()
+        _state.update(last_error=str(e), next_reload=time.time() + RELOAD_RETRY)
+        print(f"❌ Gagal memuat langganan alert: {e}")
+    finally:
+        _state["reloading"] = False
+
+
+def ensure_loaded():
+    """Tidak pernah menunggu DB: chat default langsung aktif, langganan dimuat di background."""
+    if _state["loaded_at"] is None:
+        _install_default()
+    if time.time() >= _state["next_reload"] and not _state["reloading"]:
+        _state["reloading"] = True
+        _reload_executor.submit(reload)
+
+
+def match(pump):
+    """Langganan (satu per chat) yang cocok dengan hasil deteksi ``pump``."""
+    rise = pump["kenaikan_harga"]
+    volume_rise = pump["kenaikan_volume"]
+    # Deteksi satu jendela tidak punya confidence → dianggap penuh
+    confidence = pump.get("confidence", 1.0)
+    matched = {}
+    with _lock:
+        for key in (pump["ticker"], ALL):
+            entry = _index.get(key)
+            if entry is None:
+                continue
+            thresholds, subs = entry
+            for sub in subs[:bisect_right(thresholds, rise)]:
+                if volume_rise >= sub["min_volume_rise"] and confidence >= sub["min_confidence"]:
+                    matched.setdefault(sub["chat_id"], sub)
+    return list(matched.values())
+
+
+# --- Pengiriman ---
+def _deliver(chat_id, message):
+    for attempt in range(MAX_RETRIES):
+        try:
+            detector.post_telegram(message, chat_id)
+            with _lock:
+                _state["sent"] += 1
+            metrics.incr("alerts_sent_total")
+            return True
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            _state["last_error"] = f"{chat_id}: {e}"
+            if status == 429:
+                try:
+                    retry_after = e.response.json().get("parameters", {}).get("retry_after", 1)
+                except ValueError:
+                    retry_after = 1
+                time.sleep(retry_after)
+                continue
+            if status is not None and 400 <= status < 500:
+                break         # chat salah / bot diblokir: tidak akan berhasil dengan retry
+            time.sleep(2 ** attempt)
+        except requests.RequestException as e:
+            _state["last_error"] = f"{chat_id}: {e}"
+            time.sleep(2 ** attempt)
+    with _lock:
+        _state["failed"] += 1
+    metrics.incr("alerts_failed_total")
+    print(f"❌ Gagal kirim alert ke chat {chat_id}: {_state['last_error']}")
+    return False
+
+
+def _drain(chat_id):
+    """Kirim antrian satu chat berurutan; chat lain dikuras worker lain secara paralel."""
+    while True:
+        with _lock:
+            queue = _queues.get(chat_id)
+            if not queue:
+                _draining.discard(chat_id)
+                return
+            message = queue.popleft()
+        started = time.time()
+        try:
+            _deliver(chat_id, message)
+        except Exception as e:
+            # Mis. TELEGRAM_TOKEN tidak ada di secrets: jangan biarkan chat macet di _draining
+            _state["last_error"] = f"{chat_id}: {e}"
+            print(f"❌ Gagal kirim alert ke chat {chat_id}: {e}")
+        with _lock:
+            more = bool(_queues.get(chat_id))
+        if more:
+            time.sleep(max(0.0, CHAT_INTERVAL - (time.time() - started)))
+
+
+def enqueue(chat_id, message):
+    """Antrikan pesan ke satu chat; O(1), tidak pernah menunggu pengiriman."""
+    with _lock:
+        queue = _queues.setdefault(chat_id, deque())
+        if len(queue) >= MAX_QUEUE:
+            queue.popleft()
+            _state["dropped"] += 1
+        queue.append(message)
+        if chat_id in _draining:
+            return
+        _draining.add(chat_id)
+    _executor.submit(_drain, chat_id)
+
+
+def publish(pump, message):
+    """Route satu pump ke semua chat yang berlangganan; return jumlah chat tujuan."""
+    subs = match(pump)
+    for sub in subs:
+        enqueue(sub["chat_id"], message)
+    metrics.incr("alerts_routed_total", len(subs))
+    return len(subs)
+
+
+def publish_group(members, message):
+    """Route satu event pump terkoordinasi; tiap chat menerima satu pesan meski cocok dengan banyak anggota.
+
+    ``members`` = list dict seperti hasil deteksi (ticker, kenaikan_harga, kenaikan_volume).
+    """
+    chats = {}
+    for pump in members:
+        for sub in match(pump):
+            chats.setdefault(sub["chat_id"], sub)
+    for chat_id in chats:
+        enqueue(chat_id, message)
+    metrics.incr("alerts_routed_total", len(chats))
+    return len(chats)
+
+
+def status():
+    with _lock:
+        state = dict(_state)
+        state["queued"] = {chat_id: len(q) for chat_id, q in _queues.items() if q}
+    return state
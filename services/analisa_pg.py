@@ -1,14 +1,11 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import ta
-import mplfinance as mpf
-import matplotlib.pyplot as plt
 
-from services import database_pg
+from services import cache_policy, charts, database_pg, levels
 
-# --- Pastikan pool siap ---
-database_pg.init_connection_pool()
+# ta di-import di dalam fungsi yang memakainya; matplotlib/mplfinance hanya
+# di-import worker services/charts, supaya halaman yang tidak menggambar chart
+# tidak ikut membayar import-nya.
 
 # --- Ambil semua ticker ---
 def get_all_tickers():
@@ -39,14 +36,11 @@ def get_last_n_closes(ticker, n):
 # --- Ambil histori harga full untuk candlestick ---
 def get_full_price_data(ticker):
     try:
-        rows = database_pg.execute_query(
-            """SELECT timestamp, last FROM ticker_history
-               WHERE ticker = %s ORDER BY timestamp ASC""",
-            (ticker,), fetch=True
+        history = database_pg.get_history_arrays(ticker)
+        df = pd.DataFrame(
+            {'close': history['last']},
+            index=pd.to_datetime(history['ts'], unit='s', utc=True).rename('timestamp')
         )
-        df = pd.DataFrame(rows, columns=['timestamp', 'close'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.set_index('timestamp', inplace=True)
         return df
     except Exception as e:
         st.error(f"❌ Error get_full_price_data: {e}")
@@ -54,6 +48,8 @@ def get_full_price_data(ticker):
 
 # --- Hitung indikator MA, RSI, BB ---
 def calculate_indicators(df):
+    import ta
+
     df['MA5'] = df['close'].rolling(5).mean()
     df['MA20'] = df['close'].rolling(20).mean()
     df['RSI'] = ta.momentum.rsi(df['close'], window=14)
@@ -64,19 +60,34 @@ def calculate_indicators(df):
     df.fillna(method='bfill', inplace=True)
     return df
 
-# --- Hitung support-resistance sederhana ---
-def get_support_resistance_levels(prices):
-    data = pd.Series(prices)
-    counts = data.value_counts().sort_values(ascending=False)
-    support = counts.index.min()
-    resistance = counts.index.max()
-    return support, resistance
+# --- Support-resistance dari volume profile ---
+@cache_policy.cached(ttl=300, max_entries=50)
+def _history_levels(ticker):
+    """Level dari histori LOOKBACK terakhir (proses yang tidak ingest); di-cache 5 menit per ticker."""
+    history = database_pg.get_history_arrays(ticker, minutes=int(levels.LOOKBACK // 60))
+    profile = levels.build_profile(history['last'], history['vol_idr'], ts=history['ts'])
+    return [float(p) for p in levels.top_levels(profile)[0] if p == p]
+
+def get_support_resistance_levels(ticker, price):
+    """(support, resistance) = high-volume node terdekat di bawah / di atas ``price``.
+
+    Pakai profil live dari services/levels bila proses ini sedang ingest;
+    kalau belum ada, profil dibangun dari histori ticker_history.
+    """
+    node_prices = levels.get_levels(ticker) or _history_levels(ticker)
+    return levels.nearest(node_prices, price)
+
+# --- Tampilkan chart dari service chart ---
+PRICE_CHART_BUCKET = 60   # detik; chart harga mentah digambar sampai menit terakhir yang sudah tutup
+
+def show_chart(image):
+    if image is None:
+        st.warning("⏳ Chart masih digambar, muat ulang halaman sebentar lagi.")
+    else:
+        st.image(image)
 
 # --- Chart candlestick (pakai 1H OHLC simulasi) ---
 def plot_candlestick_chart(df, ticker):
-    mc = mpf.make_marketcolors(up='g', down='r', inherit=True)
-    s = mpf.make_mpf_style(marketcolors=mc)
-
     df_ohlc = df.resample('1H').agg({
         'close': 'last'
     }).dropna()
@@ -86,21 +97,18 @@ def plot_candlestick_chart(df, ticker):
     df_ohlc['low']  = df_ohlc[['open', 'close']].min(axis=1)
     df_ohlc.dropna(inplace=True)
 
-    fig, _ = mpf.plot(
-        df_ohlc[['open','high','low','close']],
-        type='candle', style=s, title=f'{ticker} Candlestick Chart',
-        returnfig=True
-    )
-    st.pyplot(fig)
+    # Hanya candle yang sudah tutup: candle berjalan berubah tiap poll dan membatalkan cache PNG
+    candles = charts.closed_bars(df_ohlc[['open', 'high', 'low', 'close']], 3600)
+    if candles.empty:
+        st.info("ℹ️ Belum ada candle 1 jam yang lengkap.")
+        return
+    show_chart(charts.render("candlestick", ticker, "1h", candles, version=charts.bar_version(candles)))
 
 # --- Chart harga + MA ---
 def plot_price_chart(df, ticker):
-    fig, ax = plt.subplots(figsize=(10,5))
-    df['close'].plot(ax=ax, label='Close')
-    if 'MA5' in df.columns:
-        df['MA5'].plot(ax=ax, label='MA5')
-    if 'MA20' in df.columns:
-        df['MA20'].plot(ax=ax, label='MA20')
-    ax.set_title(f"{ticker} Harga + Moving Average")
-    ax.legend()
-    st.pyplot(fig)
+    columns = [c for c in ('close', 'MA5', 'MA20') if c in df.columns]
+    data = charts.closed_bars(df[columns], PRICE_CHART_BUCKET)
+    if data.empty:
+        st.info("ℹ️ Belum ada data harga yang lengkap untuk chart.")
+        return
+    show_chart(charts.render("price", ticker, "raw", data, version=charts.bar_version(data)))
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from services import database_pg, live
+
+# --- Konfigurasi Store ---
+WINDOW_POINTS = 600       # titik per ticker (~30 menit pada interval 3 detik)
+WARMUP_MINUTES = 30
+MAX_EVENTS = 500
+REFRESH_TIMEOUT = 30      # detik; refresh paksa bila tidak ada NOTIFY
+# updated_at = NOW() saat transaksi mulai, jadi commit bisa datang "terlambat":
+# cursor dibaca mundur sedikit, baris yang belum berubah dilewati
+CURSOR_OVERLAP = timedelta(seconds=10)
+
+_lock = threading.Lock()
+_snapshot = {"id": None, "ts": None, "tickers": {}}
+_windows = {}             # ticker -> deque[(ts, last, vol_idr)]
+_events = deque()         # event pump lama → baru, maksimal MAX_EVENTS
+_event_index = {}         # id -> dict event di _events (diperbarui di tempat saat episode berubah)
+_last_event_id = 0
+_cursor = {"updated_at": None}
+_version = 0
+_rendered = {}            # key -> (version, etag, body)
+_subscribers = []         # callback(list_event) untuk SSE
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _render(key, build):
+    """Serialisasi sekali per versi data; request berikutnya pakai bytes yang sama."""
+    with _lock:
+        cached = _rendered.get(key)
+        if cached and cached[0] == _version:
+            return cached[1], cached[2]
+        version = _version
+        body = _dumps(build())
+    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    with _lock:
+        _rendered[key] = (version, etag, body)
+    return etag, body
+
+
+# --- Baca (hot path, tanpa DB) ---
+def snapshot_response():
+    return _render("snapshot", lambda: {
+        "snapshot_id": _snapshot["id"],
+        "ts": _snapshot["ts"],
+        "tickers": _snapshot["tickers"],
+    })
+
+
+def ticker_response(ticker):
+    with _lock:
+        if ticker not in _windows:
+            return None
+    return _render(("ticker", ticker), lambda: {
+        "ticker": ticker,
+        "points": [list(p) for p in _windows[ticker]],
+    })
+
+
+def pumps_response():
+    return _render("pumps", lambda: {"events": [dict(e) for e in _events]})
+
+
+def subscribe(callback):
+    with _lock:
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    with _lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+# --- Tulis (dari thread feeder) ---
+def _apply_snapshot(snapshot_id, rows):
+    global _version
+    tickers = {}
+    with _lock:
+        ts = None
+        for ticker, last, vol_idr, ts_row in rows:
+            point = (ts_row.timestamp(), float(last), float(vol_idr))
+            ts = max(ts or point[0], point[0])
+            tickers[ticker] = {"last": point[1], "vol_idr": point[2], "ts": point[0]}
+            window = _windows.get(ticker)
+            if window is None:
+                window = _windows[ticker] = deque(maxlen=WINDOW_POINTS)
+            if not window or window[-1][0] < point[0]:
+                window.append(point)
+        _snapshot.update(id=snapshot_id, ts=ts, tickers=tickers)
+        _version += 1
+
+
+def _apply_events(rows):
+    """Tambahkan pump baru dan perbarui episode yang berubah (status/peak/durasi)."""
+    global _version, _last_event_id
+    changed = []
+    with _lock:
+        for row in rows:
+            (event_id, ticker, before, after, rise, vol_rise, ts, status,
+             peak_price, duration_sec, updated_at) = row
+            event = {
+                "id": event_id,
+                "ticker": ticker,
+                "harga_sebelum": float(before),
+                "harga_sekarang": float(after),
+                "kenaikan_harga": float(rise),
+                "kenaikan_volume": float(vol_rise),
+                "ts": ts.timestamp(),
+                "status": status,
+                "peak_price": float(peak_price) if peak_price is not None else None,
+                "duration_sec": duration_sec,
+                "updated_at": updated_at.timestamp(),
+            }
+            if _cursor["updated_at"] is None or updated_at > _cursor["updated_at"]:
+                _cursor["updated_at"] = updated_at
+            current = _event_index.get(event_id)
+            if current is not None:
+                if event["updated_at"] <= current["updated_at"]:
+                    continue      # baris overlap cursor yang sudah diterapkan
+                current.update(event)
+            elif event_id > _last_event_id:
+                _events.append(event)
+                _event_index[event_id] = event
+                _last_event_id = event_id
+                if len(_events) > MAX_EVENTS:
+                    _event_index.pop(_events.popleft()["id"], None)
+            else:
+                continue          # episode lama di luar window MAX_EVENTS
+            changed.append(dict(event))
+        if not changed:
+            return
+        _version += 1
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        callback(changed)
+
+
+def warm_up():
+    """Isi window per ticker dan event pump dari DB sekali saat start."""
+    for ticker, last, vol_idr, ts in database_pg.get_recent_history_all(WARMUP_MINUTES):
+        window = _windows.setdefault(ticker, deque(maxlen=WINDOW_POINTS))
+        window.append((ts.timestamp(), float(last), float(vol_idr)))
+    _apply_events(database_pg.get_recent_pump_events(MAX_EVENTS))
+    refresh(None)
+
+
+def refresh(snapshot_id):
+    """Satu kali baca DB per snapshot baru (bukan per request)."""
+    _apply_snapshot(snapshot_id, database_pg.get_latest_snapshot())
+    since = _cursor["updated_at"]
+    if since is None:
+        # Belum ada pump saat warm-up: cursor mulai dari baris pertama yang muncul
+        _apply_events(database_pg.get_recent_pump_events(MAX_EVENTS))
+    else:
+        _apply_events(database_pg.get_pump_events_changed(since - CURSOR_OVERLAP))
+
+
+def _feed_loop():
+    seen = live.version()
+    while True:
+        current = live.wait_for_change(seen, timeout=REFRESH_TIMEOUT)
+        payload, _ = live.latest()
+        seen = current
+        try:
+            refresh(payload.get("snapshot_id") if payload else None)
+        except Exception as e:
+            print(f"❌ Refresh API store gagal: {e}")
+            time.sleep(1)
+
+
+def start_feeder():
+    """Warm-up lalu ikuti NOTIFY di thread background."""
+    live.ensure_listener()
+    warm_up()
+    thread = threading.Thread(target=_feed_loop, name="api-feeder", daemon=True)
+    thread.start()
+    return thread
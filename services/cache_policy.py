@@ -0,0 +1,128 @@
+import inspect
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import wraps
+
+import streamlit as st
+
+# --- Konfigurasi Cache Policy ---
+# Argumen waktu dibulatkan ke bawah ke granularity ini supaya rerun dengan
+# datetime.now() yang berbeda beberapa detik tetap memakai key cache yang sama.
+DEFAULT_GRANULARITY = int(os.environ.get("PUMP_CACHE_GRANULARITY", "300"))   # detik
+DEFAULT_MAX_ENTRIES = int(os.environ.get("PUMP_CACHE_MAX_ENTRIES", "1000"))  # per fungsi
+
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+_lock = threading.Lock()
+_stats = {}               # nama fungsi -> statistik + mirror LRU entry (key -> (expire, bytes))
+
+
+def bucket_time(value, granularity=DEFAULT_GRANULARITY):
+    """Bulatkan datetime / string waktu ke bawah ke kelipatan ``granularity`` detik.
+
+    Tipe dan format input dipertahankan; ``date`` dan nilai lain dikembalikan apa adanya.
+    """
+    if isinstance(value, datetime):
+        epoch = value.timestamp()
+        floored = epoch - epoch % granularity
+        return datetime.fromtimestamp(floored, value.tzinfo) if value.tzinfo else datetime.fromtimestamp(floored)
+    if isinstance(value, date) or not isinstance(value, str):
+        return value
+    for fmt in _TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return bucket_time(parsed, granularity).strftime(fmt)
+    return value
+
+
+def _sizeof(value):
+    """Perkiraan ukuran entry = ukuran pickle (st.cache_data menyimpan hasil ter-pickle)."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+def _record(name, key, missed, value, ttl, max_entries):
+    now = time.monotonic()
+    with _lock:
+        stat = _stats[name]
+        entries = stat["entries"]
+        # Buang entry yang sudah expired dari mirror
+        for k in [k for k, (expire, _) in entries.items() if expire <= now]:
+            del entries[k]
+        if missed or key not in entries:
+            stat["misses" if missed else "hits"] += 1
+            entries[key] = (now + ttl if ttl else float("inf"), _sizeof(value))
+        else:
+            stat["hits"] += 1
+        entries.move_to_end(key)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+
+
+def cached(ttl, max_entries=DEFAULT_MAX_ENTRIES, time_args=(), granularity=DEFAULT_GRANULARITY):
+    """``st.cache_data`` dengan key waktu yang dibulatkan, batas entry, dan statistik.
+
+    ``time_args`` = nama parameter berisi waktu (datetime atau string) yang
+    dibulatkan dengan :func:`bucket_time` sebelum dipakai sebagai key.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+        state = threading.local()
+        with _lock:
+            _stats[name] = {"hits": 0, "misses": 0, "max_entries": max_entries, "entries": OrderedDict()}
+
+        @st.cache_data(ttl=ttl, max_entries=max_entries, show_spinner=False)
+        @wraps(func)
+        def compute(*args, **kwargs):
+            state.missed = True
+            return func(*args, **kwargs)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            for arg in time_args:
+                bound.arguments[arg] = bucket_time(bound.arguments[arg], granularity)
+            state.missed = False
+            result = compute(*bound.args, **bound.kwargs)
+            _record(name, repr(tuple(bound.arguments.items())), state.missed, result, ttl, max_entries)
+            return result
+
+        wrapper.clear = compute.clear
+        return wrapper
+    return decorator
+
+
+def stats():
+    """Hit rate dan perkiraan memori per fungsi ter-cache."""
+    now = time.monotonic()
+    rows = []
+    with _lock:
+        for name, stat in sorted(_stats.items()):
+            live = [size for expire, size in stat["entries"].values() if expire > now]
+            total = stat["hits"] + stat["misses"]
+            rows.append({
+                "function": name,
+                "hits": stat["hits"],
+                "misses": stat["misses"],
+                "hit_rate": stat["hits"] / total if total else 0.0,
+                "entries": len(live),
+                "max_entries": stat["max_entries"],
+                "bytes": sum(live),
+            })
+    return rows
+
+
+def reset():
+    with _lock:
+        for stat in _stats.values():
+            stat.update(hits=0, misses=0)
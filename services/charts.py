@@ -0,0 +1,228 @@
+import hashlib
+import io
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import pandas as pd
+
+from services import metrics
+
+# --- Konfigurasi Chart Service ---
+# Figure digambar di process pool (matplotlib tidak memegang GIL proses
+# Streamlit) lalu hasil PNG/SVG di-cache per (jenis, ticker, timeframe, versi
+# data, format). Rerun dengan data yang sama langsung memakai bytes cache.
+# Tiap figure ditutup di worker setelah di-encode; worker diganti tiap
+# MAX_TASKS_PER_WORKER render supaya memori matplotlib tidak menumpuk.
+CHART_WORKERS = 2
+MAX_TASKS_PER_WORKER = 50
+RENDER_TIMEOUT = 30       # detik
+CACHE_MAX_ENTRIES = 200
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+DPI = 100
+
+_lock = threading.Lock()
+_cache = OrderedDict()    # key -> bytes (LRU)
+_inflight = {}            # key -> Future; satu render untuk request identik yang bersamaan
+_pool = {"executor": None}
+_state = {"hits": 0, "misses": 0, "bytes": 0, "fallbacks": 0, "timeouts": 0}
+
+
+# --- Renderer (jalan di worker; harus fungsi top-level agar bisa di-pickle) ---
+def _encode(fig, fmt):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=DPI, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def _render_price(df, ticker, **options):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.plot(df.index, df['close'], label='Close')
+    for column in ('MA5', 'MA20'):
+        if column in df.columns:
+            ax.plot(df.index, df[column], label=column)
+    ax.set_title(f"{ticker} Harga + Moving Average")
+    ax.legend()
+    return fig
+
+
+def _render_candlestick(df, ticker, mav=None):
+    import mplfinance as mpf
+
+    mc = mpf.make_marketcolors(up='g', down='r', inherit=True)
+    s = mpf.make_mpf_style(marketcolors=mc)
+    fig, _ = mpf.plot(
+        df[['open', 'high', 'low', 'close']],
+        type='candle', style=s, title=f'{ticker} Candlestick Chart',
+        **({"mav": tuple(mav)} if mav else {}), returnfig=True
+    )
+    return fig
+
+
+def _render_indicators(df, ticker, **options):
+    """Panel Close+MA20+BB, RSI dan MACD (halaman Analisa Candle Pro)."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 8))
+    axs = fig.subplots(3, 1, sharex=True)
+
+    axs[0].plot(df.index, df['Close'], label='Close', color='black')
+    axs[0].plot(df.index, df['MA20'], label='MA20', color='blue')
+    axs[0].fill_between(df.index, df['Upper_BB'], df['Lower_BB'], color='lightgray', alpha=0.4)
+    axs[0].set_title(f"{ticker} Harga + MA20 + Bollinger Bands")
+    axs[0].legend()
+
+    axs[1].plot(df.index, df['RSI'], label='RSI', color='purple')
+    axs[1].axhline(70, color='red', linestyle='--')
+    axs[1].axhline(30, color='green', linestyle='--')
+    axs[1].set_title("RSI (14)")
+
+    axs[2].plot(df.index, df['MACD'], label='MACD', color='blue')
+    axs[2].plot(df.index, df['MACD_signal'], label='Signal', color='orange')
+    axs[2].set_title("MACD")
+    axs[2].legend()
+
+    fig.tight_layout()
+    return fig
+
+
+RENDERERS = {
+    "price": _render_price,
+    "candlestick": _render_candlestick,
+    "indicators": _render_indicators,
+}
+
+
+def _render(kind, df, ticker, fmt, options):
+    """Gambar satu chart dan kembalikan bytes; figure selalu dilepas sebelum return."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = RENDERERS[kind](df, ticker, **options)
+    try:
+        return _encode(fig, fmt)
+    finally:
+        # Figure dari mplfinance terdaftar di pyplot; Figure biasa cukup dilepas referensinya
+        plt.close(fig)
+        fig.clear()
+
+
+# --- Cache & pool (proses Streamlit) ---
+def data_version(df):
+    """Hash isi DataFrame (index + nilai) sebagai versi data."""
+    hashed = pd.util.hash_pandas_object(df, index=True).values
+    return hashlib.blake2b(hashed.tobytes(), digest_size=12).hexdigest()
+
+
+def closed_bars(df, bucket_seconds, now=None):
+    """Baris sebelum bucket yang sedang berjalan (index DatetimeIndex).
+
+    Histori mentah bertambah tiap poll; dengan hanya menggambar bucket yang
+    sudah tutup, data (dan key cache) berubah sekali per ``bucket_seconds``.
+    """
+    now = time.time() if now is None else now
+    cutoff = pd.Timestamp(now // bucket_seconds * bucket_seconds, unit="s")
+    if df.index.tz is not None:
+        cutoff = cutoff.tz_localize("UTC")
+    return df[df.index < cutoff]
+
+
+def bar_version(df):
+    """Versi murah untuk data append-only: jumlah baris + timestamp terakhir."""
+    return f"{len(df)}:{df.index[-1].value}" if len(df) else "0"
+
+
+def _executor():
+    with _lock:
+        if _pool["executor"] is None:
+            _pool["executor"] = ProcessPoolExecutor(
+                max_workers=CHART_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=MAX_TASKS_PER_WORKER,
+            )
+        return _pool["executor"]
+
+
+def _store(key, image):
+    with _lock:
+        if key in _cache:
+            return
+        _cache[key] = image
+        _state["bytes"] += len(image)
+        while _cache and (len(_cache) > CACHE_MAX_ENTRIES or _state["bytes"] > CACHE_MAX_BYTES):
+            _, evicted = _cache.popitem(last=False)
+            _state["bytes"] -= len(evicted)
+
+
+def render(kind, ticker, timeframe, df, fmt="png", version=None, **options):
+    """Bytes gambar chart ``kind``; dari cache bila versi data tidak berubah.
+
+    ``version`` opsional (mis. :func:`bar_version` untuk data append-only);
+    default hash isi ``df``. ``options`` diteruskan ke renderer (mis. ``mav``
+    untuk candlestick). Return None bila render melewati RENDER_TIMEOUT;
+    render tetap berjalan dan hasilnya masuk cache untuk rerun berikutnya.
+    """
+    key = (kind, ticker, timeframe, version or data_version(df), fmt, tuple(sorted(options.items())))
+    with _lock:
+        image = _cache.get(key)
+        if image is not None:
+            _cache.move_to_end(key)
+            _state["hits"] += 1
+    if image is not None:
+        metrics.incr("chart_cache_hits_total")
+        return image
+
+    with _lock:
+        _state["misses"] += 1
+    metrics.incr("chart_cache_misses_total")
+    image = _render_in_pool(key, kind, df, ticker, fmt, options)
+    if image is not None:
+        _store(key, image)
+    return image
+
+
+def _finish(key, future):
+    """Callback render selesai: lepas dari _inflight, simpan hasil (termasuk render yang sempat timeout)."""
+    with _lock:
+        _inflight.pop(key, None)
+    if not future.cancelled() and future.exception() is None:
+        _store(key, future.result())
+
+
+@metrics.timed("chart_render")
+def _render_in_pool(key, kind, df, ticker, fmt, options):
+    try:
+        executor = _executor()
+        with _lock:
+            future = _inflight.get(key)
+            owner = future is None
+            if owner:
+                future = _inflight[key] = executor.submit(_render, kind, df, ticker, fmt, options)
+        if owner:
+            future.add_done_callback(partial(_finish, key))
+        return future.result(timeout=RENDER_TIMEOUT)
+    except FuturesTimeout:
+        with _lock:
+            _state["timeouts"] += 1
+        metrics.incr("chart_render_timeouts_total")
+        print(f"⚠️ Render chart {kind} {ticker} melewati {RENDER_TIMEOUT}s")
+        return None
+    except BrokenProcessPool:
+        # Worker mati (OOM/kill): pool dibuat ulang di request berikutnya, render kali ini di proses sendiri
+        with _lock:
+            _pool["executor"] = None
+            _state["fallbacks"] += 1
+        return _render(kind, df, ticker, fmt, options)
+
+
+def status():
+    with _lock:
+        return dict(_state, entries=len(_cache), inflight=len(_inflight))
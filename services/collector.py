@@ -0,0 +1,232 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+from services import metrics, recorder
+
+# --- Konfigurasi Collector ---
+PRIMARY_SOURCE = "indodax"
+MAX_WORKERS = 4
+JITTER = 0.1            # fraksi interval, acak agar sumber sekunder tidak serempak
+DUE_TOLERANCE = 0.5     # fraksi interval; sumber dianggap jatuh tempo sedikit lebih awal
+MAX_BACKOFF = 300       # detik
+HTTP_TIMEOUT = 10
+# Bisa diarahkan ke stub lokal (benchmarks/replay.py)
+INDODAX_BASE_URL = os.environ.get("PUMP_INDODAX_BASE_URL", "https://indodax.com").rstrip("/")
+
+
+# --- Sumber Data ---
+class Source:
+    """Satu sumber snapshot. Subclass cukup mengimplementasikan ``fetch()``.
+
+    ``fetch()`` mengembalikan list dict ``{"ticker", "last", "vol_idr"}`` dan
+    melempar exception bila gagal, supaya scheduler bisa menerapkan backoff.
+    ``kind`` menentukan jalur ingest hasilnya (``"ticker"`` = ticker_history).
+    """
+
+    kind = "ticker"
+
+    def __init__(self, source_id, interval):
+        self.source_id = source_id
+        self.interval = interval
+
+    def fetch(self):
+        raise NotImplementedError
+
+
+def parse_tickers(tickers):
+    """Ubah mapping ``{pair: info}`` ala Indodax jadi list snapshot."""
+    result = []
+    for ticker, info in tickers.items():
+        try:
+            result.append({
+                "ticker": ticker,
+                "last": float(info["last"]),
+                "vol_idr": float(info["vol_idr"])
+            })
+        except (KeyError, ValueError, TypeError):
+            continue
+    return result
+
+
+class JsonTickerSource(Source):
+    """Sumber generik: GET JSON lalu parse dengan ``parser(payload)``."""
+
+    def __init__(self, source_id, url, interval, parser):
+        super().__init__(source_id, interval)
+        self.url = url
+        self.parser = parser
+
+    def fetch(self):
+        response = requests.get(self.url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        if recorder.enabled():
+            recorder.record(self.source_id, urlparse(self.url).path, response.text)
+        return self.parser(response.json())
+
+
+def _parse_indodax(payload):
+    if 'tickers' not in payload:
+        raise ValueError("Response API Indodax tidak berisi 'tickers'.")
+    return parse_tickers(payload['tickers'])
+
+
+def indodax_tickers_source(interval=3):
+    return JsonTickerSource(PRIMARY_SOURCE, f"{INDODAX_BASE_URL}/api/tickers", interval, _parse_indodax)
+
+
+def indodax_summaries_source(interval=60):
+    return JsonTickerSource("indodax_summaries", f"{INDODAX_BASE_URL}/api/summaries", interval, _parse_indodax)
+
+
+# --- Scheduler ---
+class _SourceState:
+    def __init__(self, source):
+        self.source = source
+        self.next_due = 0.0
+        self.failures = 0
+        self.future = None
+        self.last_ok = None
+        self.last_error = None
+        self.last_duration = None
+        self.last_rows = 0
+
+
+class Collector:
+    """Jalankan tiap sumber pada interval masing-masing di worker pool bersama.
+
+    ``run_due(budget)`` tidak pernah menunggu lebih dari ``budget`` detik:
+    fetch yang belum selesai dibiarkan berjalan dan hasilnya diambil pada
+    pemanggilan berikutnya, sehingga latensi per siklus tetap terbatas
+    berapa pun jumlah sumbernya.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector")
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def register(self, source):
+        with self._lock:
+            self._states[source.source_id] = _SourceState(source)
+
+    def has(self, source_id):
+        with self._lock:
+            return source_id in self._states
+
+    def kind(self, source_id):
+        with self._lock:
+            return self._states[source_id].source.kind
+
+    def set_interval(self, source_id, interval):
+        with self._lock:
+            state = self._states.get(source_id)
+            if state:
+                state.source.interval = interval
+
+    def _run_source(self, source):
+        start = time.perf_counter()
+        rows = source.fetch()
+        return rows, time.perf_counter() - start
+
+    def _schedule_next(self, state, now):
+        """Jadwal normal, dipasang saat fetch di-submit."""
+        interval = state.source.interval
+        # Berjangkar ke jatuh tempo sebelumnya, bukan ke waktu fetch: keterlambatan
+        # tick (fragment polling 1 detik) tidak menumpuk jadi fetch yang terlewat.
+        # Tertinggal ≥ satu interval (start / setelah jeda) → mulai jadwal baru.
+        state.next_due += interval
+        if state.next_due < now:
+            state.next_due = now + interval
+        # Sumber utama mengikuti tick jam dinding scheduler; jitter hanya untuk sumber sekunder
+        if state.source.source_id != PRIMARY_SOURCE:
+            state.next_due += random.uniform(0, JITTER * interval)
+
+    def _schedule_backoff(self, state, now):
+        """Ganti jadwal normal dengan backoff; dipanggil setelah ``failures`` diperbarui."""
+        interval = state.source.interval
+        state.next_due = now + min(interval * (2 ** state.failures), MAX_BACKOFF)
+
+    def _is_due(self, state, now):
+        if state.future is not None:
+            return False
+        # Toleransi hanya untuk interval normal; backoff ditunggu penuh
+        tolerance = 0.0 if state.failures else state.source.interval * DUE_TOLERANCE
+        return now >= state.next_due - tolerance
+
+    def run_due(self, budget):
+        """Submit sumber yang jatuh tempo, kumpulkan hasil yang selesai.
+
+        Return dict ``source_id -> list snapshot``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for state in self._states.values():
+                if self._is_due(state, now):
+                    state.future = self._executor.submit(self._run_source, state.source)
+                    self._schedule_next(state, now)
+            pending = [s.future for s in self._states.values() if s.future is not None]
+
+        if pending:
+            wait(pending, timeout=budget)
+
+        results = {}
+        with self._lock:
+            for source_id, state in self._states.items():
+                future = state.future
+                if future is None or not future.done():
+                    continue
+                state.future = None
+                try:
+                    rows, duration = future.result()
+                except Exception as e:
+                    state.failures += 1
+                    state.last_error = str(e)
+                    self._schedule_backoff(state, time.monotonic())
+                    metrics.incr(f"source_errors:{source_id}")
+                    continue
+                state.failures = 0
+                state.last_error = None
+                state.last_ok = time.time()
+                state.last_duration = duration
+                state.last_rows = len(rows)
+                metrics.record(f"fetch:{source_id}", duration)
+                results[source_id] = rows
+        return results
+
+    def status(self):
+        with self._lock:
+            return [
+                {
+                    "source": source_id,
+                    "kind": state.source.kind,
+                    "interval": state.source.interval,
+                    "in_flight": state.future is not None,
+                    "failures": state.failures,
+                    "last_ok": state.last_ok,
+                    "last_duration": state.last_duration,
+                    "last_rows": state.last_rows,
+                    "last_error": state.last_error,
+                }
+                for source_id, state in self._states.items()
+            ]
+
+
+# --- Collector Global (satu per proses) ---
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def get_collector():
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = Collector()
+            _collector.register(indodax_tickers_source())
+            _collector.register(indodax_summaries_source())
+        return _collector
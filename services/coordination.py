@@ -0,0 +1,242 @@
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from services import database_pg, screener
+
+# --- Konfigurasi Deteksi Pump Terkoordinasi ---
+# Grup pump biasanya menggerakkan beberapa coin kecil bersamaan. Per snapshot
+# dihitung log-return tiap ticker dikurangi median pasar (gerak pasar umum
+# tidak dianggap koordinasi), lalu kovarians EWMA semua ticker
+# diperbarui dengan update rank-1 (O(n²), tanpa baca ulang histori):
+#     d = r - mean;  mean += α·d;  cov = (1 - α)·(cov + α·d·dᵀ)
+# Tiap siklus hanya ticker yang sedang bergerak naik (momentum EWMA cepat
+# ≥ MIN_MOVE_Z sigma) yang dikelompokkan: komponen terhubung dari graf
+# korelasi ≥ MIN_CORR. Grup ≥ MIN_GROUP coin jadi satu event.
+HALFLIFE = 40             # snapshot (±2 menit pada interval 3 detik) untuk mean/kovarians
+FAST_HALFLIFE = 5         # snapshot untuk momentum "sedang bergerak"
+MIN_SAMPLES = 100         # return per ticker sebelum korelasinya dipercaya
+RETURN_CLIP = 0.2         # batas |log-return| per snapshot; bad tick tidak merusak kovarians
+MIN_MOVE_Z = 4.0          # pada 3σ, dari 500 ticker ±1 lolos acak tiap siklus
+MIN_CORR = 0.6
+MIN_GROUP = 3
+GROUP_TIMEOUT = 120       # detik tanpa terdeteksi sebelum grup dianggap selesai
+WARM_BARS = 200           # close 3 detik yang dimuat dari poll tersimpan saat start
+WARM_BAR_SECONDS = 3
+
+ALPHA = 1 - 0.5 ** (1 / HALFLIFE)
+FAST_ALPHA = 1 - 0.5 ** (1 / FAST_HALFLIFE)
+# Simpangan baku EWMA(α) dari return iid bersigma σ = σ·√(α / (2 - α))
+FAST_SCALE = np.sqrt(FAST_ALPHA / (2 - FAST_ALPHA))
+
+_lock = threading.Lock()
+_index = {}               # ticker -> baris/kolom matriks
+_tickers = []
+_stats = {
+    "last": np.zeros(0),              # harga terakhir (NaN = belum pernah terlihat)
+    "mean": np.zeros(0),              # mean EWMA return
+    "fast": np.zeros(0),              # momentum EWMA cepat (return di atas mean)
+    "cov": np.zeros((0, 0)),
+    "samples": np.zeros(0, dtype=np.int64),
+}
+_groups = {}              # group_id -> grup aktif (lihat _open_group)
+_state = {"warm": False, "updates": 0, "last_update": None}
+
+
+def _grow(tickers):
+    """Tambah baris/kolom untuk ticker baru (dipanggil dengan _lock)."""
+    new = [t for t in dict.fromkeys(tickers) if t not in _index]
+    if not new:
+        return
+    for t in new:
+        _index[t] = len(_tickers)
+        _tickers.append(t)
+    k = len(new)
+    _stats["last"] = np.concatenate([_stats["last"], np.full(k, np.nan)])
+    for key in ("mean", "fast"):
+        _stats[key] = np.concatenate([_stats[key], np.zeros(k)])
+    _stats["samples"] = np.concatenate([_stats["samples"], np.zeros(k, dtype=np.int64)])
+    _stats["cov"] = np.pad(_stats["cov"], ((0, k), (0, k)))
+
+
+def _update(prices):
+    """Satu langkah rank-1 dari array harga (urut _tickers, NaN = absen); dipanggil dengan _lock."""
+    last = _stats["last"]
+    valid = (prices > 0) & (last > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(valid, np.log(prices / last), np.nan)
+    _stats["last"] = np.where(prices > 0, prices, last)
+    if valid.sum() < MIN_GROUP:
+        return
+    ret -= np.nanmedian(ret)
+    np.clip(ret, -RETURN_CLIP, RETURN_CLIP, out=ret)
+
+    # Ticker absen: d = 0, baris/kolomnya hanya meluruh (korelasinya tetap)
+    mean = _stats["mean"]
+    d = np.where(valid, ret - mean, 0.0)
+    mean += ALPHA * d
+    cov = _stats["cov"]
+    cov *= 1 - ALPHA
+    cov += np.multiply.outer(d * (ALPHA * (1 - ALPHA)), d)
+    fast = _stats["fast"]
+    fast += FAST_ALPHA * (d - fast)
+    _stats["samples"] += valid
+    _state["updates"] += 1
+
+
+def warm_start():
+    """Isi kovarians dari close WARM_BARS terakhir supaya korelasi langsung terpakai setelah restart."""
+    matrix = database_pg.get_close_matrix(WARM_BARS, WARM_BAR_SECONDS)
+    if not matrix["tickers"]:
+        return
+    closes = screener.ffill(matrix["last"].T)             # ticker × waktu
+    with _lock:
+        if _state["updates"]:
+            return
+        _grow(matrix["tickers"])
+        rows = np.fromiter((_index[t] for t in matrix["tickers"]), dtype=np.int64)
+        for column in closes.T:
+            prices = np.full(len(_tickers), np.nan)
+            prices[rows] = column
+            _update(prices)
+
+
+def observe(rows, now):
+    """Masukkan satu snapshot (list dict ticker/last) ke kovarians EWMA."""
+    if not _state["warm"]:
+        _state["warm"] = True
+        try:
+            warm_start()
+        except Exception as e:
+            print(f"⚠️ Warm start korelasi gagal: {e}")
+
+    with _lock:
+        _grow(r['ticker'] for r in rows)
+        idx = np.fromiter((_index[r['ticker']] for r in rows), dtype=np.int64, count=len(rows))
+        prices = np.full(len(_tickers), np.nan)
+        prices[idx] = [float(r['last']) for r in rows]
+        _update(prices)
+        _state["last_update"] = now
+
+
+def _components(adjacency):
+    """Komponen terhubung graf kecil (matriks bool simetris) → list array indeks."""
+    unvisited = np.ones(len(adjacency), dtype=bool)
+    components = []
+    for start in range(len(adjacency)):
+        if not unvisited[start]:
+            continue
+        members = np.zeros(len(adjacency), dtype=bool)
+        frontier = np.zeros(len(adjacency), dtype=bool)
+        frontier[start] = True
+        while frontier.any():
+            members |= frontier
+            unvisited &= ~frontier
+            frontier = adjacency[frontier].any(axis=0) & unvisited
+        components.append(np.flatnonzero(members))
+    return components
+
+
+def clusters(min_move_z=MIN_MOVE_Z, min_corr=MIN_CORR, min_group=MIN_GROUP):
+    """Kelompok ticker yang sedang naik bersama: list dict tickers/avg_corr/z."""
+    with _lock:
+        if not _tickers:
+            return []
+        variance = np.diag(_stats["cov"]).copy()
+        sigma = np.sqrt(variance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = _stats["fast"] / (sigma * FAST_SCALE)
+        moving = np.flatnonzero((_stats["samples"] >= MIN_SAMPLES) & (variance > 0) & (z >= min_move_z))
+        if len(moving) < min_group:
+            return []
+        sub = _stats["cov"][np.ix_(moving, moving)]
+        tickers = [_tickers[i] for i in moving]
+        z = z[moving]
+    corr = sub / np.outer(sigma[moving], sigma[moving])
+    adjacency = corr >= min_corr
+    np.fill_diagonal(adjacency, False)
+
+    found = []
+    for members in _components(adjacency):
+        if len(members) < min_group:
+            continue
+        pair = corr[np.ix_(members, members)]
+        found.append({
+            "tickers": [tickers[i] for i in members],
+            "avg_corr": float((pair.sum() - len(members)) / (len(members) * (len(members) - 1))),
+            "z": {tickers[i]: float(z[i]) for i in members},
+        })
+    found.sort(key=lambda g: -len(g["tickers"]))
+    return found
+
+
+def _open_group(cluster, now):
+    return {
+        "group_id": uuid.uuid4().hex,
+        "tickers": set(cluster["tickers"]),
+        "started": now,
+        "last_seen": now,
+        "avg_corr": cluster["avg_corr"],
+    }
+
+
+def evaluate(now=None, **params):
+    """Cluster siklus ini → event grup.
+
+    Cluster yang beririsan ≥ setengah anggota dengan grup aktif dianggap grup
+    yang sama (anggota baru ditambahkan, event ``"update"``); selain itu grup
+    baru dibuka (event ``"open"``, kirim satu alert). Grup yang tidak terlihat
+    GROUP_TIMEOUT detik ditutup diam-diam. Return list event dict
+    ``event/group_id/tickers/new_tickers/avg_corr/z/started``.
+    """
+    now = time.time() if now is None else now
+    events = []
+    found = clusters(**params)
+    with _lock:
+        for cluster in found:
+            members = set(cluster["tickers"])
+            group = next(
+                (g for g in _groups.values()
+                 if len(g["tickers"] & members) * 2 >= min(len(g["tickers"]), len(members))),
+                None
+            )
+            if group is None:
+                group = _open_group(cluster, now)
+                _groups[group["group_id"]] = group
+                event, new = "open", sorted(members)
+            else:
+                new = sorted(members - group["tickers"])
+                group["tickers"] |= members
+                group["last_seen"] = now
+                group["avg_corr"] = cluster["avg_corr"]
+                event = "update"
+            events.append({
+                "event": event,
+                "group_id": group["group_id"],
+                "tickers": sorted(group["tickers"]),
+                "new_tickers": new,
+                "avg_corr": cluster["avg_corr"],
+                "z": cluster["z"],
+                "started": group["started"],
+            })
+        for group_id in [g for g, group in _groups.items() if now - group["last_seen"] > GROUP_TIMEOUT]:
+            del _groups[group_id]
+    return events
+
+
+def grouped_tickers():
+    """Ticker anggota grup aktif; alert per-coin mereka diwakili alert grup."""
+    with _lock:
+        return set().union(*(g["tickers"] for g in _groups.values())) if _groups else set()
+
+
+def status():
+    with _lock:
+        return {
+            "tickers": len(_tickers),
+            "ready": int((_stats["samples"] >= MIN_SAMPLES).sum()),
+            "updates": _state["updates"],
+            "active_groups": len(_groups),
+        }
@@ -0,0 +1,210 @@
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from services import database_pg, write_behind
+
+# --- Konfigurasi Coverage ---
+# Ingest hanya jalan selama ada tab terbuka, jadi histori penuh lubang. Per
+# ticker disimpan daftar interval menit (epoch // 60) yang berisi data;
+# celah ≤ GAP_TOLERANCE menit (tick terlambat / interval adaptif) digabung.
+# "Apakah jendela ini lengkap?" = satu interval menutupi seluruh jendela:
+# O(1) untuk jendela yang berakhir di interval terakhir, O(log celah) selain itu.
+GAP_TOLERANCE = 2         # menit
+OUTLIER_PCT = 30.0        # tick yang loncat ≥30% lalu kembali di tick berikutnya = bad tick
+MAX_OUTLIERS = 1000       # outlier terbaru yang disimpan di memori
+RELOAD_EVERY = 60         # detik; proses yang tidak ingest memuat ulang dari DB
+LOAD_DAYS = 400           # interval yang dimuat dari DB (cukup untuk analisa harian)
+
+_lock = threading.Lock()
+_coverage = {}            # ticker -> (starts, ends) list menit, urut naik
+_outliers = deque(maxlen=MAX_OUTLIERS)  # (ticker, ts, price, prev_price, next_price)
+_index = {}               # ticker -> baris array tick terakhir
+_prev = np.zeros(0)       # harga tick t-1 (kandidat outlier)
+_prev2 = np.zeros(0)      # harga tick t-2
+_prev_ts = None
+_state = {"minute": None, "ingesting": False, "loaded_at": None, "dirty": set()}
+
+
+# --- Load / persist ---
+def load(now=None):
+    """Muat interval dari ticker_coverage dan outlier 7 hari terakhir."""
+    now = time.time() if now is None else now
+    since_minute = int(now // 60) - LOAD_DAYS * 1440
+    coverage = {}
+    for ticker, start, end in database_pg.get_coverage(since_minute=since_minute):
+        starts, ends = coverage.setdefault(ticker, ([], []))
+        starts.append(start)
+        ends.append(end)
+    outliers = database_pg.get_tick_outliers(datetime.fromtimestamp(now - 7 * 86400, timezone.utc))
+    with _lock:
+        _coverage.clear()
+        _coverage.update(coverage)
+        _outliers.clear()
+        _outliers.extend(tuple(o) for o in outliers)
+        _state["loaded_at"] = now
+
+
+def _ensure_fresh():
+    """Proses ingest memegang index terbaru; proses lain memuat ulang dari DB berkala."""
+    if _state["ingesting"]:
+        return
+    loaded_at = _state["loaded_at"]
+    if loaded_at is None or time.time() - loaded_at > RELOAD_EVERY:
+        try:
+            load()
+        except Exception as e:
+            print(f"⚠️ Gagal memuat coverage: {e}")
+            _state["loaded_at"] = time.time()
+
+
+def _mark(ticker, minute):
+    """Tandai satu menit berisi data; return True bila interval berubah (dipanggil dengan _lock)."""
+    starts, ends = _coverage.setdefault(ticker, ([], []))
+    if ends and minute < ends[-1]:
+        return False
+    if ends and minute - ends[-1] <= GAP_TOLERANCE:
+        ends[-1] = minute + 1
+    else:
+        starts.append(minute)
+        ends.append(minute + 1)
+    return True
+
+
+def _grow(tickers):
+    global _prev, _prev2
+    new = [t for t in tickers if t not in _index]
+    for t in new:
+        _index[t] = len(_index)
+    if new:
+        pad = np.full(len(new), np.nan)
+        _prev = np.concatenate([_prev, pad])
+        _prev2 = np.concatenate([_prev2, pad])
+
+
+# --- Ingest ---
+def observe(rows, ts, source=database_pg.PRIMARY_SOURCE):
+    """Update coverage & cek bad tick dari satu snapshot (dipanggil pipeline tiap poll)."""
+    global _prev, _prev2, _prev_ts
+    if not _state["ingesting"]:
+        _state["ingesting"] = True
+        try:
+            load(ts)
+        except Exception as e:
+            print(f"⚠️ Gagal memuat coverage: {e}")
+
+    minute = int(ts // 60)
+    tickers = [r['ticker'] for r in rows]
+    outliers = []
+    flush = None
+    with _lock:
+        # Coverage cukup ditandai sekali per menit (snapshot pertama di menit itu)
+        if minute != _state["minute"]:
+            if _state["minute"] is not None and _state["dirty"]:
+                flush = [(t, _coverage[t][0][-1], _coverage[t][1][-1]) for t in _state["dirty"]]
+            _state["dirty"] = {t for t in tickers if _mark(t, minute)}
+            _state["minute"] = minute
+        else:
+            _state["dirty"].update(t for t in tickers if t not in _coverage and _mark(t, minute))
+
+        # Bad tick: tick t-1 loncat ≥ OUTLIER_PCT dari t-2 lalu balik ≥ OUTLIER_PCT di tick t
+        _grow(tickers)
+        idx = np.fromiter((_index[t] for t in tickers), dtype=np.int64, count=len(tickers))
+        price = np.fromiter((float(r['last']) for r in rows), dtype=np.float64, count=len(rows))
+        prev, prev2 = _prev[idx], _prev2[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            jump = (prev / prev2 - 1) * 100
+            back = (prev / price - 1) * 100
+        spike = (np.abs(jump) >= OUTLIER_PCT) & (np.abs(back) >= OUTLIER_PCT) & (np.sign(jump) == np.sign(back))
+        spike |= (prev <= 0)
+        for i in np.flatnonzero(spike):
+            outliers.append((tickers[i], _prev_ts, float(prev[i]), float(prev2[i]), float(price[i])))
+        _prev2[idx] = prev
+        _prev[idx] = price
+        _prev_ts = ts
+        _outliers.extend(outliers)
+
+    if flush:
+        write_behind.submit("coverage", {"intervals": flush, "source": source})
+    if outliers:
+        write_behind.submit("tick_outlier", {"records": outliers, "source": source})
+
+
+# --- Query ---
+def _minute(value):
+    """datetime / epoch detik → menit epoch."""
+    if hasattr(value, "timestamp"):
+        value = value.timestamp()
+    return int(value // 60)
+
+
+def is_complete(ticker, start, end):
+    """True bila ada data di setiap menit [start, end) (celah ≤ GAP_TOLERANCE diabaikan)."""
+    _ensure_fresh()
+    start_min, end_min = _minute(start), _minute(end)
+    with _lock:
+        entry = _coverage.get(ticker)
+        if not entry:
+            return False
+        starts, ends = entry
+        # Jalur cepat: jendela terbaru ada di interval terakhir (yang masih bisa
+        # bertambah, jadi menit berjalan yang belum ditandai ikut ditoleransi)
+        if starts[-1] <= start_min:
+            return end_min <= ends[-1] + GAP_TOLERANCE
+        i = bisect_right(starts, start_min) - 1
+        return i >= 0 and end_min <= ends[i]
+
+
+def coverage_ratio(ticker, start, end):
+    """Porsi menit [start, end) yang berisi data (0..1)."""
+    _ensure_fresh()
+    start_min, end_min = _minute(start), _minute(end)
+    if end_min <= start_min:
+        return 0.0
+    with _lock:
+        starts, ends = _coverage.get(ticker, ([], []))
+        i = max(bisect_right(ends, start_min), 0)
+        covered = 0
+        while i < len(starts) and starts[i] < end_min:
+            covered += min(ends[i], end_min) - max(starts[i], start_min)
+            i += 1
+    return covered / (end_min - start_min)
+
+
+def missing_days(ticker, days, now=None, tz_offset=7 * 3600):
+    """Tanggal (lokal, default WIB) dalam ``days`` hari terakhir yang sama sekali tidak punya data."""
+    _ensure_fresh()
+    now = time.time() if now is None else now
+    today = int((now + tz_offset) // 86400)
+    missing = []
+    with _lock:
+        starts, ends = _coverage.get(ticker, ([], []))
+        for day in range(today - days + 1, today + 1):
+            day_start = (day * 86400 - tz_offset) // 60
+            day_end = day_start + 1440
+            i = bisect_right(ends, day_start)
+            if i >= len(starts) or starts[i] >= day_end:
+                missing.append(time.strftime("%Y-%m-%d", time.gmtime(day * 86400)))
+    return missing
+
+
+def outliers(ticker=None, since=None):
+    """Bad tick yang tercatat (ticker, ts, price, prev_price, next_price), lama → baru."""
+    _ensure_fresh()
+    since = 0 if since is None else since
+    with _lock:
+        return [o for o in _outliers if (ticker is None or o[0] == ticker) and (o[1] or 0) >= since]
+
+
+def status():
+    with _lock:
+        return {
+            "tickers": len(_coverage),
+            "intervals": sum(len(s) for s, _ in _coverage.values()),
+            "outliers": len(_outliers),
+            "ingesting": _state["ingesting"],
+        }
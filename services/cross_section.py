@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# --- Konfigurasi Skor Pasar ---
+LOOKBACK = 60             # detik; return & perubahan volume dibanding snapshot ~60s lalu
+MAX_HISTORY = 120         # snapshot yang disimpan untuk mencari titik lookback
+MIN_RETURN_SCALE = 0.001  # lantai skala robust (0.1%) agar MAD=0 tidak meledakkan z
+MIN_VOLUME_SCALE = 0.001
+VOLUME_WEIGHT = 0.5
+MAD_TO_SIGMA = 1.4826
+Z_CLIP = 50.0             # batasi z supaya satu dimensi tidak mendominasi ranking
+
+_lock = threading.Lock()
+_history = deque(maxlen=MAX_HISTORY)   # (time, tickers, prices, volumes)
+_latest = {"time": None, "scores": {}}
+
+
+def robust_z(values, min_scale):
+    """z-score robust (median/MAD) untuk array; NaN diabaikan."""
+    median = np.nanmedian(values)
+    mad = np.nanmedian(np.abs(values - median))
+    scale = max(MAD_TO_SIGMA * mad, min_scale)
+    return (values - median) / scale
+
+
+def _reference(now):
+    """Snapshot tertua yang masih dalam jendela LOOKBACK (atau yang paling tua)."""
+    for entry in _history:
+        if now - entry[0] <= LOOKBACK:
+            return entry
+    return _history[-1] if _history else None
+
+
+def score_snapshot(rows, now=None):
+    """Skor semua ticker sekaligus relatif terhadap pasar.
+
+    Return dict ``ticker -> {"return_pct", "volume_pct", "z_return", "z_volume", "score", "rank"}``.
+    Ticker yang belum punya pembanding tidak ikut dinilai.
+    """
+    now = time.time() if now is None else now
+    tickers = [r["ticker"] for r in rows]
+    prices = np.fromiter((r["last"] for r in rows), dtype=np.float64, count=len(rows))
+    volumes = np.fromiter((r["vol_idr"] for r in rows), dtype=np.float64, count=len(rows))
+
+    with _lock:
+        ref = _reference(now)
+        _history.append((now, {t: i for i, t in enumerate(tickers)}, prices, volumes))
+
+    if ref is None or not rows:
+        return {}
+
+    _, ref_index, ref_prices, ref_volumes = ref
+    idx = np.fromiter((ref_index.get(t, -1) for t in tickers), dtype=np.int64, count=len(tickers))
+    has_ref = idx >= 0
+    prev_p = np.where(has_ref, ref_prices[np.maximum(idx, 0)], np.nan)
+    prev_v = np.where(has_ref, ref_volumes[np.maximum(idx, 0)], np.nan)
+    valid = has_ref & (prev_p > 0) & (prev_v > 0) & (prices > 0)
+    if valid.sum() < 3:
+        return {}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(valid, np.log(prices / prev_p), np.nan)
+        vol_chg = np.where(valid, volumes / prev_v - 1, np.nan)
+
+    z_ret = robust_z(ret, MIN_RETURN_SCALE)
+    z_vol = robust_z(vol_chg, MIN_VOLUME_SCALE)
+    # Hanya anomali naik yang relevan untuk pump
+    score = np.where(
+        valid,
+        np.clip(z_ret, 0, Z_CLIP) + VOLUME_WEIGHT * np.clip(z_vol, 0, Z_CLIP),
+        np.nan
+    )
+
+    order = np.argsort(-np.nan_to_num(score, nan=-np.inf))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(1, len(order) + 1)
+
+    scores = {}
+    for i in np.flatnonzero(valid):
+        scores[tickers[i]] = {
+            "return_pct": float(np.expm1(ret[i]) * 100),
+            "volume_pct": float(vol_chg[i] * 100),
+            "z_return": float(z_ret[i]),
+            "z_volume": float(z_vol[i]),
+            "score": float(score[i]),
+            "rank": int(ranks[i]),
+        }
+
+    with _lock:
+        _latest["time"] = now
+        _latest["scores"] = scores
+    return scores
+
+
+def top_anomalies(scores, k=20):
+    """k ticker dengan skor anomali tertinggi, urut menurun."""
+    ranked = sorted(scores.items(), key=lambda kv: kv[1]["rank"])[:k]
+    return [{"ticker": t, **s} for t, s in ranked]
+
+
+def candidates(scores, min_z):
+    """Ticker yang z-return-nya lolos ambang; dipakai untuk menyaring cek per-ticker."""
+    return {t for t, s in scores.items() if s["z_return"] >= min_z}
+
+
+def latest_scores():
+    with _lock:
+        return dict(_latest["scores"])
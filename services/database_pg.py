@@ -1,9 +1,13 @@
 import psycopg2
 from psycopg2 import pool
+from psycopg2.extras import execute_values
 from urllib.parse import urlparse
 import streamlit as st
+import os
+import threading
 import time
 from functools import wraps
+from services import cache_policy, metrics, query_profiler, migrations
 
 # --- Connection Pool Configuration ---
 DB_POOL = None
@@ -11,6 +15,17 @@ MAX_CONN = 5
 CONN_TIMEOUT = 5
 RETRY_DELAY = 1
 
+# Sumber default untuk query analisa/deteksi
+PRIMARY_SOURCE = "indodax"
+
+# Layout penyimpanan snapshot ticker. ticker_ticks ("rows", satu baris per
+# ticker) adalah layout kanonik dan selalu ditulis: semua reader bisa
+# membacanya. market_snapshots ("snapshots", satu baris per poll) opsional,
+# hanya mempercepat reader matriks (_polls()); aktifkan lewat
+# PUMP_SNAPSHOT_STORAGE=rows,snapshots. Poll sebelum diaktifkan tidak ada di
+# market_snapshots, jadi backfill dulu (lihat migrasi v6) bila perlu histori.
+SNAPSHOT_STORAGE = set(os.environ.get("PUMP_SNAPSHOT_STORAGE", "rows").split(",")) | {"rows"}
+
 # --- Decorator Retry ---
 def with_db_retry(max_retries=2):
     def decorator(func):
@@ -25,6 +40,7 @@ def with_db_retry(max_retries=2):
                     last_error = e
                     retry_count += 1
                     if retry_count <= max_retries:
+                        query_profiler.note_retry()
                         time.sleep(RETRY_DELAY * retry_count)
                         continue
                     raise
@@ -33,33 +49,48 @@ def with_db_retry(max_retries=2):
     return decorator
 
 # --- Connection Pool Management ---
+def connection_params():
+    """Parameter koneksi dari DATABASE_URL (dipakai pool & koneksi khusus)."""
+    result = urlparse(st.secrets["DATABASE_URL"])
+    return dict(
+        dbname=result.path[1:],
+        user=result.username,
+        password=result.password,
+        host=result.hostname,
+        port=result.port,
+        sslmode="require",
+        connect_timeout=CONN_TIMEOUT
+    )
+
 def init_connection_pool():
     global DB_POOL
     if DB_POOL:
         return
     try:
-        db_url = st.secrets["DATABASE_URL"]
-        result = urlparse(db_url)
-        DB_POOL = psycopg2.pool.SimpleConnectionPool(
+        # Threaded: sesi Streamlit, fragment dan thread background berbagi pool
+        DB_POOL = psycopg2.pool.ThreadedConnectionPool(
             minconn=1,
             maxconn=MAX_CONN,
-            dbname=result.path[1:],
-            user=result.username,
-            password=result.password,
-            host=result.hostname,
-            port=result.port,
-            sslmode="require",
-            connect_timeout=CONN_TIMEOUT
+            **connection_params()
         )
         print("✅ DB Pool initialized")
     except Exception as e:
         st.error(f"❌ DB Pool init failed: {str(e)}")
         DB_POOL = None
+        return
+    # Schema dipastikan sekali saat pool pertama dibuat di proses ini
+    try:
+        init_db_schema()
+    except Exception as e:
+        st.error(f"❌ DB schema init error: {e}")
 
 def get_connection():
     global DB_POOL
     if DB_POOL is None:
         init_connection_pool()
+    if DB_POOL is None:
+        # DB belum bisa dihubungi: error koneksi, bukan AttributeError (write-behind men-spill-nya)
+        raise psycopg2.OperationalError("DB pool belum tersedia")
     try:
         return DB_POOL.getconn()
     except psycopg2.pool.PoolError as e:
@@ -88,12 +119,15 @@ def close_all_connections():
         DB_POOL = None
 
 # --- Query Executor ---
+@metrics.timed("execute_query")
+@query_profiler.profiled
 @with_db_retry(max_retries=2)
 def execute_query(query, params=None, fetch=False, fetchone=False, return_affected_rows=False):
     conn = None
     cursor = None
     result = None
     try:
+        metrics.count_db_round_trip()
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute(query, params)
@@ -116,78 +150,293 @@ def execute_query(query, params=None, fetch=False, fetchone=False, return_affect
         if conn:
             release_connection(conn)
 
+@metrics.timed("execute_query")
+@query_profiler.profiled
+@with_db_retry(max_retries=2)
+def execute_values_query(query, rows, page_size=1000, template=None):
+    """Multi-row INSERT via execute_values (satu ``VALUES %s`` di query)."""
+    conn = None
+    cursor = None
+    try:
+        metrics.count_db_round_trip()
+        conn = get_connection()
+        cursor = conn.cursor()
+        execute_values(cursor, query, rows, template=template, page_size=page_size)
+        conn.commit()
+        return cursor.rowcount
+    except psycopg2.Error as e:
+        if conn:
+            conn.rollback()
+        st.error(f"❌ DB Error: {e}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
+
 # --- DB Schema Initialization ---
+_SCHEMA_VERSION = 0        # versi schema yang sudah dipastikan di proses ini
+_SCHEMA_LOCK = threading.Lock()
+MIGRATION_LOCK_KEY = 727001
+
+def _apply_migration(version, description, statements):
+    """Jalankan satu versi migrasi dalam satu transaksi, aman antar-replika."""
+    conn = None
+    cursor = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+        cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+        if cursor.fetchone() is None:
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            print(f"✅ Migrasi schema v{version}: {description}")
+        conn.commit()
+    except psycopg2.Error as e:
+        if conn:
+            conn.rollback()
+        st.error(f"❌ Migrasi schema v{version} gagal: {e}")
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            release_connection(conn)
+
 def init_db_schema():
-    queries = [
-        """
-        CREATE TABLE IF NOT EXISTS ticker_history (
-            id SERIAL PRIMARY KEY,
-            ticker TEXT NOT NULL,
-            last NUMERIC(18,8) NOT NULL,
-            vol_idr NUMERIC(18,2) NOT NULL,
-            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    """Terapkan migrasi yang belum tercatat di schema_migrations.
+
+    Hanya sekali per proses: sesi Streamlit berikutnya langsung return tanpa
+    query, dan DDL hanya dijalankan untuk versi yang belum pernah diterapkan.
+    """
+    global _SCHEMA_VERSION
+    latest = migrations.MIGRATIONS[-1][0]
+    if _SCHEMA_VERSION >= latest:
+        return
+    with _SCHEMA_LOCK:
+        if _SCHEMA_VERSION >= latest:
+            return
+        exists = execute_query("SELECT to_regclass('schema_migrations') IS NOT NULL", fetchone=True)
+        if not exists[0]:
+            execute_query(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """
+            )
+        current = execute_query("SELECT COALESCE(MAX(version), 0) FROM schema_migrations", fetchone=True)[0]
+        for version, description, statements in migrations.MIGRATIONS:
+            if version > current:
+                _apply_migration(version, description, statements)
+        _SCHEMA_VERSION = latest
+
+# --- CRUD Utilities ---
+# --- Ticker id ---
+_TICKER_IDS = {}          # (source, symbol) -> id; id tidak pernah berubah, aman di-cache
+_TICKER_SYMBOLS = {}      # id -> symbol
+_TICKER_IDS_LOCK = threading.Lock()
+
+def _load_ticker_ids(symbols, source):
+    rows = execute_query(
+        "SELECT id, symbol FROM tickers WHERE source = %s AND symbol = ANY(%s)",
+        (source, symbols),
+        fetch=True
+    ) or []
+    with _TICKER_IDS_LOCK:
+        for ticker_id, symbol in rows:
+            _TICKER_IDS[(source, symbol)] = ticker_id
+            _TICKER_SYMBOLS[ticker_id] = symbol
+
+def ticker_ids(symbols, source=PRIMARY_SOURCE):
+    """Map symbol → id tabel tickers; symbol baru didaftarkan sekali.
+
+    INSERT hanya untuk symbol yang benar-benar belum ada: ON CONFLICT tetap
+    memakan nilai identity, jadi insert semua symbol tiap start menghabiskan
+    sequence. SELECT ulang setelah insert juga melihat baris yang disisipkan
+    replika lain secara bersamaan (tidak ikut RETURNING).
+    """
+    with _TICKER_IDS_LOCK:
+        missing = sorted({s for s in symbols if (source, s) not in _TICKER_IDS})
+    if missing:
+        _load_ticker_ids(missing, source)
+        with _TICKER_IDS_LOCK:
+            missing = [s for s in missing if (source, s) not in _TICKER_IDS]
+    if missing:
+        execute_query(
+            """
+            INSERT INTO tickers (source, symbol)
+            SELECT %s, unnest(%s::text[])
+            ON CONFLICT (source, symbol) DO NOTHING
+            """,
+            (source, missing)
         )
-        """,
+        _load_ticker_ids(missing, source)
+    with _TICKER_IDS_LOCK:
+        return {s: _TICKER_IDS[(source, s)] for s in symbols}
+
+def ticker_symbols(ids):
+    """Kebalikan ticker_ids: map id → symbol."""
+    with _TICKER_IDS_LOCK:
+        missing = sorted({int(i) for i in ids if i not in _TICKER_SYMBOLS})
+    if missing:
+        rows = execute_query(
+            "SELECT id, source, symbol FROM tickers WHERE id = ANY(%s)",
+            (missing,),
+            fetch=True
+        ) or []
+        with _TICKER_IDS_LOCK:
+            for ticker_id, source, symbol in rows:
+                _TICKER_IDS[(source, symbol)] = ticker_id
+                _TICKER_SYMBOLS[ticker_id] = symbol
+    with _TICKER_IDS_LOCK:
+        return {int(i): _TICKER_SYMBOLS[int(i)] for i in ids}
+
+# --- CRUD Utilities ---
+def save_ticker_history(ticker, last, vol_idr, source=PRIMARY_SOURCE):
+    save_ticker_history_batch([{"ticker": ticker, "last": last, "vol_idr": vol_idr}], source=source)
+
+def save_ticker_history_batch(rows, source=PRIMARY_SOURCE, ts=None):
+    """Bulk insert satu snapshot (list dict ticker/last/vol_idr) dalam satu round trip.
+
+    ``ts`` = waktu capture snapshot (default NOW()), dipakai write-behind
+    supaya baris yang ditulis belakangan tetap bertimestamp saat fetch.
+    """
+    if not rows:
+        return
+    ids = ticker_ids([r['ticker'] for r in rows], source)
+    execute_values_query(
         """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM pg_constraint WHERE conname = 'unique_ticker_timestamp'
-            ) THEN
-                ALTER TABLE ticker_history
-                ADD CONSTRAINT unique_ticker_timestamp UNIQUE (ticker, timestamp);
-            END IF;
-        END$$;
+        INSERT INTO ticker_ticks (ticker_id, last, vol_idr, timestamp)
+        VALUES %s
+        ON CONFLICT (ticker_id, timestamp) DO NOTHING
         """,
+        [(ids[r['ticker']], float(r['last']), float(r['vol_idr']), ts) for r in rows],
+        template="(%s, %s, %s, COALESCE(%s, NOW()))"
+    )
+
+def save_market_snapshot(rows, source=PRIMARY_SOURCE, ts=None):
+    """Simpan satu poll sebagai satu baris market_snapshots (array diurutkan per ticker id)."""
+    if not rows:
+        return
+    ids = ticker_ids([r['ticker'] for r in rows], source)
+    ordered = sorted(rows, key=lambda r: ids[r['ticker']])
+    execute_query(
         """
-        CREATE INDEX IF NOT EXISTS idx_ticker_history_ticker ON ticker_history(ticker)
+        INSERT INTO market_snapshots (source, timestamp, ticker_ids, last, vol_idr)
+        VALUES (%s, COALESCE(%s, NOW()), %s::int[], %s::float8[], %s::float8[])
+        ON CONFLICT (source, timestamp) DO NOTHING
         """,
+        (
+            source,
+            ts,
+            [ids[r['ticker']] for r in ordered],
+            [float(r['last']) for r in ordered],
+            [float(r['vol_idr']) for r in ordered],
+        )
+    )
+
+def save_snapshot(rows, source=PRIMARY_SOURCE, ts=None):
+    """Tulis satu poll ke ticker_ticks, plus market_snapshots bila diaktifkan."""
+    save_ticker_history_batch(rows, source=source, ts=ts)
+    if "snapshots" in SNAPSHOT_STORAGE:
+        save_market_snapshot(rows, source=source, ts=ts)
+
+def save_orderbook_batch(records, ts=None):
+    """records: tuple (ticker, levels_blob, spread_bps, imbalance, depth_bid, depth_ask)."""
+    if not records:
+        return
+    execute_values_query(
         """
-        CREATE INDEX IF NOT EXISTS idx_ticker_history_timestamp ON ticker_history(timestamp)
+        INSERT INTO orderbook_snapshots
+        (ticker, levels, spread_bps, imbalance, depth_bid, depth_ask, timestamp)
+        VALUES %s
         """,
+        [(r[0], psycopg2.Binary(r[1]), *r[2:], ts) for r in records],
+        template="(%s, %s, %s, %s, %s, %s, COALESCE(%s, NOW()))"
+    )
+
+def save_coverage(intervals, source=PRIMARY_SOURCE):
+    """intervals: (ticker, start_minute, end_minute); interval yang sama hanya diperpanjang."""
+    if not intervals:
+        return
+    ids = ticker_ids([i[0] for i in intervals], source)
+    execute_values_query(
         """
-        CREATE TABLE IF NOT EXISTS pump_history (
-            id SERIAL PRIMARY KEY,
-            ticker TEXT NOT NULL,
-            harga_sebelum NUMERIC(18,8) NOT NULL,
-            harga_sekarang NUMERIC(18,8) NOT NULL,
-            kenaikan_harga NUMERIC(18,2) NOT NULL,
-            kenaikan_volume NUMERIC(18,2) NOT NULL,
-            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW()
-        )
+        INSERT INTO ticker_coverage (ticker_id, start_minute, end_minute)
+        VALUES %s
+        ON CONFLICT (ticker_id, start_minute) DO UPDATE
+        SET end_minute = GREATEST(ticker_coverage.end_minute, EXCLUDED.end_minute)
         """,
+        [(ids[t], start, end) for t, start, end in intervals]
+    )
+
+def get_coverage(source=PRIMARY_SOURCE, since_minute=0):
+    """Interval coverage (ticker, start_minute, end_minute) urut per ticker lalu waktu."""
+    results = execute_query(
         """
-        CREATE INDEX IF NOT EXISTS idx_pump_history_ticker ON pump_history(ticker)
+        SELECT t.symbol, c.start_minute, c.end_minute
+        FROM ticker_coverage c
+        JOIN tickers t ON t.id = c.ticker_id
+        WHERE t.source = %s AND c.end_minute > %s
+        ORDER BY t.symbol, c.start_minute
         """,
-        """
-        CREATE INDEX IF NOT EXISTS idx_pump_history_timestamp ON pump_history(timestamp)
-        """
+        (source, since_minute),
+        fetch=True
+    )
+    return results or []
 
-        
-    ]
-    for query in queries:
-        execute_query(query)
+def save_tick_outliers(records, source=PRIMARY_SOURCE):
+    """records: (ticker, ts datetime, price, prev_price, next_price)."""
+    if not records:
+        return
+    ids = ticker_ids([r[0] for r in records], source)
+    execute_values_query(
+        """
+        INSERT INTO tick_outliers (ticker_id, timestamp, price, prev_price, next_price)
+        VALUES %s
+        ON CONFLICT (ticker_id, timestamp) DO NOTHING
+        """,
+        [(ids[r[0]], *r[1:]) for r in records]
+    )
 
-# --- CRUD Utilities ---
-def save_ticker_history(ticker, last, vol_idr):
-    execute_query(
+def get_tick_outliers(since, source=PRIMARY_SOURCE):
+    results = execute_query(
         """
-        INSERT INTO ticker_history (ticker, last, vol_idr)
-        VALUES (%s, %s, %s)
-        ON CONFLICT (ticker, timestamp) DO NOTHING
+        SELECT t.symbol, EXTRACT(EPOCH FROM o.timestamp)::float8, o.price, o.prev_price, o.next_price
+        FROM tick_outliers o
+        JOIN tickers t ON t.id = o.ticker_id
+        WHERE t.source = %s AND o.timestamp >= %s
+        ORDER BY o.timestamp
         """,
-        (ticker, last, vol_idr)
+        (source, since),
+        fetch=True
     )
+    return results or []
 
-def get_recent_price_volume(ticker, limit=5):
+def prune_orderbook(days):
+    execute_query(
+        "DELETE FROM orderbook_snapshots WHERE timestamp < NOW() - make_interval(days => %s)",
+        (days,)
+    )
+
+def get_recent_price_volume(ticker, limit=5, source=PRIMARY_SOURCE):
     results = execute_query(
         """
         SELECT last, vol_idr FROM ticker_history
-        WHERE ticker = %s
+        WHERE ticker = %s AND source = %s
         ORDER BY timestamp DESC
         LIMIT %s
         """,
-        (ticker, limit),
+        (ticker, source, limit),
         fetch=True
     )
     return results or []
@@ -208,32 +457,505 @@ def save_pump_log(data):
         )
     )
 
-def get_pump_history(limit=50):
-    results = execute_query(
+def open_pump_episode(data, episode_id, ts=None):
+    """Buka satu baris episode pump; baris yang sama di-update sampai episode selesai."""
+    execute_query(
+        """
+        INSERT INTO pump_history
+        (ticker, harga_sebelum, harga_sekarang, kenaikan_harga, kenaikan_volume,
+         episode_id, peak_price, peak_volume, status, timestamp)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'open', COALESCE(%s, NOW()))
+        ON CONFLICT (episode_id) DO NOTHING
+        """,
+        (
+            data['ticker'],
+            data['harga_sebelum'],
+            data['harga_sekarang'],
+            data['kenaikan_harga'],
+            data['kenaikan_volume'],
+            episode_id,
+            data.get('harga_raw', data['harga_sekarang']),
+            data.get('volume_sekarang', 0),
+            ts
+        )
+    )
+
+def update_pump_episode(episode_id, peak_price, peak_volume, duration_sec):
+    execute_query(
+        """
+        UPDATE pump_history
+        SET peak_price = %s, peak_volume = %s, duration_sec = %s, updated_at = NOW()
+        WHERE episode_id = %s
+        """,
+        (peak_price, peak_volume, duration_sec, episode_id)
+    )
+
+def close_pump_episode(episode_id, peak_price, peak_volume, duration_sec, ts=None):
+    execute_query(
+        """
+        UPDATE pump_history
+        SET peak_price = %s, peak_volume = %s, duration_sec = %s,
+            ended_at = COALESCE(%s, NOW()), status = 'closed', updated_at = NOW()
+        WHERE episode_id = %s
+        """,
+        (peak_price, peak_volume, duration_sec, ts, episode_id)
+    )
+
+def save_price_event_log(data, ts=None):
+    execute_query(
         """
-        SELECT ticker, harga_sebelum::numeric(18,8), harga_sekarang::numeric(18,8),
-        kenaikan_harga::numeric(18,2), kenaikan_volume::numeric(18,2),
-        timestamp::varchar(19)
+        INSERT INTO price_event_log
+        (ticker, harga_sebelum, harga_sekarang, kenaikan_harga, kenaikan_volume, consecutive_up, timestamp)
+        VALUES (%s, %s, %s, %s, %s, %s, COALESCE(%s, NOW()))
+        """,
+        (
+            data['ticker'],
+            data['harga_sebelum'],
+            data['harga_sekarang'],
+            data['kenaikan_harga'],
+            data['kenaikan_volume'],
+            data['consecutive_up'],
+            ts
+        )
+    )
+
+def _pump_filters(min_rise=None, min_volume_rise=None, ticker=None, since=None, until=None):
+    """WHERE clause + params untuk filter pump_history (semua opsional)."""
+    clauses, params = [], []
+    if min_rise is not None:
+        clauses.append("kenaikan_harga >= %s")
+        params.append(min_rise)
+    if min_volume_rise is not None:
+        clauses.append("kenaikan_volume >= %s")
+        params.append(min_volume_rise)
+    if ticker:
+        clauses.append("ticker = %s")
+        params.append(ticker)
+    if since is not None:
+        clauses.append("timestamp >= %s")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp < %s")
+        params.append(until)
+    return (" AND ".join(clauses) or "TRUE"), params
+
+def get_pump_history(limit=50, before=None, **filters):
+    """Satu halaman pump_history terbaru (plus label return ke depan) → (rows, next_cursor).
+
+    Filter (min_rise, min_volume_rise, ticker, since, until) dijalankan di SQL.
+    Pagination keyset pada ``(timestamp, id)``: ``before`` = cursor dari halaman
+    sebelumnya; ``next_cursor`` None bila sudah halaman terakhir.
+    """
+    where, params = _pump_filters(**filters)
+    if before is not None:
+        where += " AND (timestamp, id) < (%s, %s)"
+        params += list(before)
+    results = execute_query(
+        f"""
+        SELECT id, ticker, harga_sebelum, harga_sekarang, kenaikan_harga, kenaikan_volume,
+               timestamp, peak_price, duration_sec, status,
+               l.ret_5m, l.ret_1h, l.ret_24h, l.max_return, l.min_return
         FROM pump_history
-        ORDER BY timestamp DESC
+        LEFT JOIN pump_labels l ON l.pump_id = pump_history.id
+        WHERE {where}
+        ORDER BY timestamp DESC, id DESC
         LIMIT %s
         """,
-        (limit,),
+        (*params, limit + 1),
+        fetch=True
+    ) or []
+    rows = results[:limit]
+    next_cursor = (rows[-1][6], rows[-1][0]) if len(results) > limit else None
+    return rows, next_cursor
+
+def get_pump_stats(tz="Asia/Jakarta", **filters):
+    """Agregat pump_history dengan filter yang sama: ringkasan, per ticker, per jam."""
+    where, params = _pump_filters(**filters)
+    summary = execute_query(
+        f"""
+        SELECT COUNT(*),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY kenaikan_harga),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY kenaikan_volume),
+               MIN(timestamp), MAX(timestamp)
+        FROM pump_history
+        WHERE {where}
+        """,
+        params,
+        fetchone=True
+    )
+    per_ticker = execute_query(
+        f"""
+        SELECT ticker, COUNT(*),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY kenaikan_harga),
+               MAX(kenaikan_harga), MAX(timestamp)
+        FROM pump_history
+        WHERE {where}
+        GROUP BY ticker
+        ORDER BY COUNT(*) DESC, ticker
+        """,
+        params,
+        fetch=True
+    ) or []
+    per_hour = execute_query(
+        f"""
+        SELECT EXTRACT(HOUR FROM timestamp AT TIME ZONE %s)::int AS jam, COUNT(*)
+        FROM pump_history
+        WHERE {where}
+        GROUP BY jam
+        ORDER BY jam
+        """,
+        (tz, *params),
+        fetch=True
+    ) or []
+    outcomes = execute_query(
+        f"""
+        SELECT COUNT(l.pump_id),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY l.ret_5m),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY l.ret_1h),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY l.ret_24h),
+               AVG((l.ret_1h > 0)::int),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY l.max_return)
+        FROM pump_history
+        JOIN pump_labels l ON l.pump_id = pump_history.id AND l.entry_price IS NOT NULL
+        WHERE {where}
+        """,
+        params,
+        fetchone=True
+    )
+    # Hasil per bucket kenaikan harga saat deteksi, untuk tuning threshold
+    by_rise = execute_query(
+        f"""
+        SELECT floor(kenaikan_harga)::int AS bucket, COUNT(*),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY l.ret_1h),
+               AVG((l.ret_1h > 0)::int),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY l.max_return)
+        FROM pump_history
+        JOIN pump_labels l ON l.pump_id = pump_history.id AND l.entry_price IS NOT NULL
+        WHERE {where}
+        GROUP BY bucket
+        ORDER BY bucket
+        """,
+        params,
+        fetch=True
+    ) or []
+    return {
+        "count": summary[0] if summary else 0,
+        "median_rise": summary[1] if summary else None,
+        "median_volume_rise": summary[2] if summary else None,
+        "first": summary[3] if summary else None,
+        "last": summary[4] if summary else None,
+        "per_ticker": per_ticker,
+        "per_hour": per_hour,
+        "labeled": outcomes[0] if outcomes else 0,
+        "median_ret_5m": outcomes[1] if outcomes else None,
+        "median_ret_1h": outcomes[2] if outcomes else None,
+        "median_ret_24h": outcomes[3] if outcomes else None,
+        "win_rate_1h": outcomes[4] if outcomes else None,
+        "median_max_return": outcomes[5] if outcomes else None,
+        "by_rise": by_rise,
+    }
+
+def get_latest_snapshot(source=PRIMARY_SOURCE):
+    """Semua ticker dari snapshot terakhir: list (ticker, last, vol_idr, timestamp)."""
+    if "snapshots" in SNAPSHOT_STORAGE:
+        row = execute_query(
+            """
+            SELECT timestamp, ticker_ids, last, vol_idr FROM market_snapshots
+            WHERE source = %s
+            ORDER BY timestamp DESC
+            LIMIT 1
+            """,
+            (source,),
+            fetchone=True
+        )
+        if not row:
+            return []
+        ts, ids, last, vol_idr = row
+        symbols = ticker_symbols(ids)
+        return [(symbols[i], p, v, ts) for i, p, v in zip(ids, last, vol_idr)]
+    results = execute_query(
+        """
+        SELECT ticker, last, vol_idr, timestamp FROM ticker_history
+        WHERE source = %s AND timestamp = (
+            SELECT MAX(timestamp) FROM ticker_history WHERE source = %s
+        )
+        """,
+        (source, source),
         fetch=True
     )
     return results or []
 
-def get_all_tickers():
+def get_recent_history_all(minutes, source=PRIMARY_SOURCE):
+    results = execute_query(
+        """
+        SELECT ticker, last, vol_idr, timestamp FROM ticker_history
+        WHERE source = %s AND timestamp > NOW() - make_interval(mins => %s)
+        ORDER BY timestamp ASC
+        """,
+        (source, minutes),
+        fetch=True
+    )
+    return results or []
+
+def get_history_arrays(ticker, minutes=None, source=PRIMARY_SOURCE):
+    """Histori satu ticker sebagai array NumPy (lama → baru).
+
+    Return dict ``ts`` (float64 epoch detik), ``last`` dan ``vol_idr`` (float64).
+    ``minutes=None`` = seluruh histori.
+    """
+    import numpy as np
+
+    results = execute_query(
+        """
+        SELECT EXTRACT(EPOCH FROM k.timestamp)::float8, k.last, k.vol_idr
+        FROM ticker_ticks k
+        WHERE k.ticker_id = (SELECT id FROM tickers WHERE source = %s AND symbol = %s)
+          AND (%s::int IS NULL OR k.timestamp > NOW() - make_interval(mins => %s::int))
+        ORDER BY k.timestamp ASC
+        """,
+        (source, ticker, minutes, minutes),
+        fetch=True
+    ) or []
+    data = np.array(results, dtype=np.float64).reshape(-1, 3)
+    return {"ts": data[:, 0], "last": data[:, 1], "vol_idr": data[:, 2]}
+
+# Relasi satu baris per poll dari ticker_ticks, kolom sama dengan market_snapshots.
+# Filter source/timestamp di query luar didorong Postgres ke dalam subquery
+# (kolom GROUP BY), jadi tetap memakai index timestamp.
+_TICK_POLLS = """(
+    SELECT t.source, k.timestamp,
+           array_agg(k.ticker_id ORDER BY k.ticker_id) AS ticker_ids,
+           array_agg(k.last ORDER BY k.ticker_id) AS last,
+           array_agg(k.vol_idr ORDER BY k.ticker_id) AS vol_idr
+    FROM ticker_ticks k
+    JOIN tickers t ON t.id = k.ticker_id
+    GROUP BY t.source, k.timestamp
+)"""
+
+def _polls():
+    """Sumber baris per poll untuk reader matriks: market_snapshots bila ditulis, selain itu ticker_ticks."""
+    return "market_snapshots" if "snapshots" in SNAPSHOT_STORAGE else _TICK_POLLS
+
+def get_snapshot_matrix(since, until=None, source=PRIMARY_SOURCE, daily=False):
+    """Matriks (waktu × ticker) dari poll tersimpan (lihat :func:`_polls`).
+
+    Return dict ``ts`` (float64 epoch, lama → baru), ``tickers`` (list symbol),
+    ``last`` dan ``vol_idr`` (float64, NaN bila ticker tidak ada di poll itu).
+    ``daily=True`` hanya mengambil poll terakhir tiap hari (close harian).
+    """
+    if daily:
+        query = """
+            SELECT ts, ticker_ids, last, vol_idr FROM (
+                SELECT DISTINCT ON (DATE(timestamp))
+                       EXTRACT(EPOCH FROM timestamp)::float8 AS ts, ticker_ids, last, vol_idr
+                FROM {polls} AS s
+                WHERE source = %s AND timestamp >= %s AND (%s::timestamptz IS NULL OR timestamp < %s)
+                ORDER BY DATE(timestamp), timestamp DESC
+            ) AS daily
+            ORDER BY ts ASC
+        """
+    else:
+        query = """
+            SELECT EXTRACT(EPOCH FROM timestamp)::float8, ticker_ids, last, vol_idr
+            FROM {polls} AS s
+            WHERE source = %s AND timestamp >= %s AND (%s::timestamptz IS NULL OR timestamp < %s)
+            ORDER BY timestamp ASC
+        """
+    results = execute_query(query.format(polls=_polls()), (source, since, until, until), fetch=True) or []
+    return _snapshot_rows_to_matrix(results)
+
+def rollup_ticker_daily():
+    """Isi ticker_daily untuk hari yang sudah lewat; hari terakhir yang sudah di-rollup dihitung ulang.
+
+    Run pertama mem-backfill seluruh ticker_ticks. Return jumlah baris yang ditulis.
+    """
+    return execute_query(
+        """
+        INSERT INTO ticker_daily (ticker_id, day, high, low, close, close_at, polls)
+        SELECT ticker_id, timestamp::date, MAX(last), MIN(last),
+               (MAX(ARRAY[EXTRACT(EPOCH FROM timestamp)::float8, last]))[2],
+               MAX(timestamp), COUNT(*)
+        FROM ticker_ticks
+        WHERE timestamp >= COALESCE((SELECT MAX(day) FROM ticker_daily), '-infinity'::date)
+          AND timestamp < CURRENT_DATE
+        GROUP BY ticker_id, timestamp::date
+        ON CONFLICT (ticker_id, day) DO UPDATE
+        SET high = EXCLUDED.high, low = EXCLUDED.low, close = EXCLUDED.close,
+            close_at = EXCLUDED.close_at, polls = EXCLUDED.polls
+        """,
+        return_affected_rows=True
+    ) or 0
+
+def get_price_range_summary(since, source=PRIMARY_SOURCE):
+    """Max/min/harga terakhir/jumlah poll per ticker sejak ``since``, diagregasi di Postgres.
+
+    Hari penuh dibaca dari rollup ticker_daily; tick mentah hanya untuk sisa
+    hari pertama dan hari yang belum di-rollup (biasanya hari ini), jadi
+    biaya query tidak tumbuh dengan panjang periode.
+    Return list ``(ticker, harga_max, harga_min, harga_terakhir, data_point)``.
+    """
+    return execute_query(
+        """
+        WITH bounds AS (
+            SELECT %(since)s::timestamptz AS since,
+                   %(since)s::timestamptz::date + 1 AS first_full,
+                   -- hari pertama yang belum ada di rollup
+                   LEAST(COALESCE((SELECT MAX(day) + 1 FROM ticker_daily), '-infinity'::date), CURRENT_DATE) AS rolled_until
+        ), ids AS (
+            SELECT id FROM tickers WHERE source = %(source)s
+        ), parts AS (
+            SELECT d.ticker_id, d.high, d.low, d.close, d.close_at, d.polls
+            FROM ticker_daily d, bounds b
+            WHERE d.ticker_id IN (SELECT id FROM ids)
+              AND d.day >= b.first_full AND d.day < b.rolled_until
+            UNION ALL
+            SELECT k.ticker_id, MAX(k.last), MIN(k.last),
+                   -- array [epoch, harga] dibandingkan elemen per elemen → harga di tick terbaru
+                   (MAX(ARRAY[EXTRACT(EPOCH FROM k.timestamp)::float8, k.last]))[2],
+                   MAX(k.timestamp), COUNT(*)
+            FROM ticker_ticks k, bounds b
+            WHERE k.ticker_id IN (SELECT id FROM ids)
+              AND k.timestamp >= b.since
+              AND (k.timestamp < b.first_full OR k.timestamp >= GREATEST(b.rolled_until, b.first_full))
+            GROUP BY k.ticker_id
+        )
+        SELECT t.symbol, MAX(p.high), MIN(p.low),
+               (MAX(ARRAY[EXTRACT(EPOCH FROM p.close_at)::float8, p.close]))[2],
+               SUM(p.polls)::int
+        FROM parts p
+        JOIN tickers t ON t.id = p.ticker_id
+        GROUP BY t.symbol
+        """,
+        {"since": since, "source": source},
+        fetch=True
+    ) or []
+
+def get_close_matrix(n, bucket_seconds, source=PRIMARY_SOURCE):
+    """Close ``n`` candle terakhir (poll terakhir tiap bucket ``bucket_seconds``) sebagai matriks (lihat :func:`_polls`).
+
+    Format return sama dengan :func:`get_snapshot_matrix`; ``ts`` = waktu poll close.
+    """
+    results = execute_query(
+        """
+        SELECT ts, ticker_ids, last, vol_idr FROM (
+            SELECT DISTINCT ON (bucket) bucket, ts, ticker_ids, last, vol_idr FROM (
+                SELECT floor(EXTRACT(EPOCH FROM timestamp) / %s) AS bucket,
+                       EXTRACT(EPOCH FROM timestamp)::float8 AS ts, ticker_ids, last, vol_idr
+                FROM {polls} AS s
+                WHERE source = %s AND timestamp >= NOW() - make_interval(secs => %s)
+            ) AS polls
+            ORDER BY bucket DESC, ts DESC
+            LIMIT %s
+        ) AS closes
+        ORDER BY ts ASC
+        """.format(polls=_polls()),
+        (bucket_seconds, source, float(bucket_seconds * (n + 1)), n),
+        fetch=True
+    ) or []
+    return _snapshot_rows_to_matrix(results)
+
+def _snapshot_rows_to_matrix(results):
+    """Baris (ts, ticker_ids, last, vol_idr) → dict matriks (waktu × ticker)."""
+    import numpy as np
+
+    all_ids = np.unique(np.concatenate([np.asarray(r[1], dtype=np.int64) for r in results])) \
+        if results else np.empty(0, dtype=np.int64)
+    last = np.full((len(results), len(all_ids)), np.nan)
+    vol_idr = np.full((len(results), len(all_ids)), np.nan)
+    for i, (_, ids, prices, volumes) in enumerate(results):
+        cols = np.searchsorted(all_ids, ids)
+        last[i, cols] = prices
+        vol_idr[i, cols] = volumes
+    symbols = ticker_symbols(all_ids.tolist())
+    return {
+        "ts": np.array([r[0] for r in results], dtype=np.float64),
+        "tickers": [symbols[i] for i in all_ids.tolist()],
+        "last": last,
+        "vol_idr": vol_idr,
+    }
+
+_PUMP_EVENT_COLUMNS = """
+    id, ticker, harga_sebelum, harga_sekarang, kenaikan_harga, kenaikan_volume, timestamp, status,
+    peak_price, duration_sec, updated_at
+"""
+
+def get_pump_events_changed(since, limit=500):
+    """Baris pump_history yang dibuat atau diubah (episode update/close) sejak ``since``, urut updated_at."""
+    results = execute_query(
+        f"""
+        SELECT {_PUMP_EVENT_COLUMNS} FROM pump_history
+        WHERE updated_at > %s
+        ORDER BY updated_at ASC, id ASC
+        LIMIT %s
+        """,
+        (since, limit),
+        fetch=True
+    )
+    return results or []
+
+def get_recent_pump_events(limit=500):
+    results = execute_query(
+        f"""
+        SELECT {_PUMP_EVENT_COLUMNS} FROM pump_history
+        ORDER BY id DESC
+        LIMIT %s
+        """,
+        (limit,),
+        fetch=True
+    )
+    return list(reversed(results)) if results else []
+
+def get_all_tickers(source=PRIMARY_SOURCE):
     results = execute_query(
         """
         SELECT DISTINCT ticker FROM ticker_history
-        WHERE timestamp > NOW() - INTERVAL '7 days'
+        WHERE timestamp > NOW() - INTERVAL '7 days' AND source = %s
         ORDER BY ticker
         """,
+        (source,),
         fetch=True
     )
     return [r[0] for r in results] if results else []
 
+# --- Alert subscriptions ---
+_SUBSCRIPTION_COLUMNS = """
+    id, name, chat_id, preset, tickers, min_price_rise, min_volume_rise, min_confidence, enabled
+"""
+
+def get_alert_subscriptions(enabled_only=False):
+    results = execute_query(
+        f"""
+        SELECT {_SUBSCRIPTION_COLUMNS} FROM alert_subscriptions
+        {"WHERE enabled" if enabled_only else ""}
+        ORDER BY id
+        """,
+        fetch=True
+    )
+    return results or []
+
+def add_alert_subscription(name, chat_id, preset=None, tickers=None, min_price_rise=0.0,
+                           min_volume_rise=0.0, min_confidence=0.0):
+    row = execute_query(
+        """
+        INSERT INTO alert_subscriptions
+        (name, chat_id, preset, tickers, min_price_rise, min_volume_rise, min_confidence)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
+        """,
+        (name, chat_id, preset, tickers or None, min_price_rise, min_volume_rise, min_confidence),
+        fetchone=True
+    )
+    return row[0] if row else None
+
+def set_alert_subscription_enabled(subscription_id, enabled):
+    execute_query(
+        "UPDATE alert_subscriptions SET enabled = %s WHERE id = %s",
+        (enabled, subscription_id)
+    )
+
+def delete_alert_subscription(subscription_id):
+    execute_query("DELETE FROM alert_subscriptions WHERE id = %s", (subscription_id,))
+
 # --- DB Health Check ---
 def check_db_health():
     try:
@@ -242,28 +964,17 @@ def check_db_health():
     except:
         return False
 
-# --- Auto Init at Import ---
-if 'DB_INITIALIZED' not in st.session_state:
-    try:
-        init_connection_pool()
-        init_db_schema()
-        st.session_state.DB_INITIALIZED = True
-    except Exception as e:
-        st.error(f"❌ DB init error: {e}")
-        close_all_connections()
-
-
-@st.cache_data(ttl=60, show_spinner=False)
+@cache_policy.cached(ttl=60, time_args=("since_date",))
 def get_price_history_since(ticker, since_date):
     """Ambil histori harga sejak tanggal tertentu"""
     try:
         results = execute_query(
             """
             SELECT last FROM ticker_history
-            WHERE ticker = %s AND timestamp >= %s
+            WHERE ticker = %s AND timestamp >= %s AND source = %s
             ORDER BY timestamp DESC
             """,
-            (ticker, since_date),
+            (ticker, since_date, PRIMARY_SOURCE),
             fetch=True
         )
         return results or []
@@ -271,7 +982,7 @@ def get_price_history_since(ticker, since_date):
         st.error(f"❌ Error get_price_history_since: {e}")
         return []
     
-@st.cache_data(ttl=300, show_spinner=False)
+@cache_policy.cached(ttl=300)
 def get_last_30_daily_closes(ticker):
     """Ambil 30 harga penutupan harian terakhir"""
     try:
@@ -282,13 +993,13 @@ def get_last_30_daily_closes(ticker):
                     DATE(timestamp) as tgl, 
                     last
                 FROM ticker_history
-                WHERE ticker = %s
+                WHERE ticker = %s AND source = %s
                 ORDER BY DATE(timestamp) DESC, timestamp DESC
             ) AS daily_prices
             ORDER BY tgl DESC
             LIMIT 30
             """,
-            (ticker,),
+            (ticker, PRIMARY_SOURCE),
             fetch=True
         )
         return [r[0] for r in results] if results else []
@@ -296,18 +1007,18 @@ def get_last_30_daily_closes(ticker):
         st.error(f"❌ Error get_last_30_daily_closes: {e}")
         return []
 
-@st.cache_data(ttl=60, show_spinner=False)
+@cache_policy.cached(ttl=60)
 def get_last_n_closes(ticker, limit=30):
     """Ambil n harga close terakhir berdasarkan timestamp DESC"""
     try:
         results = execute_query(
             """
             SELECT last FROM ticker_history
-            WHERE ticker = %s
+            WHERE ticker = %s AND source = %s
             ORDER BY timestamp DESC
             LIMIT %s
             """,
-            (ticker, limit),
+            (ticker, PRIMARY_SOURCE, limit),
             fetch=True
         )
         return [r[0] for r in results] if results else []
@@ -1,47 +1,72 @@
+import os
+import threading
+import time
+from collections import deque
 import requests
 from datetime import datetime
 import pytz
-from services import database_pg
+from services import database_pg, metrics, orderbook, episodes, levels, scheduler, write_behind
 import streamlit as st
 
 # Set timezone WIB
 wib = pytz.timezone('Asia/Jakarta')
 
-@st.cache_data(ttl=5)
-def fetch_indodax_data():
-    """Ambil data ticker Indodax, di-cache 5 detik."""
-    url = "https://indodax.com/api/tickers"
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'tickers' not in data:
-            st.error("❌ Response API Indodax tidak berisi 'tickers'.")
-            return []
-
-        result = []
-        for ticker, info in data['tickers'].items():
-            try:
-                result.append({
-                    "ticker": ticker,
-                    "last": float(info["last"]),
-                    "vol_idr": float(info["vol_idr"])
-                })
-            except (KeyError, ValueError):
-                continue
-
-        return result
-
-    except requests.RequestException as e:
-        st.error(f"❌ Gagal fetch data Indodax API: {e}")
-        return []
-    except ValueError:
-        st.error("❌ Error parsing JSON.")
-        return []
-
-def is_valid_pump(ticker, price_threshold, volume_threshold, window=5, min_consecutive_up=3, price_delta=1.0, spike_factor=1.5):
+# --- Preset parameter deteksi (sidebar & langganan alert) ---
+PRESETS = {
+    "Aggressive":  {"interval": 3, "price_threshold": 1.0, "volume_threshold": 30.0, "price_delta": 1.0, "spike_factor": 1.5},
+    "Moderate":    {"interval": 3, "price_threshold": 1.5, "volume_threshold": 50.0, "price_delta": 1.0, "spike_factor": 1.7},
+    "Safe":        {"interval": 5, "price_threshold": 2.0, "volume_threshold": 80.0, "price_delta": 1.0, "spike_factor": 2.0},
+}
+
+# --- Window harga/volume di memori ---
+# Deteksi tidak menunggu ticker_history ditulis (write-behind bisa tertinggal)
+RECENT_POINTS = 32
+_recent_lock = threading.Lock()
+_recent = {}              # ticker -> deque[(last, vol_idr)] lama → baru
+
+def observe_snapshot(rows):
+    """Catat satu snapshot ticker (list dict ticker/last/vol_idr) ke window memori."""
+    with _recent_lock:
+        for r in rows:
+            window = _recent.get(r['ticker'])
+            if window is None:
+                window = _recent[r['ticker']] = deque(maxlen=RECENT_POINTS)
+            window.append((float(r['last']), float(r['vol_idr'])))
+
+def _recent_price_volume(ticker, window):
+    """``window`` titik terakhir (lama → baru); fallback ke DB saat window memori belum penuh."""
+    with _recent_lock:
+        points = _recent.get(ticker)
+        if points is not None and len(points) >= window:
+            return list(points)[-window:]
     rows = database_pg.get_recent_price_volume(ticker, limit=window)
+    return [(float(p), float(v)) for p, v in rows[::-1]]  # DB mengembalikan DESC
+
+def _orderbook_ok(book, min_imbalance, max_ask_thinning, max_spread_bps):
+    """Aturan opsional order book; dilewati bila fitur depth belum tersedia."""
+    if book is None:
+        return True
+    if min_imbalance is not None and book["imbalance"] < min_imbalance:
+        return False
+    if max_ask_thinning is not None and book["ask_thinning"] > max_ask_thinning:
+        return False
+    if max_spread_bps is not None and book["spread_bps"] > max_spread_bps:
+        return False
+    return True
+
+@metrics.timed("is_valid_pump")
+def is_valid_pump(ticker, price_threshold, volume_threshold, window=5, min_consecutive_up=3, price_delta=1.0, spike_factor=1.5,
+                  min_imbalance=None, max_ask_thinning=None, max_spread_bps=None, market=None,
+                  require_breakout=False, timeframe_signal=None):
+    """Cek aturan pump satu ticker.
+
+    ``timeframe_signal`` = None → aturan dievaluasi di ``window`` sampel
+    terakhir. Bila mode multi-timeframe aktif, pipeline mengirim hasil
+    :func:`services.timeframes.evaluate` untuk ticker ini (``timeframes``
+    kosong bila tidak ada jendela yang lolos) dan aturan per jendela diganti
+    sinyal tersebut.
+    """
+    rows = _recent_price_volume(ticker, window)
     if len(rows) < window:
         return False, None
 
@@ -66,33 +91,75 @@ def is_valid_pump(ticker, price_threshold, volume_threshold, window=5, min_conse
         "ma_harga": round(price_ma, 2),
         "ma_volume": round(volume_ma, 2),
         "consecutive_up": consecutive_up,
+        # Harga terakhir tanpa pembulatan: peak/reversal episode tidak boleh
+        # melompat per 0.01 pada coin berharga kecil
+        "harga_raw": float(prices[-1]),
+        "volume_sekarang": volumes[-1],
         "timestamp": timestamp
     }
 
-    # Log event harga/volume
-    if consecutive_up >= 2 and (price_change >= 1.0 or volume_change >= 5.0):
-        database_pg.save_price_event_log(data)
-
-    if (
-        consecutive_up >= min_consecutive_up and
-        price_change >= price_threshold and
-        volume_change >= volume_threshold and
-        prices[-1] > price_ma * (1 + price_delta / 100) and
-        volumes[-1] > volume_ma * spike_factor
-    ):
-        database_pg.save_pump_log(data)
+    # Skor cross-sectional (opsional) dari cross_section.score_snapshot
+    if market is not None:
+        data["z_return"] = round(market["z_return"], 2)
+        data["market_rank"] = market["rank"]
+
+    book = orderbook.get_features(ticker)
+    if book is not None:
+        data["spread_bps"] = round(book["spread_bps"], 1)
+        data["imbalance"] = round(book["imbalance"], 3)
+        data["ask_thinning"] = round(book["ask_thinning"], 3)
+
+    # Log event harga/volume (prioritas rendah, dilewati saat tick mepet deadline)
+    if consecutive_up >= 2 and (price_change >= 1.0 or volume_change >= 5.0) and scheduler.allow("event_log"):
+        write_behind.submit("price_event", {"data": dict(data), "ts": time.time()})
+
+    start_price, end_price = prices[0], prices[-1]
+    if timeframe_signal is None:
+        rules_ok = (
+            consecutive_up >= min_consecutive_up and
+            price_change >= price_threshold and
+            volume_change >= volume_threshold and
+            prices[-1] > price_ma * (1 + price_delta / 100) and
+            volumes[-1] > volume_ma * spike_factor
+        )
+    else:
+        rules_ok = bool(timeframe_signal["timeframes"])
+        if rules_ok:
+            # Angka pump dari timeframe terpanjang yang lolos
+            start_price, end_price = timeframe_signal["harga_sebelum"], timeframe_signal["harga_sekarang"]
+            for key in ("harga_sebelum", "harga_sekarang", "kenaikan_harga", "kenaikan_volume", "ma_harga", "ma_volume"):
+                data[key] = round(timeframe_signal[key], 2)
+            data["consecutive_up"] = timeframe_signal["consecutive_up"]
+            data["timeframes"] = ",".join(timeframe_signal["timeframes"])
+            data["confidence"] = round(timeframe_signal["confidence"], 2)
+
+    # Konteks support/resistance dari volume profile (services/levels)
+    sr = levels.context(ticker, start_price, end_price)
+    if sr is not None:
+        data["support"] = sr["support"]
+        data["resistance"] = sr["resistance"]
+        data["breaking_resistance"] = sr["breaking_resistance"]
+
+    is_pump = (
+        rules_ok and
+        _orderbook_ok(book, min_imbalance, max_ask_thinning, max_spread_bps) and
+        (not require_breakout or sr is None or sr["breaking_resistance"])
+    )
+
+    # Satu episode per pump berkelanjutan: baris pump_history dibuka sekali lalu di-update
+    data["episode"] = episodes.update(ticker, is_pump, data)
+    if is_pump:
         return True, data
 
     return False, None
 
-def send_telegram_message(message):
-    try:
-        url = f"https://api.telegram.org/bot{st.secrets['TELEGRAM_TOKEN']}/sendMessage"
-        payload = {
-            "chat_id": st.secrets["TELEGRAM_CHAT_ID"],
-            "text": message
-        }
-        response = requests.post(url, data=payload, timeout=10)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        st.error(f"❌ Gagal kirim pesan Telegram: {e}")
+# Bisa diarahkan ke Telegram palsu (benchmarks/replay.py)
+TELEGRAM_API_URL = os.environ.get("PUMP_TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
+@metrics.timed("send_telegram_message")
+def post_telegram(message, chat_id, timeout=10):
+    """POST sendMessage ke satu chat; exception requests diteruskan ke pemanggil."""
+    url = f"{TELEGRAM_API_URL}/bot{st.secrets['TELEGRAM_TOKEN']}/sendMessage"
+    response = requests.post(url, data={"chat_id": chat_id, "text": message}, timeout=timeout)
+    response.raise_for_status()
+    return response
@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+
+from services import write_behind
+
+# --- Konfigurasi Episode ---
+IDLE = "idle"
+PUMPING = "pumping"
+COOLING = "cooling"
+
+REVERSAL_PCT = 3.0        # tutup episode bila harga turun ≥3% dari puncak
+COOL_TIMEOUT = 120        # detik tanpa sinyal pump sebelum episode ditutup
+UPDATE_EVERY = 15         # detik; batas frekuensi UPDATE baris episode
+
+_lock = threading.Lock()
+_episodes = {}            # ticker -> state episode aktif
+
+
+def _price(data):
+    # Payload lama (spill sebelum harga_raw ada) hanya punya harga_sekarang
+    return data.get("harga_raw", data["harga_sekarang"])
+
+
+def _new_episode(data, now):
+    return {
+        "state": PUMPING,
+        "episode_id": uuid.uuid4().hex,
+        "started": now,
+        "peak_price": _price(data),
+        "peak_volume": data.get("volume_sekarang", 0.0),
+        "last_write": now,
+        "last_seen": now,
+        "cool_since": None,
+        "dirty": False,
+    }
+
+
+def _duration(ep, now):
+    return int(now - ep["started"])
+
+
+def _close(ticker, ep, now):
+    write_behind.submit("pump_close", {
+        "episode_id": ep["episode_id"],
+        "peak_price": ep["peak_price"],
+        "peak_volume": ep["peak_volume"],
+        "duration_sec": _duration(ep, now),
+        "ts": now,
+    })
+    _episodes.pop(ticker, None)
+
+
+def update(ticker, is_pump, data, now=None):
+    """Majukan state machine idle → pumping → cooling untuk satu ticker.
+
+    Return event: ``"open"`` (episode baru, kirim alert), ``"update"``
+    (episode berlanjut), ``"close"`` (reversal/timeout) atau ``None``.
+    """
+    now = time.time() if now is None else now
+    with _lock:
+        ep = _episodes.get(ticker)
+
+        if ep is None:
+            if not is_pump:
+                return None
+            ep = _episodes[ticker] = _new_episode(data, now)
+            data["episode_id"] = ep["episode_id"]
+            write_behind.submit("pump_open", {"data": dict(data), "episode_id": ep["episode_id"], "ts": now})
+            return "open"
+
+        ep["last_seen"] = now
+        price = _price(data)
+        if price > ep["peak_price"]:
+            ep["peak_price"] = price
+            ep["dirty"] = True
+        volume = data.get("volume_sekarang", 0.0)
+        if volume > ep["peak_volume"]:
+            ep["peak_volume"] = volume
+            ep["dirty"] = True
+
+        if price <= ep["peak_price"] * (1 - REVERSAL_PCT / 100):
+            _close(ticker, ep, now)
+            return "close"
+
+        if is_pump:
+            ep["state"] = PUMPING
+            ep["cool_since"] = None
+        elif ep["state"] == PUMPING:
+            ep["state"] = COOLING
+            ep["cool_since"] = now
+        elif now - ep["cool_since"] >= COOL_TIMEOUT:
+            _close(ticker, ep, now)
+            return "close"
+
+        if ep["dirty"] and now - ep["last_write"] >= UPDATE_EVERY:
+            write_behind.submit("pump_update", {
+                "episode_id": ep["episode_id"],
+                "peak_price": ep["peak_price"],
+                "peak_volume": ep["peak_volume"],
+                "duration_sec": _duration(ep, now),
+            })
+            ep["last_write"] = now
+            ep["dirty"] = False
+
+        data["episode_id"] = ep["episode_id"]
+        return "update" if is_pump else None
+
+
+def sweep(now=None):
+    """Tutup episode yang timeout walau tickernya tidak dicek siklus ini."""
+    now = time.time() if now is None else now
+    closed = []
+    with _lock:
+        for ticker, ep in list(_episodes.items()):
+            cooled = ep["state"] == COOLING and now - ep["cool_since"] >= COOL_TIMEOUT
+            if cooled or now - ep["last_seen"] >= COOL_TIMEOUT:
+                _close(ticker, ep, now)
+                closed.append(ticker)
+    return closed
+
+
+def active():
+    """Salinan episode aktif untuk ditampilkan."""
+    with _lock:
+        return {t: dict(ep) for t, ep in _episodes.items()}
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from services import database_pg, leader
+
+# --- Konfigurasi Labeling ---
+# Return ke depan (%) dari harga saat deteksi, dihitung dari ticker_ticks.
+# Harga entry = tick mentah terakhir ≤ waktu deteksi (bukan harga_sekarang
+# yang dibulatkan 2 desimal). Pump tanpa tick entry tetap dicatat dengan
+# entry_price NULL supaya high-water mark bisa melewatinya dengan jujur.
+# Nama horizon = suffix kolom ret_* di tabel pump_labels (migrations v8).
+HORIZONS = (("1m", 60), ("5m", 300), ("15m", 900), ("1h", 3600), ("24h", 86400))
+MAX_HORIZON = max(seconds for _, seconds in HORIZONS)
+GRACE = 120               # detik; tunggu write-behind selesai menulis tick horizon terakhir
+ENTRY_MAX_AGE = 300       # detik; tick entry lebih tua dari ini tidak dipakai
+BATCH = 2000              # pump per eksekusi
+RUN_EVERY = 300           # detik
+JOB_NAME = "pump_labels"
+
+_thread = None
+_thread_lock = threading.Lock()
+_state = {"last_run": None, "labeled": 0, "unlabeled": 0, "high_water": None, "last_error": None}
+
+
+def _label_query():
+    """Satu statement: pilih batch di atas high-water mark, label, lalu majukan mark.
+
+    Pump hanya dilabel setelah horizon terpanjang lewat, dan mark hanya maju
+    sampai id terakhir yang semua id di bawahnya sudah jatuh tempo (id dari
+    replay write-behind bisa datang tidak urut waktu).
+    """
+    lateral = []
+    returns = []
+    for name, seconds in HORIZONS:
+        lateral.append(f"""
+            LEFT JOIN LATERAL (
+                SELECT k.last FROM ticker_ticks k
+                WHERE k.ticker_id = b.ticker_id
+                  AND k.timestamp > b.timestamp
+                  AND k.timestamp <= b.timestamp + make_interval(secs => {seconds})
+                ORDER BY k.timestamp DESC
+                LIMIT 1
+            ) h_{name} ON TRUE""")
+        returns.append(f"(h_{name}.last / b.entry - 1) * 100")
+    columns = ", ".join(f"ret_{name}" for name, _ in HORIZONS)
+
+    return f"""
+        WITH state AS (
+            SELECT COALESCE((SELECT high_water FROM job_state WHERE name = %(job)s), 0) AS hw
+        ), bounds AS (
+            SELECT COALESCE(
+                (SELECT MIN(id) - 1 FROM pump_history
+                 WHERE id > (SELECT hw FROM state)
+                   AND timestamp >= NOW() - make_interval(secs => %(due)s)),
+                (SELECT MAX(id) FROM pump_history)
+            ) AS upto
+        ), batch AS (
+            SELECT p.id, p.timestamp, e.last AS entry, t.id AS ticker_id
+            FROM pump_history p
+            LEFT JOIN tickers t ON t.source = %(source)s AND t.symbol = p.ticker
+            LEFT JOIN LATERAL (
+                SELECT NULLIF(k.last, 0) AS last FROM ticker_ticks k
+                WHERE k.ticker_id = t.id
+                  AND k.timestamp <= p.timestamp
+                  AND k.timestamp > p.timestamp - make_interval(secs => {ENTRY_MAX_AGE})
+                ORDER BY k.timestamp DESC
+                LIMIT 1
+            ) e ON TRUE
+            WHERE p.id > (SELECT hw FROM state) AND p.id <= (SELECT upto FROM bounds)
+            ORDER BY p.id
+            LIMIT %(limit)s
+        ), labeled AS (
+            INSERT INTO pump_labels
+            (pump_id, entry_price, {columns}, max_price, min_price, max_return, min_return)
+            SELECT b.id, b.entry, {", ".join(returns)},
+                   w.max_price, w.min_price,
+                   (w.max_price / b.entry - 1) * 100,
+                   (w.min_price / b.entry - 1) * 100
+            FROM batch b{"".join(lateral)}
+            LEFT JOIN LATERAL (
+                SELECT MAX(k.last) AS max_price, MIN(k.last) AS min_price FROM ticker_ticks k
+                WHERE k.ticker_id = b.ticker_id
+                  AND k.timestamp > b.timestamp
+                  AND k.timestamp <= b.timestamp + make_interval(secs => {MAX_HORIZON})
+            ) w ON TRUE
+            ON CONFLICT (pump_id) DO NOTHING
+            RETURNING pump_id, entry_price
+        ), advance AS (
+            INSERT INTO job_state (name, high_water)
+            SELECT %(job)s, GREATEST((SELECT hw FROM state), CASE
+                WHEN (SELECT COUNT(*) FROM batch) = %(limit)s THEN (SELECT MAX(id) FROM batch)
+                ELSE COALESCE((SELECT upto FROM bounds), 0)
+            END)
+            ON CONFLICT (name) DO UPDATE
+            SET high_water = GREATEST(job_state.high_water, EXCLUDED.high_water), updated_at = NOW()
+            RETURNING high_water
+        )
+        SELECT (SELECT COUNT(entry_price) FROM labeled),
+               (SELECT COUNT(*) - COUNT(entry_price) FROM labeled),
+               (SELECT high_water FROM advance)
+    """
+
+
+_QUERY = _label_query()
+
+
+def run_once(limit=BATCH):
+    """Label satu batch pump baru; return (jumlah dilabel, high-water mark baru).
+
+    Pump tanpa tick entry dicatat tanpa return dan dihitung di ``unlabeled``.
+    """
+    row = database_pg.execute_query(
+        _QUERY,
+        {
+            "job": JOB_NAME,
+            "due": float(MAX_HORIZON + GRACE),
+            "source": database_pg.PRIMARY_SOURCE,
+            "limit": limit,
+        },
+        fetchone=True
+    )
+    labeled, unlabeled, high_water = row if row else (0, 0, None)
+    _state.update(last_run=time.time(), high_water=high_water, last_error=None)
+    _state["labeled"] += labeled
+    _state["unlabeled"] += unlabeled
+    return labeled, high_water
+
+
+def run_until_caught_up(limit=BATCH):
+    total = 0
+    previous = None
+    while True:
+        labeled, high_water = run_once(limit)
+        total += labeled
+        # Mark tidak maju lagi → tidak ada pump baru yang jatuh tempo
+        if high_water == previous:
+            return total, high_water
+        previous = high_water
+
+
+def _loop():
+    while True:
+        if leader.is_leader():
+            try:
+                total, high_water = run_until_caught_up()
+                if total:
+                    print(f"🏷️ {total} pump dilabel (high-water mark {high_water})")
+            except Exception as e:
+                _state["last_error"] = str(e)
+                print(f"❌ Labeling pump gagal: {e}")
+        time.sleep(RUN_EVERY)
+
+
+def ensure_started():
+    """Start job labeling periodik sekali per proses (hanya bekerja di leader)."""
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, name="pump-labeling", daemon=True)
+            _thread.start()
+
+
+def status():
+    return dict(_state)
@@ -0,0 +1,92 @@
+import os
+import socket
+import threading
+import time
+
+import psycopg2
+
+from services import database_pg
+
+# --- Konfigurasi Leader Election ---
+ENABLED = os.environ.get("PUMP_LEADER_ELECTION", "1") == "1"
+LOCK_KEY = 727002         # key pg_advisory_lock untuk writer tunggal
+RENEW_INTERVAL = 1.0      # detik; cek koneksi pemegang lock
+RETRY_INTERVAL = 2.0      # detik; follower mencoba ambil lock
+LEASE_TIMEOUT = 5.0       # detik; leader berhenti menulis bila renew terakhir lebih lama dari ini
+# TCP keepalive agresif supaya Postgres cepat melepas lock milik replika yang mati
+KEEPALIVE = dict(keepalives=1, keepalives_idle=5, keepalives_interval=2, keepalives_count=2)
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_lock = threading.Lock()
+_state = {"leader": False, "renewed": 0.0, "since": None, "last_error": None}
+_thread = None
+
+
+def is_leader():
+    """True bila instance ini pemegang lock dan lease-nya masih segar."""
+    if not ENABLED:
+        return True
+    with _lock:
+        return _state["leader"] and time.monotonic() - _state["renewed"] < LEASE_TIMEOUT
+
+
+def status():
+    with _lock:
+        return {"instance": INSTANCE_ID, "enabled": ENABLED, **_state}
+
+
+def _set(**kwargs):
+    with _lock:
+        _state.update(kwargs)
+
+
+def _connect():
+    conn = psycopg2.connect(
+        **database_pg.connection_params(),
+        application_name=f"pump-leader {INSTANCE_ID}",
+        **KEEPALIVE
+    )
+    conn.set_session(autocommit=True)
+    return conn
+
+
+def _election_loop():
+    conn = None
+    while True:
+        try:
+            if conn is None or conn.closed:
+                conn = _connect()
+            with conn.cursor() as cur:
+                if not _state["leader"]:
+                    cur.execute("SELECT pg_try_advisory_lock(%s)", (LOCK_KEY,))
+                    if cur.fetchone()[0]:
+                        _set(leader=True, renewed=time.monotonic(), since=time.time(), last_error=None)
+                        print(f"👑 {INSTANCE_ID} menjadi leader")
+                else:
+                    # Lock advisory bertahan selama sesi hidup; renew = buktikan sesi masih sehat
+                    cur.execute("SELECT 1")
+                    cur.fetchone()
+                    _set(renewed=time.monotonic())
+        except Exception as e:
+            if _state["leader"]:
+                print(f"⚠️ {INSTANCE_ID} kehilangan leadership: {e}")
+            _set(leader=False, since=None, last_error=str(e))
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            conn = None
+        time.sleep(RENEW_INTERVAL if _state["leader"] else RETRY_INTERVAL)
+
+
+def ensure_started():
+    """Start thread election sekali per proses (idempotent)."""
+    global _thread
+    if not ENABLED:
+        return
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_election_loop, name="leader-election", daemon=True)
+            _thread.start()
@@ -0,0 +1,157 @@
+import math
+import threading
+
+import numpy as np
+
+# --- Konfigurasi Volume Profile ---
+# Grid bin log-spaced tetap untuk semua ticker: 1e-8 s.d. 1e10 IDR,
+# 100 bin per dekade (lebar bin ±2.3%). Profil semua ticker disimpan dalam
+# satu matriks float32 [ticker × bin] (±7 KB per ticker).
+MIN_PRICE = 1e-8
+MAX_PRICE = 1e10
+BINS_PER_DECADE = 100
+N_BINS = int(round(math.log10(MAX_PRICE / MIN_PRICE) * BINS_PER_DECADE))
+BIN_EDGES = np.logspace(math.log10(MIN_PRICE), math.log10(MAX_PRICE), N_BINS + 1)
+BIN_CENTERS = np.sqrt(BIN_EDGES[:-1] * BIN_EDGES[1:])
+
+HALF_LIFE = 24 * 3600     # detik; volume lama meluruh supaya profil mengikuti pasar
+LOOKBACK = 5 * HALF_LIFE  # detik; volume lebih tua berbobot < 3%, batas baca histori profil cadangan
+TOP_K = 5                 # jumlah high-volume node per ticker
+
+_lock = threading.Lock()
+_index = {}               # ticker -> baris matriks
+_profile = np.zeros((0, N_BINS), dtype=np.float32)
+_prev_vol = np.zeros(0)   # vol_idr (24 jam) snapshot sebelumnya, NaN = belum ada
+_last_price = np.zeros(0)
+_last_ts = None
+_levels = np.zeros((0, TOP_K))  # harga level per ticker (NaN = kosong), urut naik
+
+
+def price_bins(prices):
+    """Index bin untuk array harga (harga ≤ 0 / di luar grid → -1)."""
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bins = np.floor(np.log10(prices / MIN_PRICE) * BINS_PER_DECADE)
+    valid = np.isfinite(bins) & (bins >= 0) & (bins < N_BINS)
+    return np.where(valid, bins, -1).astype(np.int64)
+
+
+def top_levels(profile, k=TOP_K):
+    """Top-k high-volume node (puncak lokal profil) per baris; return harga [n × k] urut naik.
+
+    Profil praktis sparse (volume hanya di sekitar harga yang pernah dilalui),
+    jadi puncak diambil lewat ``nonzero`` + lexsort, bukan argpartition per baris.
+    """
+    profile = np.atleast_2d(profile)
+    n = len(profile)
+    # Box smoothing 3 bin: smooth[:, j] berpusat di bin j + 1
+    smooth = profile[:, :-2] + profile[:, 1:-1] + profile[:, 2:]
+    inner = smooth[:, 1:-1]                      # berpusat di bin j + 2
+    is_peak = (inner > smooth[:, :-2]) & (inner >= smooth[:, 2:]) & (inner > 0)
+
+    rows, cols = np.nonzero(is_peak)
+    order = np.lexsort((-inner[rows, cols], rows))
+    rows, cols = rows[order], cols[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, np.arange(n))[rows]
+    keep = rank < k
+
+    levels = np.full((n, k), np.nan)
+    levels[rows[keep], rank[keep]] = BIN_CENTERS[cols[keep] + 2]
+    return np.sort(levels, axis=1)
+
+
+def build_profile(prices, vol_idr, ts=None, now=None):
+    """Profil satu ticker dari histori (harga, vol_idr 24 jam) tanpa state global.
+
+    Dengan ``ts`` (epoch detik per titik) volume diberi peluruhan HALF_LIFE
+    relatif ke ``now`` (default titik terakhir), sama dengan profil live.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    traded = np.clip(np.diff(np.asarray(vol_idr, dtype=np.float64), prepend=np.nan), 0, None)
+    if ts is not None and len(ts):
+        ts = np.asarray(ts, dtype=np.float64)
+        now = ts[-1] if now is None else now
+        traded = traded * 0.5 ** ((now - ts) / HALF_LIFE)
+    bins = price_bins(prices)
+    ok = (bins >= 0) & np.isfinite(traded)
+    profile = np.zeros(N_BINS)
+    np.add.at(profile, bins[ok], traded[ok])
+    return profile
+
+
+def _ensure_rows(tickers):
+    global _profile, _prev_vol, _last_price, _levels
+    new = [t for t in tickers if t not in _index]
+    if not new:
+        return
+    for t in new:
+        _index[t] = len(_index)
+    n = len(new)
+    _profile = np.vstack([_profile, np.zeros((n, N_BINS), dtype=np.float32)])
+    _prev_vol = np.concatenate([_prev_vol, np.full(n, np.nan)])
+    _last_price = np.concatenate([_last_price, np.full(n, np.nan)])
+    _levels = np.vstack([_levels, np.full((n, TOP_K), np.nan)])
+
+
+def ingest(rows, now):
+    """Tambah satu snapshot (list dict ticker/last/vol_idr) ke profil lalu refresh level.
+
+    Volume yang diperdagangkan = kenaikan vol_idr 24 jam sejak snapshot
+    sebelumnya (penurunan karena window 24 jam bergeser dianggap 0).
+    """
+    global _profile, _last_ts, _levels
+    if not rows:
+        return
+    with _lock:
+        _ensure_rows([r['ticker'] for r in rows])
+        idx = np.fromiter((_index[r['ticker']] for r in rows), dtype=np.int64, count=len(rows))
+        prices = np.fromiter((r['last'] for r in rows), dtype=np.float64, count=len(rows))
+        vols = np.fromiter((r['vol_idr'] for r in rows), dtype=np.float64, count=len(rows))
+
+        if _last_ts is not None and now > _last_ts:
+            _profile *= np.float32(0.5 ** ((now - _last_ts) / HALF_LIFE))
+        _last_ts = now
+
+        traded = np.clip(vols - _prev_vol[idx], 0, None)
+        bins = price_bins(prices)
+        ok = (bins >= 0) & np.isfinite(traded)
+        np.add.at(_profile, (idx[ok], bins[ok]), traded[ok].astype(np.float32))
+
+        _prev_vol[idx] = vols
+        _last_price[idx] = prices
+        _levels = top_levels(_profile)
+
+
+def get_levels(ticker):
+    """Harga high-volume node ticker (urut naik), list kosong bila belum ada profil."""
+    with _lock:
+        row = _index.get(ticker)
+        if row is None:
+            return []
+        return [float(p) for p in _levels[row] if not np.isnan(p)]
+
+
+def nearest(levels, price):
+    """(support, resistance) = level terdekat di bawah / di atas harga (None bila tidak ada)."""
+    below = [p for p in levels if p < price]
+    above = [p for p in levels if p > price]
+    return (below[-1] if below else None), (above[0] if above else None)
+
+
+def context(ticker, price_before, price_now):
+    """Konteks S/R untuk aturan pump: level terdekat dan apakah harga menembus resistance.
+
+    ``breaking_resistance`` = ada level di antara harga sebelum dan sesudah
+    (harga naik melewati high-volume node).
+    """
+    levels = get_levels(ticker)
+    if not levels:
+        return None
+    support, resistance = nearest(levels, price_now)
+    broken = [p for p in levels if price_before < p <= price_now]
+    return {
+        "support": support,
+        "resistance": resistance,
+        "breaking_resistance": bool(broken),
+        "broken_level": broken[-1] if broken else None,
+    }
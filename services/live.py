@@ -0,0 +1,117 @@
+import json
+import select
+import threading
+import time
+
+import psycopg2
+
+from services import database_pg, write_behind
+
+# --- Konfigurasi Live Update ---
+CHANNEL = "pump_indodax"
+POLL_TIMEOUT = 5          # detik; select() timeout di thread listener
+RECONNECT_DELAY = 5
+MAX_PAYLOAD_PUMPS = 100   # payload NOTIFY dibatasi 8000 byte oleh Postgres
+
+_cond = threading.Condition()
+_state = {
+    "version": 0,
+    "payload": None,      # payload NOTIFY terakhir (dari proses mana pun)
+    "result": None,       # hasil siklus lengkap bila dihasilkan di proses ini
+    "seen": set(),        # snapshot_id yang sudah dipublikasikan
+}
+_listener = None
+_listener_lock = threading.Lock()
+
+
+# --- Hub (fan-out ke sesi) ---
+def _publish(payload, result=None):
+    snapshot_id = payload.get("snapshot_id")
+    with _cond:
+        if result is not None:
+            _state["result"] = result
+        if snapshot_id in _state["seen"]:
+            return
+        if len(_state["seen"]) > 1000:
+            _state["seen"].clear()
+        _state["seen"].add(snapshot_id)
+        _state["version"] += 1
+        _state["payload"] = payload
+        # Snapshot lebih baru dari instance lain (mis. replika ini kehilangan
+        # leadership): hasil lokal sudah basi, UI kembali ke ringkasan NOTIFY
+        local = _state["result"]
+        if result is None and local is not None and payload.get("ts", 0) >= local["time"]:
+            _state["result"] = None
+        _cond.notify_all()
+
+
+def version():
+    """Nomor versi data terbaru; sesi cukup membandingkan int ini."""
+    with _cond:
+        return _state["version"]
+
+
+def latest():
+    with _cond:
+        return _state["payload"], _state["result"]
+
+
+def wait_for_change(seen_version, timeout):
+    """Blok sampai versi berubah dari ``seen_version`` atau timeout."""
+    with _cond:
+        _cond.wait_for(lambda: _state["version"] != seen_version, timeout=timeout)
+        return _state["version"]
+
+
+def announce(result):
+    """Publikasikan hasil siklus lokal dan kirim NOTIFY ke proses/replika lain."""
+    pumps = [p["ticker"] for p in result["detected_pumps"]][:MAX_PAYLOAD_PUMPS]
+    payload = {
+        "snapshot_id": result.get("snapshot_id") or int(result["time"] * 1000),
+        "ts": result["time"],
+        "pumps": pumps,
+    }
+    _publish(payload, result)
+    # NOTIFY lewat antrian write-behind: dikirim setelah snapshot siklus ini
+    # tersimpan, jadi pembaca (api_store) tidak membaca poll sebelumnya
+    write_behind.submit("notify", {"channel": CHANNEL, "payload": payload})
+
+
+# --- Listener (satu thread per proses) ---
+def _listen_loop():
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(**database_pg.connection_params())
+            conn.set_session(autocommit=True)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            print(f"✅ LISTEN {CHANNEL}")
+            while True:
+                if select.select([conn], [], [], POLL_TIMEOUT) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        _publish(json.loads(notify.payload))
+                    except (ValueError, TypeError):
+                        continue
+        except Exception as e:
+            print(f"❌ Listener {CHANNEL} terputus: {e}")
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(RECONNECT_DELAY)
+
+
+def ensure_listener():
+    """Start thread listener bersama (idempotent)."""
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen_loop, name="pg-listener", daemon=True)
+            _listener.start()
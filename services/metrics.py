@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# --- Konfigurasi Instrumentasi ---
+# Batas bucket histogram (detik), gaya Prometheus
+HIST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_CYCLES = 200
+# Path file text untuk node_exporter textfile collector (kosong = nonaktif)
+METRICS_FILE = os.environ.get("PUMP_METRICS_FILE", "")
+
+_lock = threading.Lock()
+_histograms = {}     # nama -> {"count", "sum", "buckets"}
+_counters = {}       # nama -> nilai
+_cycles = deque(maxlen=MAX_CYCLES)
+_local = threading.local()
+
+
+def _new_histogram():
+    return {"count": 0, "sum": 0.0, "buckets": [0] * len(HIST_BUCKETS)}
+
+
+def _observe(name, seconds):
+    hist = _histograms.get(name)
+    if hist is None:
+        hist = _histograms[name] = _new_histogram()
+    hist["count"] += 1
+    hist["sum"] += seconds
+    for i, bound in enumerate(HIST_BUCKETS):
+        if seconds <= bound:
+            hist["buckets"][i] += 1
+
+
+# --- Pencatatan ---
+def record(name, seconds):
+    """Catat durasi satu panggilan ke histogram global dan siklus aktif."""
+    with _lock:
+        _observe(name, seconds)
+    current = getattr(_local, "cycle", None)
+    if current is not None:
+        calls = current["calls"].setdefault(name, {"count": 0, "total": 0.0})
+        calls["count"] += 1
+        calls["total"] += seconds
+
+
+def incr(name, value=1):
+    """Tambah counter global dan counter siklus aktif."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+    current = getattr(_local, "cycle", None)
+    if current is not None:
+        current["counters"][name] = current["counters"].get(name, 0) + value
+
+
+def count_db_round_trip():
+    incr("db_round_trips")
+
+
+def timed(name):
+    """Decorator: ukur wall time dan jumlah panggilan fungsi."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# --- Siklus Refresh ---
+@contextmanager
+def cycle(interval):
+    """Bungkus satu siklus refresh; hasilnya masuk ke riwayat siklus.
+
+    Record yang di-yield diisi ``wall`` dan ``overrun`` setelah blok selesai,
+    sehingga pemanggil bisa menampilkan peringatan.
+    """
+    current = {
+        "started": time.time(),
+        "interval": interval,
+        "calls": {},
+        "counters": {},
+        "wall": 0.0,
+        "overrun": False,
+    }
+    _local.cycle = current
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        _local.cycle = None
+        current["wall"] = time.perf_counter() - start
+        current["overrun"] = current["wall"] > interval
+        with _lock:
+            _observe("cycle", current["wall"])
+            _counters["cycles_total"] = _counters.get("cycles_total", 0) + 1
+            if current["overrun"]:
+                _counters["cycle_overruns_total"] = _counters.get("cycle_overruns_total", 0) + 1
+            _cycles.append(current)
+        if current["overrun"]:
+            print(f"⚠️ Siklus {current['wall']:.2f}s melebihi interval {interval}s")
+        if METRICS_FILE:
+            write_metrics_file(METRICS_FILE)
+
+
+def recent_cycles():
+    with _lock:
+        return list(_cycles)
+
+
+def snapshot():
+    """Salinan histogram dan counter untuk halaman diagnostik."""
+    with _lock:
+        return (
+            {k: {"count": v["count"], "sum": v["sum"], "buckets": list(v["buckets"])}
+             for k, v in _histograms.items()},
+            dict(_counters),
+        )
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _cycles.clear()
+
+
+# --- Export Prometheus ---
+def render_prometheus():
+    """Render semua metrik dalam format teks eksposisi Prometheus."""
+    histograms, counters = snapshot()
+    lines = [
+        "# HELP pump_call_seconds Wall time per fungsi hot path.",
+        "# TYPE pump_call_seconds histogram",
+    ]
+    for name in sorted(histograms):
+        hist = histograms[name]
+        for bound, count in zip(HIST_BUCKETS, hist["buckets"]):
+            lines.append(f'pump_call_seconds_bucket{{fn="{name}",le="{bound}"}} {count}')
+        lines.append(f'pump_call_seconds_bucket{{fn="{name}",le="+Inf"}} {hist["count"]}')
+        lines.append(f'pump_call_seconds_sum{{fn="{name}"}} {hist["sum"]:.6f}')
+        lines.append(f'pump_call_seconds_count{{fn="{name}"}} {hist["count"]}')
+    for name in sorted(counters):
+        lines.append(f"# TYPE pump_{name} counter")
+        lines.append(f"pump_{name} {counters[name]}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path):
+    # Tulis atomik supaya collector tidak membaca file setengah jadi
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"❌ Gagal tulis file metrik: {e}")
@@ -0,0 +1,370 @@
+# --- Schema Migrations ---
+# Daftar (versi, deskripsi, [statement]) yang dijalankan berurutan oleh
+# database_pg.init_db_schema(). Versi yang sudah tercatat di tabel
+# schema_migrations tidak dijalankan lagi. Tambahkan versi baru di akhir;
+# jangan mengubah versi yang sudah dirilis.
+
+MIGRATIONS = [
+    (1, "baseline ticker_history & pump_history", [
+        """
+        CREATE TABLE IF NOT EXISTS ticker_history (
+            id SERIAL PRIMARY KEY,
+            ticker TEXT NOT NULL,
+            last NUMERIC(18,8) NOT NULL,
+            vol_idr NUMERIC(18,2) NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """,
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'unique_ticker_timestamp'
+            ) THEN
+                ALTER TABLE ticker_history
+                ADD CONSTRAINT unique_ticker_timestamp UNIQUE (ticker, timestamp);
+            END IF;
+        END$$;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_ticker_history_ticker ON ticker_history(ticker)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_ticker_history_timestamp ON ticker_history(timestamp)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pump_history (
+            id SERIAL PRIMARY KEY,
+            ticker TEXT NOT NULL,
+            harga_sebelum NUMERIC(18,8) NOT NULL,
+            harga_sekarang NUMERIC(18,8) NOT NULL,
+            kenaikan_harga NUMERIC(18,2) NOT NULL,
+            kenaikan_volume NUMERIC(18,2) NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_pump_history_ticker ON pump_history(ticker)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_pump_history_timestamp ON pump_history(timestamp)
+        """,
+    ]),
+    (2, "ticker_history.source untuk multi-source collector", [
+        """
+        ALTER TABLE ticker_history
+        ADD COLUMN IF NOT EXISTS source TEXT NOT NULL DEFAULT 'indodax'
+        """,
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'unique_ticker_timestamp'
+            ) THEN
+                ALTER TABLE ticker_history DROP CONSTRAINT unique_ticker_timestamp;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'unique_ticker_timestamp_source'
+            ) THEN
+                ALTER TABLE ticker_history
+                ADD CONSTRAINT unique_ticker_timestamp_source UNIQUE (ticker, timestamp, source);
+            END IF;
+        END$$;
+        """,
+    ]),
+    (3, "orderbook_snapshots", [
+        """
+        CREATE TABLE IF NOT EXISTS orderbook_snapshots (
+            ticker TEXT NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            levels BYTEA NOT NULL,
+            spread_bps REAL NOT NULL,
+            imbalance REAL NOT NULL,
+            depth_bid REAL NOT NULL,
+            depth_ask REAL NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_orderbook_ticker_timestamp
+        ON orderbook_snapshots(ticker, timestamp)
+        """,
+    ]),
+    (4, "episode pump & price_event_log", [
+        """
+        ALTER TABLE pump_history
+            ADD COLUMN IF NOT EXISTS episode_id TEXT UNIQUE,
+            ADD COLUMN IF NOT EXISTS peak_price NUMERIC(18,8),
+            ADD COLUMN IF NOT EXISTS peak_volume NUMERIC(24,2),
+            ADD COLUMN IF NOT EXISTS duration_sec INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS ended_at TIMESTAMPTZ,
+            ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'closed'
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS price_event_log (
+            id SERIAL PRIMARY KEY,
+            ticker TEXT NOT NULL,
+            harga_sebelum NUMERIC(18,8) NOT NULL,
+            harga_sekarang NUMERIC(18,8) NOT NULL,
+            kenaikan_harga NUMERIC(18,2) NOT NULL,
+            kenaikan_volume NUMERIC(18,2) NOT NULL,
+            consecutive_up INTEGER NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_price_event_log_timestamp ON price_event_log(timestamp)
+        """,
+    ]),
+    (5, "ticker_ticks: float8 + integer ticker id, ticker_history jadi view", [
+        # NUMERIC → float8: agregasi lebih cepat, baris lebih kecil, dan psycopg2
+        # mengembalikan float (bukan Decimal) yang langsung bisa masuk NumPy.
+        """
+        CREATE TABLE IF NOT EXISTS tickers (
+            id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            source TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            CONSTRAINT unique_tickers_source_symbol UNIQUE (source, symbol)
+        )
+        """,
+        """
+        INSERT INTO tickers (source, symbol)
+        SELECT DISTINCT source, ticker FROM ticker_history
+        ORDER BY source, ticker
+        ON CONFLICT (source, symbol) DO NOTHING
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ticker_ticks (
+            id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            ticker_id INTEGER NOT NULL REFERENCES tickers(id),
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            last DOUBLE PRECISION NOT NULL,
+            vol_idr DOUBLE PRECISION NOT NULL,
+            CONSTRAINT unique_ticker_ticks_ticker_timestamp UNIQUE (ticker_id, timestamp)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_ticker_ticks_timestamp ON ticker_ticks(timestamp)
+        """,
+        """
+        INSERT INTO ticker_ticks (ticker_id, timestamp, last, vol_idr)
+        SELECT t.id, h.timestamp, h.last::float8, h.vol_idr::float8
+        FROM ticker_history h
+        JOIN tickers t ON t.source = h.source AND t.symbol = h.ticker
+        ORDER BY h.timestamp
+        ON CONFLICT (ticker_id, timestamp) DO NOTHING
+        """,
+        # Tabel lama disimpan dulu; DROP manual setelah data baru diverifikasi
+        """
+        ALTER TABLE ticker_history RENAME TO ticker_history_numeric
+        """,
+        # View kompatibel untuk query lama (kolom & urutan sama dengan tabel lama)
+        """
+        CREATE VIEW ticker_history AS
+        SELECT k.id, t.symbol AS ticker, k.last, k.vol_idr, k.timestamp, t.source
+        FROM ticker_ticks k
+        JOIN tickers t ON t.id = k.ticker_id
+        """,
+    ]),
+    (6, "market_snapshots: satu baris per poll dengan kolom array", [
+        # Array float8 otomatis di-TOAST & dikompres Postgres bila besar
+        """
+        CREATE TABLE IF NOT EXISTS market_snapshots (
+            id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            source TEXT NOT NULL,
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            ticker_ids INTEGER[] NOT NULL,
+            last DOUBLE PRECISION[] NOT NULL,
+            vol_idr DOUBLE PRECISION[] NOT NULL,
+            CONSTRAINT unique_market_snapshots_source_timestamp UNIQUE (source, timestamp)
+        )
+        """,
+        # Backfill dari ticker_ticks; data lama (insert per ticker, timestamp
+        # berbeda-beda dalam satu poll) dikelompokkan per detik
+        """
+        INSERT INTO market_snapshots (source, timestamp, ticker_ids, last, vol_idr)
+        SELECT source, bucket,
+               array_agg(ticker_id ORDER BY ticker_id),
+               array_agg(last ORDER BY ticker_id),
+               array_agg(vol_idr ORDER BY ticker_id)
+        FROM (
+            SELECT DISTINCT ON (t.source, date_trunc('second', k.timestamp), k.ticker_id)
+                   t.source, date_trunc('second', k.timestamp) AS bucket, k.ticker_id, k.last, k.vol_idr
+            FROM ticker_ticks k
+            JOIN tickers t ON t.id = k.ticker_id
+            ORDER BY t.source, date_trunc('second', k.timestamp), k.ticker_id, k.timestamp DESC
+        ) AS latest
+        GROUP BY source, bucket
+        ON CONFLICT (source, timestamp) DO NOTHING
+        """,
+    ]),
+    (7, "index keyset pagination pump_history", [
+        """
+        CREATE INDEX IF NOT EXISTS idx_pump_history_timestamp_id
+        ON pump_history(timestamp DESC, id DESC)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_pump_history_ticker_timestamp_id
+        ON pump_history(ticker, timestamp DESC, id DESC)
+        """,
+    ]),
+    (8, "pump_labels (forward return) & job_state high-water mark", [
+        """
+        CREATE TABLE IF NOT EXISTS pump_labels (
+            pump_id INTEGER PRIMARY KEY REFERENCES pump_history(id) ON DELETE CASCADE,
+            entry_price DOUBLE PRECISION NOT NULL,
+            ret_1m DOUBLE PRECISION,
+            ret_5m DOUBLE PRECISION,
+            ret_15m DOUBLE PRECISION,
+            ret_1h DOUBLE PRECISION,
+            ret_24h DOUBLE PRECISION,
+            max_price DOUBLE PRECISION,
+            min_price DOUBLE PRECISION,
+            max_return DOUBLE PRECISION,
+            min_return DOUBLE PRECISION,
+            labeled_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS job_state (
+            name TEXT PRIMARY KEY,
+            high_water BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """,
+    ]),
+    (9, "alert_subscriptions (routing alert per chat)", [
+        """
+        CREATE TABLE IF NOT EXISTS alert_subscriptions (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            chat_id TEXT NOT NULL,
+            preset TEXT,
+            tickers TEXT[],
+            min_price_rise DOUBLE PRECISION NOT NULL DEFAULT 0,
+            min_volume_rise DOUBLE PRECISION NOT NULL DEFAULT 0,
+            min_confidence DOUBLE PRECISION NOT NULL DEFAULT 0,
+            enabled BOOLEAN NOT NULL DEFAULT TRUE,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """,
+    ]),
+    (10, "ticker_coverage (interval menit berisi data) & tick_outliers", [
+        """
+        CREATE TABLE IF NOT EXISTS ticker_coverage (
+            ticker_id INTEGER NOT NULL REFERENCES tickers(id),
+            start_minute INTEGER NOT NULL,      -- epoch // 60, inklusif
+            end_minute INTEGER NOT NULL,        -- eksklusif
+            PRIMARY KEY (ticker_id, start_minute)
+        )
+        """,
+        # Backfill sekali dari ticker_ticks (gaps-and-islands); celah ≤ 2 menit
+        # digabung, sama dengan coverage.GAP_TOLERANCE
+        """
+        INSERT INTO ticker_coverage (ticker_id, start_minute, end_minute)
+        SELECT ticker_id, MIN(minute), MAX(minute) + 1 FROM (
+            SELECT ticker_id, minute, SUM(is_new) OVER (PARTITION BY ticker_id ORDER BY minute) AS grp
+            FROM (
+                SELECT ticker_id, minute,
+                       CASE WHEN minute - LAG(minute) OVER (PARTITION BY ticker_id ORDER BY minute) <= 3
+                            THEN 0 ELSE 1 END AS is_new
+                FROM (
+                    SELECT DISTINCT ticker_id, floor(EXTRACT(EPOCH FROM timestamp) / 60)::int AS minute
+                    FROM ticker_ticks
+                ) AS minutes
+            ) AS flagged
+        ) AS islands
+        GROUP BY ticker_id, grp
+        ON CONFLICT (ticker_id, start_minute) DO NOTHING
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tick_outliers (
+            ticker_id INTEGER NOT NULL REFERENCES tickers(id),
+            timestamp TIMESTAMPTZ NOT NULL,
+            price DOUBLE PRECISION NOT NULL,
+            prev_price DOUBLE PRECISION,
+            next_price DOUBLE PRECISION,
+            PRIMARY KEY (ticker_id, timestamp)
+        )
+        """,
+    ]),
+    (11, "pump_history.updated_at: cursor perubahan episode untuk API", [
+        # Backfill dengan waktu perubahan terakhir yang diketahui, bukan waktu migrasi,
+        # supaya cursor pertama tidak menganggap semua histori baru berubah
+        """
+        ALTER TABLE pump_history ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ
+        """,
+        """
+        UPDATE pump_history SET updated_at = COALESCE(ended_at, timestamp) WHERE updated_at IS NULL
+        """,
+        """
+        ALTER TABLE pump_history
+            ALTER COLUMN updated_at SET DEFAULT NOW(),
+            ALTER COLUMN updated_at SET NOT NULL
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_pump_history_updated_at ON pump_history(updated_at)
+        """,
+    ]),
+    (12, "ticker id SMALLINT → INTEGER", [
+        # Database yang sudah menjalankan v5/v6/v10 versi lama masih SMALLINT:
+        # sequence 32767 bisa habis, lalu semua insert ticker baru gagal.
+        # View ticker_history menahan ALTER TYPE, jadi dibuat ulang.
+        """
+        DROP VIEW IF EXISTS ticker_history
+        """,
+        """
+        ALTER TABLE tickers ALTER COLUMN id TYPE INTEGER
+        """,
+        """
+        DO $$
+        BEGIN
+            EXECUTE format('ALTER SEQUENCE %s AS INTEGER', pg_get_serial_sequence('tickers', 'id'));
+        END$$;
+        """,
+        """
+        ALTER TABLE ticker_ticks ALTER COLUMN ticker_id TYPE INTEGER
+        """,
+        """
+        ALTER TABLE market_snapshots ALTER COLUMN ticker_ids TYPE INTEGER[] USING ticker_ids::integer[]
+        """,
+        """
+        ALTER TABLE ticker_coverage ALTER COLUMN ticker_id TYPE INTEGER
+        """,
+        """
+        ALTER TABLE tick_outliers ALTER COLUMN ticker_id TYPE INTEGER
+        """,
+        """
+        CREATE VIEW ticker_history AS
+        SELECT k.id, t.symbol AS ticker, k.last, k.vol_idr, k.timestamp, t.source
+        FROM ticker_ticks k
+        JOIN tickers t ON t.id = k.ticker_id
+        """,
+    ]),
+    (13, "index timestamp orderbook_snapshots untuk prune retensi", [
+        """
+        CREATE INDEX IF NOT EXISTS idx_orderbook_timestamp ON orderbook_snapshots(timestamp)
+        """,
+    ]),
+    (14, "ticker_daily: rollup harian high/low/close per ticker", [
+        """
+        CREATE TABLE IF NOT EXISTS ticker_daily (
+            ticker_id INTEGER NOT NULL REFERENCES tickers(id),
+            day DATE NOT NULL,
+            high DOUBLE PRECISION NOT NULL,
+            low DOUBLE PRECISION NOT NULL,
+            close DOUBLE PRECISION NOT NULL,
+            close_at TIMESTAMPTZ NOT NULL,
+            polls INTEGER NOT NULL,
+            PRIMARY KEY (ticker_id, day)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_ticker_daily_day ON ticker_daily(day)
+        """,
+    ]),
+    (15, "pump_labels.entry_price boleh NULL (pump tanpa tick entry)", [
+        """
+        ALTER TABLE pump_labels ALTER COLUMN entry_price DROP NOT NULL
+        """,
+    ]),
+]
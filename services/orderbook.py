@@ -0,0 +1,198 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from services import collector, recorder, write_behind
+
+# --- Konfigurasi Depth ---
+DEPTH_SOURCE = "indodax_depth"
+DEPTH_INTERVAL = 5        # detik
+TOP_N = 50                # jumlah coin (volume IDR terbesar) yang dipantau
+LEVELS = 10               # level harga per sisi yang disimpan
+DEPTH_PCT = 1.0           # depth dihitung dalam ±x% dari mid
+EWMA_ALPHA = 0.1
+FETCH_WORKERS = 8
+RETENTION_DAYS = 7
+PRUNE_EVERY = 3600        # detik
+
+# Layout blob: float64[4, LEVELS] = bid_px, bid_sz, ask_px, ask_sz (320 byte).
+# float32 hanya ±7 digit signifikan: harga IDR ratusan juta (BTC) bergeser
+# puluhan rupiah dan spread antar level bisa hilang. Satu baris ≈ 390 byte
+# termasuk header & kolom fitur, sehingga 50 coin tiap 5 detik selama
+# seminggu (~6 juta baris) muat di ±2.4 GB.
+_DTYPE = np.float64
+_LEGACY_DTYPE = np.float32    # blob lama (160 byte) sebelum pindah ke float64
+
+_lock = threading.Lock()
+_universe = []            # ticker top-N terakhir
+_features = {}            # ticker -> dict fitur terbaru + EWMA
+_last_prune = 0.0
+
+
+# --- Encode / Decode ---
+def pack_book(bids, asks, levels=LEVELS):
+    """Ubah list [[price, size], ...] jadi array float64[4, levels] berukuran tetap.
+
+    Level yang kosong diisi 0 sehingga semua snapshot punya ukuran sama.
+    """
+    book = np.zeros((4, levels), dtype=_DTYPE)
+    if bids:
+        b = np.asarray(bids[:levels], dtype=np.float64)
+        book[0, :len(b)] = b[:, 0]
+        book[1, :len(b)] = b[:, 1]
+    if asks:
+        a = np.asarray(asks[:levels], dtype=np.float64)
+        book[2, :len(a)] = a[:, 0]
+        book[3, :len(a)] = a[:, 1]
+    return book
+
+
+def unpack_book(blob, levels=LEVELS):
+    data = bytes(blob)
+    dtype = _LEGACY_DTYPE if len(data) == 4 * levels * np.dtype(_LEGACY_DTYPE).itemsize else _DTYPE
+    return np.frombuffer(data, dtype=dtype).reshape(4, levels).astype(np.float64)
+
+
+# --- Fitur ---
+def compute_features(book, depth_pct=DEPTH_PCT):
+    """Spread (bps), imbalance dan depth IDR dalam ±depth_pct% dari mid."""
+    bid_px, bid_sz, ask_px, ask_sz = book.astype(np.float64)
+    best_bid = bid_px[0]
+    best_ask = ask_px[0]
+    if best_bid <= 0 or best_ask <= 0:
+        return None
+    mid = (best_bid + best_ask) / 2
+    spread_bps = (best_ask - best_bid) / mid * 10_000
+
+    bid_mask = (bid_px > 0) & (bid_px >= mid * (1 - depth_pct / 100))
+    ask_mask = (ask_px > 0) & (ask_px <= mid * (1 + depth_pct / 100))
+    depth_bid = float(np.sum(bid_px[bid_mask] * bid_sz[bid_mask]))
+    depth_ask = float(np.sum(ask_px[ask_mask] * ask_sz[ask_mask]))
+    total = depth_bid + depth_ask
+    imbalance = (depth_bid - depth_ask) / total if total else 0.0
+
+    return {
+        "mid": float(mid),
+        "spread_bps": float(spread_bps),
+        "imbalance": float(imbalance),
+        "depth_bid": depth_bid,
+        "depth_ask": depth_ask,
+    }
+
+
+def _update_features(ticker, feats, ts):
+    """Update fitur incremental (EWMA depth ask) untuk deteksi ask menipis."""
+    prev = _features.get(ticker)
+    if prev is None:
+        feats["ask_ewma"] = feats["depth_ask"]
+        feats["imbalance_ewma"] = feats["imbalance"]
+    else:
+        feats["ask_ewma"] = (1 - EWMA_ALPHA) * prev["ask_ewma"] + EWMA_ALPHA * feats["depth_ask"]
+        feats["imbalance_ewma"] = (1 - EWMA_ALPHA) * prev["imbalance_ewma"] + EWMA_ALPHA * feats["imbalance"]
+    # < 1 berarti sisi ask lebih tipis dari rata-ratanya
+    feats["ask_thinning"] = feats["depth_ask"] / feats["ask_ewma"] if feats["ask_ewma"] else 1.0
+    feats["updated"] = ts
+    _features[ticker] = feats
+
+
+def get_features(ticker, max_age=DEPTH_INTERVAL * 4):
+    """Fitur order book terbaru untuk ticker, atau None bila tidak ada/kedaluwarsa."""
+    with _lock:
+        feats = _features.get(ticker)
+    if feats is None or time.time() - feats["updated"] > max_age:
+        return None
+    return feats
+
+
+def all_features():
+    with _lock:
+        return dict(_features)
+
+
+# --- Universe & Sumber ---
+def set_universe(snapshot_rows, top_n=TOP_N):
+    """Pilih top-N ticker berdasarkan vol_idr dari snapshot ticker terbaru."""
+    global _universe
+    ranked = sorted(snapshot_rows, key=lambda r: r["vol_idr"], reverse=True)
+    with _lock:
+        _universe = [r["ticker"] for r in ranked[:top_n]]
+
+
+class DepthSource(collector.Source):
+    """Ambil depth Indodax untuk semua ticker di universe secara paralel."""
+
+    kind = "depth"
+
+    def __init__(self, interval=DEPTH_INTERVAL):
+        super().__init__(DEPTH_SOURCE, interval)
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="depth")
+
+    def _fetch_one(self, ticker):
+        path = f"/api/depth/{ticker.replace('_', '')}"
+        response = self._session.get(collector.INDODAX_BASE_URL + path, timeout=collector.HTTP_TIMEOUT)
+        response.raise_for_status()
+        if recorder.enabled():
+            recorder.record(DEPTH_SOURCE, path, response.text)
+        payload = response.json()
+        return {
+            "ticker": ticker,
+            "book": pack_book(payload.get("buy") or [], payload.get("sell") or []),
+        }
+
+    def fetch(self):
+        with _lock:
+            tickers = list(_universe)
+        if not tickers:
+            return []
+        rows = []
+        errors = 0
+        for future in [self._executor.submit(self._fetch_one, t) for t in tickers]:
+            try:
+                rows.append(future.result())
+            except (requests.RequestException, ValueError):
+                errors += 1
+        if errors == len(tickers):
+            raise RuntimeError(f"Semua fetch depth gagal ({errors} ticker)")
+        return rows
+
+
+def ensure_registered(source_collector):
+    if not source_collector.has(DEPTH_SOURCE):
+        source_collector.register(DepthSource())
+
+
+# --- Ingest ---
+def ingest(rows):
+    """Hitung fitur tiap book lalu simpan snapshot ringkas dalam satu batch."""
+    global _last_prune
+    now = time.time()
+    records = []
+    with _lock:
+        for row in rows:
+            feats = compute_features(row["book"])
+            if feats is None:
+                continue
+            _update_features(row["ticker"], feats, now)
+            records.append((
+                row["ticker"],
+                row["book"].tobytes().hex(),  # hex: payload write-behind harus JSON
+                feats["spread_bps"],
+                feats["imbalance"],
+                feats["depth_bid"],
+                feats["depth_ask"],
+            ))
+    if records:
+        write_behind.submit("orderbook", {"records": records, "ts": now})
+
+    # DELETE lewat write-behind: tidak menahan siklus dan gagalnya DB tidak
+    # menggagalkan ingest (record di-spill/diulang seperti write lain)
+    if now - _last_prune > PRUNE_EVERY:
+        _last_prune = now
+        try:
+            write_behind.submit("orderbook_prune", {"days": RETENTION_DAYS})
+        except Exception as e:
+            print(f"⚠️ Gagal menjadwalkan prune orderbook: {e}")
@@ -0,0 +1,158 @@
+import time
+
+from services import (
+    alerts, collector, coordination, coverage, cross_section, detector, episodes, labeling, leader, levels, live, metrics,
+    orderbook, rollup, scheduler, timeframes, write_behind
+)
+
+# Porsi interval yang boleh dipakai menunggu fetch sumber data
+CYCLE_BUDGET_RATIO = 0.5
+DETECTION_WINDOW = 5
+MIN_CONSECUTIVE_UP = 3
+NO_SIGNAL = {"timeframes": [], "confidence": 0.0}
+
+
+def format_pump_message(result):
+    message = (
+        f"🚨 PUMP DETECTED {result['ticker'].upper()}\n"
+        f"Harga: {result['harga_sebelum']} ➡️ {result['harga_sekarang']} (+{result['kenaikan_harga']:.2f}%)\n"
+        f"Volume: +{result['kenaikan_volume']:.2f}%\n"
+        f"Jam: {result['timestamp']}"
+    )
+    if result.get("timeframes"):
+        message += f"\n⏱️ Timeframe: {result['timeframes']} (confidence {result['confidence'] * 100:.0f}%)"
+    if result.get("breaking_resistance"):
+        message += "\n🧱 Menembus resistance volume profile"
+    if result.get("resistance"):
+        message += f"\nResistance berikutnya: {result['resistance']:.8g}"
+    return message
+
+
+def format_group_message(event, members):
+    lines = [
+        f"🚨 PUMP TERKOORDINASI {len(event['tickers'])} coin (korelasi rata-rata {event['avg_corr']:.2f})",
+    ]
+    for m in members:
+        lines.append(f"{m['ticker'].upper()}: {m['kenaikan_harga']:+.2f}% harga, {m['kenaikan_volume']:+.2f}% volume")
+    lines.append(f"Jam: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event['started']))}")
+    return "\n".join(lines)
+
+
+def _group_members(event, market_scores):
+    """Anggota grup dalam bentuk hasil deteksi (perubahan 60s dari skor pasar) untuk routing langganan."""
+    members = []
+    for ticker in event["tickers"]:
+        score = market_scores.get(ticker, {})
+        members.append({
+            "ticker": ticker,
+            "kenaikan_harga": score.get("return_pct", 0.0),
+            "kenaikan_volume": score.get("volume_pct", 0.0),
+        })
+    return sorted(members, key=lambda m: -m["kenaikan_harga"])
+
+
+def run_cycle(settings):
+    """Satu siklus ingest: fetch sumber → antri write-behind → deteksi → alert → NOTIFY.
+
+    ``settings`` berisi parameter deteksi dari sidebar (interval, threshold,
+    aturan order book, min_market_z). Return dict hasil siklus untuk UI, atau
+    None bila instance ini bukan leader (replika follower hanya membaca).
+    """
+    if not leader.is_leader():
+        return None
+    interval = settings["interval"]
+    write_behind.ensure_started()
+    labeling.ensure_started()
+    rollup.ensure_started()
+    alerts.ensure_loaded()
+    with metrics.cycle(interval) as cycle_stats:
+        source_collector = collector.get_collector()
+        orderbook.ensure_registered(source_collector)
+        source_collector.set_interval(collector.PRIMARY_SOURCE, interval)
+        snapshots = source_collector.run_due(budget=interval * CYCLE_BUDGET_RATIO)
+        captured_at = time.time()
+        # Tulis lewat write-behind: siklus tidak menunggu (atau kehilangan data karena) DB
+        for source_id, rows in snapshots.items():
+            if source_collector.kind(source_id) == "depth":
+                orderbook.ingest(rows)
+            else:
+                write_behind.submit("ticker_history", {
+                    "rows": [{"ticker": r['ticker'], "last": r['last'], "vol_idr": r['vol_idr']} for r in rows],
+                    "source": source_id,
+                    "ts": captured_at,
+                })
+
+        data = snapshots.get(collector.PRIMARY_SOURCE, [])
+        if data:
+            detector.observe_snapshot(data)
+            timeframes.observe(data, captured_at)
+            coordination.observe(data, captured_at)
+            coverage.observe(data, captured_at)
+            orderbook.set_universe(data)
+            # Prioritas rendah: dilewati bila tick mendekati deadline (delta volume terbawa ke tick berikutnya)
+            if scheduler.allow("levels"):
+                levels.ingest(data, captured_at)
+        market_scores = cross_section.score_snapshot(data) if data else {}
+        if data:
+            scheduler.observe_activity(market_scores)
+        if settings.get("min_market_z"):
+            allowed = cross_section.candidates(market_scores, settings["min_market_z"])
+            data = [d for d in data if d['ticker'] in allowed]
+
+        # Multi-timeframe: semua ticker × semua jendela dievaluasi sekali per siklus
+        signals = None
+        if settings.get("multi_timeframe"):
+            signals = timeframes.evaluate(
+                settings["price_threshold"], settings["volume_threshold"],
+                min_consecutive_up=MIN_CONSECUTIVE_UP, price_delta=settings["price_delta"],
+                spike_factor=settings["spike_factor"], min_confidence=settings.get("min_confidence", 0.0)
+            )
+
+        # Pump terkoordinasi: satu alert per grup, alert per-coin anggotanya ditahan
+        groups, grouped = [], set()
+        if settings.get("coordinated"):
+            groups = coordination.evaluate(captured_at)
+            for event in groups:
+                if event["event"] == "open":
+                    members = _group_members(event, market_scores)
+                    alerts.publish_group(members, format_group_message(event, members))
+            grouped = coordination.grouped_tickers()
+
+        detected_pumps = []
+        for d in data:
+            ticker = d['ticker']
+            is_pump, result = detector.is_valid_pump(
+                ticker, settings["price_threshold"], settings["volume_threshold"],
+                window=DETECTION_WINDOW, min_consecutive_up=MIN_CONSECUTIVE_UP,
+                price_delta=settings["price_delta"], spike_factor=settings["spike_factor"],
+                min_imbalance=settings.get("min_imbalance"),
+                max_ask_thinning=settings.get("max_ask_thinning"),
+                max_spread_bps=settings.get("max_spread_bps"),
+                market=market_scores.get(ticker),
+                require_breakout=settings.get("require_breakout", False),
+                timeframe_signal=None if signals is None else signals.get(ticker, NO_SIGNAL)
+            )
+            if is_pump:
+                detected_pumps.append(result)
+
+            # Alert hanya saat episode baru dibuka, bukan tiap refresh; dikirim async per chat
+            if is_pump and result["episode"] == "open" and ticker not in grouped:
+                alerts.publish(result, format_pump_message(result))
+
+        episodes.sweep()
+
+    result = {
+        "time": time.time(),
+        "has_snapshot": collector.PRIMARY_SOURCE in snapshots,
+        # Sama dengan market_snapshots.timestamp (ms) dari poll ini
+        "snapshot_id": int(captured_at * 1000),
+        "detected_pumps": detected_pumps,
+        "anomalies": cross_section.top_anomalies(market_scores, k=10),
+        "groups": groups,
+        "cycle": cycle_stats,
+        "sources": source_collector.status(),
+    }
+    # Hanya beri tahu viewer bila memang ada snapshot baru
+    if result["has_snapshot"]:
+        live.announce(result)
+    return result
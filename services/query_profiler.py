@@ -0,0 +1,150 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+# --- Konfigurasi Profiling ---
+ENABLED = os.environ.get("PUMP_PROFILE_QUERIES", "0") == "1"   # opsional; aktifkan dengan PUMP_PROFILE_QUERIES=1
+SLOW_QUERY_MS = float(os.environ.get("PUMP_SLOW_QUERY_MS", "500"))
+MAX_SAMPLES = 1000       # sampel latensi per fingerprint untuk persentil
+MAX_SLOW_LOG = 200
+MAX_PARAM_CHARS = 300
+MAX_FINGERPRINT_CACHE = 5000
+
+_lock = threading.Lock()
+_stats = {}              # fingerprint -> dict statistik
+_slow_log = deque(maxlen=MAX_SLOW_LOG)
+_fingerprints = {}       # cache: teks SQL mentah -> fingerprint
+_local = threading.local()
+
+_RE_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_RE_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(query):
+    """Normalisasi SQL: literal & placeholder jadi ``?``, spasi dirapatkan."""
+    fp = _fingerprints.get(query)
+    if fp is None:
+        fp = _RE_COMMENT.sub(" ", query)
+        fp = _RE_STRING.sub("?", fp)
+        fp = _RE_PLACEHOLDER.sub("?", fp)
+        fp = _RE_NUMBER.sub("?", fp)
+        fp = _RE_IN_LIST.sub("(?)", fp)
+        fp = _RE_SPACE.sub(" ", fp).strip()
+        if len(_fingerprints) >= MAX_FINGERPRINT_CACHE:
+            _fingerprints.clear()
+        _fingerprints[query] = fp
+    return fp
+
+
+def note_retry():
+    """Dipanggil oleh decorator retry setiap kali query diulang."""
+    _local.retries = getattr(_local, "retries", 0) + 1
+
+
+def _row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple):
+        return 1
+    return 0
+
+
+def _record(query, params, seconds, rows, retries, failed):
+    fp = fingerprint(query)
+    with _lock:
+        stat = _stats.get(fp)
+        if stat is None:
+            stat = _stats[fp] = {
+                "count": 0, "total": 0.0, "max": 0.0, "rows": 0,
+                "retries": 0, "errors": 0, "samples": deque(maxlen=MAX_SAMPLES),
+            }
+        stat["count"] += 1
+        stat["total"] += seconds
+        stat["max"] = max(stat["max"], seconds)
+        stat["rows"] += rows
+        stat["retries"] += retries
+        stat["errors"] += int(failed)
+        stat["samples"].append(seconds)
+
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        entry = {
+            "time": time.time(),
+            "fingerprint": fp,
+            "ms": seconds * 1000,
+            "params": repr(params)[:MAX_PARAM_CHARS],
+            "rows": rows,
+            "retries": retries,
+        }
+        with _lock:
+            _slow_log.append(entry)
+        print(f"🐢 Slow query {entry['ms']:.0f}ms: {fp[:120]} params={entry['params']}")
+
+
+def profiled(func):
+    """Decorator untuk execute_query: catat latensi, rows dan retry per fingerprint."""
+    @wraps(func)
+    def wrapper(query, params=None, *args, **kwargs):
+        if not ENABLED:
+            return func(query, params, *args, **kwargs)
+        _local.retries = 0
+        start = time.perf_counter()
+        failed = True
+        result = None
+        try:
+            result = func(query, params, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _record(query, params, time.perf_counter() - start,
+                    _row_count(result), _local.retries, failed)
+    return wrapper
+
+
+# --- Laporan ---
+def _percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    idx = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[idx]
+
+
+def top_queries(limit=20, order_by="total_ms"):
+    """Fingerprint dengan total waktu (atau kolom lain) terbesar."""
+    with _lock:
+        items = [(fp, dict(stat, samples=sorted(stat["samples"]))) for fp, stat in _stats.items()]
+    report = []
+    for fp, stat in items:
+        samples = stat["samples"]
+        report.append({
+            "fingerprint": fp,
+            "count": stat["count"],
+            "total_ms": stat["total"] * 1000,
+            "mean_ms": stat["total"] / stat["count"] * 1000,
+            "p50_ms": _percentile(samples, 50) * 1000,
+            "p95_ms": _percentile(samples, 95) * 1000,
+            "p99_ms": _percentile(samples, 99) * 1000,
+            "max_ms": stat["max"] * 1000,
+            "rows": stat["rows"],
+            "retries": stat["retries"],
+            "errors": stat["errors"],
+        })
+    report.sort(key=lambda r: r.get(order_by, 0), reverse=True)
+    return report[:limit]
+
+
+def slow_queries():
+    with _lock:
+        return list(_slow_log)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _slow_log.clear()
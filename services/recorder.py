@@ -0,0 +1,86 @@
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+
+# --- Konfigurasi Recorder ---
+# Response mentah API sumber (body apa adanya + waktu capture) ditulis ke
+# segment gzip JSON-lines append-only, satu segment per jam. Tiap record
+# di-flush (Z_SYNC_FLUSH) sehingga segment yang sedang ditulis tetap bisa
+# dibaca sampai record terakhir, dan crash hanya kehilangan record berjalan.
+# Dibaca ulang oleh benchmarks/replay.py untuk soak & throughput test.
+RECORD_DIR = os.environ.get("PUMP_RECORD_DIR", "")   # kosong = recorder nonaktif
+SEGMENT_SECONDS = 3600
+
+_lock = threading.Lock()
+_segment = {"start": None, "file": None}
+_state = {"records": 0, "bytes": 0, "last_error": None}
+
+
+def enabled():
+    return bool(RECORD_DIR)
+
+
+def _open_segment(now):
+    start = int(now // SEGMENT_SECONDS * SEGMENT_SECONDS)
+    if _segment["start"] == start:
+        return _segment["file"]
+    if _segment["file"] is not None:
+        _segment["file"].close()
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    # Mode "ab": restart di jam yang sama menambah member gzip baru (tetap valid)
+    _segment["file"] = gzip.open(os.path.join(RECORD_DIR, f"rec-{start}.jsonl.gz"), "ab")
+    _segment["start"] = start
+    return _segment["file"]
+
+
+def record(source_id, path, body, captured_at=None):
+    """Simpan satu response mentah; error I/O dicatat tanpa mengganggu ingest."""
+    if not RECORD_DIR:
+        return
+    captured_at = time.time() if captured_at is None else captured_at
+    line = json.dumps({"ts": captured_at, "source": source_id, "path": path, "body": body}) + "\n"
+    data = line.encode()
+    try:
+        with _lock:
+            f = _open_segment(captured_at)
+            f.write(data)
+            f.flush()
+            _state["records"] += 1
+            _state["bytes"] += len(data)
+    except OSError as e:
+        _state["last_error"] = str(e)
+        print(f"⚠️ Recorder gagal menulis: {e}")
+
+
+def segments(directory):
+    """Path segment urut waktu mulai."""
+    paths = glob.glob(os.path.join(directory, "rec-*.jsonl.gz"))
+    return sorted(paths, key=lambda p: int(os.path.basename(p)[4:].split(".")[0]))
+
+
+def read(directory, since=None):
+    """Iterasi record (dict ts/source/path/body) dari semua segment, lama → baru.
+
+    Segment yang masih ditulis (tanpa trailer gzip) dibaca sampai record utuh terakhir.
+    """
+    for path in segments(directory):
+        with gzip.open(path, "rb") as f:
+            while True:
+                try:
+                    line = f.readline()
+                except (EOFError, gzip.BadGzipFile):
+                    break
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    break     # record terakhir terpotong
+                rec = json.loads(line)
+                if since is None or rec["ts"] >= since:
+                    yield rec
+
+
+def status():
+    return dict(_state, enabled=enabled(), directory=RECORD_DIR)
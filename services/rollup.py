@@ -0,0 +1,45 @@
+import threading
+import time
+
+from services import database_pg, leader
+
+# --- Konfigurasi Rollup Harian ---
+# ticker_daily (high/low/close/jumlah poll per ticker per hari) diisi dari
+# ticker_ticks untuk hari yang sudah lewat. Reader periode panjang (coin
+# stagnan) membaca rollup untuk hari penuh dan tick mentah hanya untuk sisa
+# hari, jadi tidak perlu scan 60 hari tick tiap kali dibuka.
+RUN_EVERY = 900           # detik; hari baru ter-rollup ≤ 15 menit setelah tengah malam
+
+_thread = None
+_thread_lock = threading.Lock()
+_state = {"last_run": None, "rows": 0, "last_error": None}
+
+
+def run_once():
+    rows = database_pg.rollup_ticker_daily()
+    _state.update(last_run=time.time(), rows=rows, last_error=None)
+    return rows
+
+
+def _loop():
+    while True:
+        if leader.is_leader():
+            try:
+                run_once()
+            except Exception as e:
+                _state["last_error"] = str(e)
+                print(f"❌ Rollup harian gagal: {e}")
+        time.sleep(RUN_EVERY)
+
+
+def ensure_started():
+    """Start job rollup periodik sekali per proses (hanya bekerja di leader)."""
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, name="daily-rollup", daemon=True)
+            _thread.start()
+
+
+def status():
+    return dict(_state)
@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+
+from services import metrics
+
+# --- Konfigurasi Scheduler ---
+# Tick selaras jam dinding: tick ke-k mulai di k × interval (epoch). Tick yang
+# terlewat (siklus sebelumnya overrun / sesi tidak polling) dilewati, tidak
+# diantrikan, sehingga DB lambat tidak membuat siklus menumpuk.
+SHED_RATIO = 0.7          # lewat 70% interval → pekerjaan prioritas rendah dilewati
+MIN_INTERVAL = 2          # detik; batas bawah interval adaptif
+MAX_INTERVAL = 20         # detik; batas atas interval adaptif
+HOT_Z = 3.0               # z_return vs pasar yang dianggap "bergerak"
+HOT_TICKERS = 5           # ≥ sekian ticker bergerak → pasar ramai, interval dipercepat
+QUIET_TICKS = 20          # tick berturut-turut tanpa ticker bergerak → interval diperlambat
+
+_lock = threading.Lock()
+_state = {
+    "last_tick": None,    # waktu mulai tick terakhir yang dijalankan (epoch)
+    "interval": None,     # interval efektif tick terakhir
+    "deadline": None,     # batas waktu tick yang sedang berjalan
+    "factor": 1.0,        # pengali interval adaptif (0.5 ramai, 1 normal, 2 sepi)
+    "hot": 0,             # ticker bergerak di snapshot terakhir
+    "quiet_ticks": 0,
+    "missed": 0,
+    "shed": {},
+}
+
+
+def effective_interval(base, adaptive=True):
+    """Interval yang dipakai tick berikutnya (base × faktor aktivitas pasar)."""
+    if not adaptive:
+        return base
+    with _lock:
+        factor = _state["factor"]
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, base * factor))
+
+
+def claim(base_interval, adaptive=True, now=None):
+    """Return interval efektif bila tick baru sudah mulai dan belum dijalankan, else None.
+
+    Dipanggil dari polling fragment tiap sesi; hanya satu pemanggil per tick
+    yang menang. Tick yang terlewat dicatat ke ``ticks_missed_total`` dan
+    keterlambatan mulai siklus ke histogram ``tick_lateness``.
+    """
+    now = time.time() if now is None else now
+    interval = effective_interval(base_interval, adaptive)
+    tick_start = math.floor(now / interval) * interval
+    with _lock:
+        last = _state["last_tick"]
+        if last is not None and tick_start <= last:
+            return None
+        missed = 0
+        if last is not None:
+            missed = max(0, round((tick_start - last) / interval) - 1)
+        _state.update(last_tick=tick_start, interval=interval, deadline=tick_start + interval)
+        _state["missed"] += missed
+    if missed:
+        metrics.incr("ticks_missed_total", missed)
+    metrics.incr("ticks_total")
+    metrics.record("tick_lateness", now - tick_start)
+    return interval
+
+
+def remaining(now=None):
+    """Sisa waktu (detik) sampai deadline tick yang sedang berjalan."""
+    now = time.time() if now is None else now
+    with _lock:
+        deadline = _state["deadline"]
+    return float("inf") if deadline is None else deadline - now
+
+
+def allow(kind, now=None):
+    """False bila tick sudah mendekati deadline; pekerjaan ``kind`` sebaiknya dilewati."""
+    now = time.time() if now is None else now
+    with _lock:
+        deadline, interval = _state["deadline"], _state["interval"]
+        if deadline is None or now < deadline - interval * (1 - SHED_RATIO):
+            return True
+        _state["shed"][kind] = _state["shed"].get(kind, 0) + 1
+    metrics.incr(f"shed_{kind}_total")
+    return False
+
+
+def observe_activity(market_scores):
+    """Sesuaikan faktor interval dari skor cross-section snapshot terakhir."""
+    hot = sum(1 for s in market_scores.values() if s["z_return"] >= HOT_Z)
+    with _lock:
+        _state["hot"] = hot
+        if hot >= HOT_TICKERS:
+            _state["factor"] = 0.5
+            _state["quiet_ticks"] = 0
+        elif hot == 0:
+            _state["quiet_ticks"] += 1
+            if _state["quiet_ticks"] >= QUIET_TICKS:
+                _state["factor"] = 2.0
+        else:
+            _state["factor"] = 1.0
+            _state["quiet_ticks"] = 0
+
+
+def status():
+    with _lock:
+        state = dict(_state)
+        state["shed"] = dict(_state["shed"])
+    return state
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from services import database_pg
+
+# --- Konfigurasi Screener ---
+# Parameter indikator mengikuti default library ``ta`` yang dipakai halaman
+# analisa per coin, jadi angkanya bisa dibandingkan langsung.
+RSI_WINDOW = 14
+BB_WINDOW = 20
+BB_DEV = 2
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+MA_FAST = 5
+MA_SLOW = 20
+
+TIMEFRAMES = {"5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}
+
+
+# --- Indikator vektor (baris = ticker, kolom = waktu lama → baru) ---
+def ffill(matrix):
+    """Forward-fill NaN sepanjang waktu (ticker yang absen di satu poll)."""
+    idx = np.where(np.isnan(matrix), 0, np.arange(matrix.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = matrix[np.arange(matrix.shape[0])[:, None], idx]
+    return filled
+
+
+def sma(matrix, window):
+    """Rolling mean; kolom sebelum window penuh (atau window berisi NaN) = NaN."""
+    out = np.full(matrix.shape, np.nan)
+    if matrix.shape[1] < window:
+        return out
+    cumsum = np.cumsum(np.nan_to_num(matrix), axis=1)
+    cumsum = np.pad(cumsum, ((0, 0), (1, 0)))
+    counts = np.cumsum(~np.isnan(matrix), axis=1)
+    counts = np.pad(counts, ((0, 0), (1, 0)))
+    full = (counts[:, window:] - counts[:, :-window]) == window
+    out[:, window - 1:] = np.where(full, (cumsum[:, window:] - cumsum[:, :-window]) / window, np.nan)
+    return out
+
+
+def rolling_std(matrix, window):
+    """Rolling std populasi (ddof=0, sama dengan ta.volatility.BollingerBands)."""
+    mean = sma(matrix, window)
+    mean_sq = sma(matrix ** 2, window)
+    return np.sqrt(np.clip(mean_sq - mean ** 2, 0, None))
+
+
+def ewm(matrix, alpha, min_periods=0):
+    """EWM ``adjust=False`` per baris: mulai dari nilai valid pertama tiap ticker."""
+    out = np.full(matrix.shape, np.nan)
+    state = np.full(matrix.shape[0], np.nan)
+    seen = np.zeros(matrix.shape[0], dtype=np.int64)
+    for t in range(matrix.shape[1]):
+        x = matrix[:, t]
+        valid = ~np.isnan(x)
+        first = valid & np.isnan(state)
+        state = np.where(first, x, state)
+        update = valid & ~first
+        state = np.where(update, (1 - alpha) * state + alpha * x, state)
+        seen += valid
+        out[:, t] = np.where(seen >= max(min_periods, 1), state, np.nan)
+    return out
+
+
+def rsi(closes, window=RSI_WINDOW):
+    # Selisih NaN dihitung 0 (sama dengan ta.momentum.rsi)
+    delta = np.diff(closes, axis=1, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = ewm(gain, 1 / window, min_periods=window)
+    avg_loss = ewm(loss, 1 / window, min_periods=window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        out = 100 - 100 / (1 + rs)
+    return np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, np.nan), out)
+
+
+def macd(closes, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    line = ewm(closes, 2 / (fast + 1), min_periods=fast) - ewm(closes, 2 / (slow + 1), min_periods=slow)
+    signal_line = ewm(line, 2 / (signal + 1), min_periods=signal)
+    return line, signal_line, line - signal_line
+
+
+def percent_b(closes, window=BB_WINDOW, dev=BB_DEV):
+    mid = sma(closes, window)
+    std = rolling_std(closes, window)
+    lower = mid - dev * std
+    width = 2 * dev * std
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(width > 0, (closes - lower) / width, np.nan)
+
+
+# --- Screener ---
+def compute(closes, tickers):
+    """Hitung semua indikator untuk semua ticker sekaligus.
+
+    ``closes`` = matriks (ticker × waktu). Return DataFrame satu baris per
+    ticker dengan nilai indikator di candle terakhir.
+    """
+    closes = ffill(np.asarray(closes, dtype=np.float64))
+    ma_fast = sma(closes, MA_FAST)
+    ma_slow = sma(closes, MA_SLOW)
+    rsi_values = rsi(closes)
+    pct_b = percent_b(closes)
+    _, _, hist = macd(closes)
+
+    last = closes[:, -1]
+    prev = closes[:, -2] if closes.shape[1] > 1 else np.full(len(closes), np.nan)
+    fast_above = ma_fast > ma_slow
+    cross = np.full(len(closes), "", dtype=object)
+    if closes.shape[1] > 1:
+        was_above = ma_fast[:, -2] > ma_slow[:, -2]
+        comparable = ~np.isnan(ma_slow[:, -2:]).any(axis=1)
+        cross[comparable & fast_above[:, -1] & ~was_above] = "golden"
+        cross[comparable & ~fast_above[:, -1] & was_above] = "death"
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(prev > 0, (last - prev) / prev * 100, np.nan)
+    return pd.DataFrame({
+        "ticker": tickers,
+        "close": last,
+        "change_pct": change,
+        "rsi": rsi_values[:, -1],
+        "ma_fast": ma_fast[:, -1],
+        "ma_slow": ma_slow[:, -1],
+        "trend_up": fast_above[:, -1],
+        "cross": cross,
+        "pct_b": pct_b[:, -1],
+        "macd_hist": hist[:, -1],
+        "macd_hist_rising": hist[:, -1] > hist[:, -2] if closes.shape[1] > 1 else False,
+        "candles": (~np.isnan(closes)).sum(axis=1),
+    })
+
+
+def load(n, timeframe):
+    """Ambil ``n`` close terakhir semua ticker dalam satu query → (closes ticker × waktu, tickers)."""
+    matrix = database_pg.get_close_matrix(n, TIMEFRAMES[timeframe])
+    return matrix["last"].T, matrix["tickers"]
+
+
+def screen(table, rsi_range=None, cross=None, pct_b_range=None, macd_positive=False,
+           macd_rising=False, min_candles=0, sort_by="rsi", ascending=True):
+    """Filter hasil :func:`compute` sesuai kriteria user lalu urutkan."""
+    mask = table["candles"] >= min_candles
+    if rsi_range is not None:
+        mask &= table["rsi"].between(*rsi_range)
+    if cross:
+        mask &= table["cross"] == cross
+    if pct_b_range is not None:
+        mask &= table["pct_b"].between(*pct_b_range)
+    if macd_positive:
+        mask &= table["macd_hist"] > 0
+    if macd_rising:
+        mask &= table["macd_hist_rising"]
+    return table[mask].sort_values(sort_by, ascending=ascending, na_position="last")
@@ -0,0 +1,229 @@
+import threading
+
+import numpy as np
+
+from services import database_pg, screener
+
+# --- Konfigurasi Multi-Timeframe ---
+# Aturan pump detector.is_valid_pump dievaluasi di beberapa jendela sekaligus
+# untuk semua ticker. Tiap jendela = BARS close bar selaras jam dinding
+# (15s → bar 3 detik, setara window=5 sampel lama pada interval 3 detik).
+# Agregat per jendela (jumlah harga/volume, jumlah langkah naik, jumlah bar
+# terisi) diperbarui incremental tiap snapshot, tanpa baca ulang ticker_history.
+TIMEFRAMES = (("15s", 15), ("1m", 60), ("5m", 300), ("15m", 900))
+BARS = 5
+RESYNC_EVERY = 100        # roll bar; hitung ulang agregat dari ring agar error float tidak menumpuk
+
+_lock = threading.Lock()
+_index = {}               # ticker -> baris
+_tickers = []
+_frames = {}              # nama timeframe -> state ring (lihat _new_frame)
+_warm = {"done": False}
+
+
+def _new_frame(seconds, n=0):
+    return {
+        "bar_seconds": seconds / BARS,
+        "bar": None,                          # id bar (epoch // bar_seconds) kolom terbaru
+        "head": BARS - 1,                     # kolom ring terbaru
+        "price": np.full((n, BARS), np.nan),
+        "volume": np.full((n, BARS), np.nan),
+        "sum_p": np.zeros(n),
+        "sum_v": np.zeros(n),
+        "ups": np.zeros(n, dtype=np.int64),   # langkah naik antar close dalam jendela
+        "count": np.zeros(n, dtype=np.int64), # close terisi (== BARS → jendela siap)
+        "rolls": 0,
+    }
+
+
+for _name, _seconds in TIMEFRAMES:
+    _frames[_name] = _new_frame(_seconds)
+
+
+def _order(f):
+    """Kolom ring urut lama → baru."""
+    return (f["head"] + 1 + np.arange(BARS)) % BARS
+
+
+def _resync(f):
+    price = f["price"][:, _order(f)]
+    f["sum_p"] = np.nansum(price, axis=1)
+    f["sum_v"] = np.nansum(f["volume"], axis=1)
+    f["count"] = (~np.isnan(price)).sum(axis=1)
+    f["ups"] = (price[:, 1:] > price[:, :-1]).sum(axis=1)
+
+
+def _grow(tickers):
+    """Tambah baris untuk ticker baru di semua timeframe (dipanggil dengan _lock)."""
+    new = [t for t in dict.fromkeys(tickers) if t not in _index]
+    if not new:
+        return
+    for t in new:
+        _index[t] = len(_tickers)
+        _tickers.append(t)
+    k = len(new)
+    for f in _frames.values():
+        f["price"] = np.vstack([f["price"], np.full((k, BARS), np.nan)])
+        f["volume"] = np.vstack([f["volume"], np.full((k, BARS), np.nan)])
+        for key in ("sum_p", "sum_v", "ups", "count"):
+            f[key] = np.concatenate([f[key], np.zeros(k, dtype=f[key].dtype)])
+
+
+def _roll(f, steps):
+    """Mulai ``steps`` bar baru; bar yang tidak punya snapshot membawa close sebelumnya."""
+    price, volume = f["price"], f["volume"]
+    for _ in range(min(steps, BARS)):
+        newest = f["head"]
+        head = (newest + 1) % BARS              # kolom tertua → ditimpa
+        second = (head + 1) % BARS              # jadi tertua setelah roll
+        f["ups"] -= price[:, second] > price[:, head]
+        f["count"] -= ~np.isnan(price[:, head])
+        f["sum_p"] += np.nan_to_num(price[:, newest]) - np.nan_to_num(price[:, head])
+        f["sum_v"] += np.nan_to_num(volume[:, newest]) - np.nan_to_num(volume[:, head])
+        f["count"] += ~np.isnan(price[:, newest])
+        price[:, head] = price[:, newest]
+        volume[:, head] = volume[:, newest]
+        f["head"] = head
+    f["rolls"] += 1
+    if f["rolls"] % RESYNC_EVERY == 0:
+        _resync(f)
+
+
+def _set_newest(f, prices, volumes, present):
+    """Timpa close bar berjalan dengan snapshot terbaru (ticker yang absen tidak berubah)."""
+    head, prev = f["head"], (f["head"] - 1) % BARS
+    price, volume = f["price"], f["volume"]
+    old_p, old_v = price[:, head].copy(), volume[:, head].copy()
+    new_p = np.where(present, prices, old_p)
+    new_v = np.where(present, volumes, old_v)
+    f["ups"] += (new_p > price[:, prev]).astype(np.int64) - (old_p > price[:, prev])
+    f["count"] += (~np.isnan(new_p)).astype(np.int64) - ~np.isnan(old_p)
+    f["sum_p"] += np.nan_to_num(new_p) - np.nan_to_num(old_p)
+    f["sum_v"] += np.nan_to_num(new_v) - np.nan_to_num(old_v)
+    price[:, head] = new_p
+    volume[:, head] = new_v
+
+
+def warm_start(now):
+    """Isi ring dari poll tersimpan (satu query per timeframe) supaya jendela panjang tidak perlu pemanasan."""
+    for name, seconds in TIMEFRAMES:
+        bar_seconds = seconds / BARS
+        matrix = database_pg.get_close_matrix(BARS, bar_seconds)
+        if not matrix["tickers"]:
+            continue
+        bar = int(now // bar_seconds)
+        # Posisi 0 = bar tertua jendela, BARS - 1 = bar berjalan
+        pos = BARS - 1 - (bar - np.floor(matrix["ts"] / bar_seconds).astype(np.int64))
+        keep = (pos >= 0) & (pos < BARS)
+        dense_p = np.full((len(matrix["tickers"]), BARS), np.nan)
+        dense_v = np.full((len(matrix["tickers"]), BARS), np.nan)
+        dense_p[:, pos[keep]] = matrix["last"][keep].T
+        dense_v[:, pos[keep]] = matrix["vol_idr"][keep].T
+        with _lock:
+            f = _frames[name]
+            if f["bar"] is not None:
+                continue
+            _grow(matrix["tickers"])
+            rows = np.fromiter((_index[t] for t in matrix["tickers"]), dtype=np.int64)
+            order = _order(f)
+            f["price"][np.ix_(rows, order)] = screener.ffill(dense_p)
+            f["volume"][np.ix_(rows, order)] = screener.ffill(dense_v)
+            f["bar"] = bar
+            _resync(f)
+
+
+def observe(rows, now):
+    """Masukkan satu snapshot (list dict ticker/last/vol_idr) ke semua timeframe."""
+    if not _warm["done"]:
+        _warm["done"] = True
+        try:
+            warm_start(now)
+        except Exception as e:
+            print(f"⚠️ Warm start multi-timeframe gagal: {e}")
+
+    with _lock:
+        _grow(r['ticker'] for r in rows)
+        idx = np.fromiter((_index[r['ticker']] for r in rows), dtype=np.int64, count=len(rows))
+        prices = np.full(len(_tickers), np.nan)
+        volumes = np.full(len(_tickers), np.nan)
+        prices[idx] = [float(r['last']) for r in rows]
+        volumes[idx] = [float(r['vol_idr']) for r in rows]
+        present = ~np.isnan(prices)
+
+        for f in _frames.values():
+            bar = int(now // f["bar_seconds"])
+            if f["bar"] is None:
+                f["bar"] = bar
+            elif bar > f["bar"]:
+                _roll(f, bar - f["bar"])
+                f["bar"] = bar
+            _set_newest(f, prices, volumes, present)
+
+
+def evaluate(price_threshold, volume_threshold, min_consecutive_up=3, price_delta=1.0, spike_factor=1.5,
+             min_confidence=0.0):
+    """Evaluasi aturan pump di semua timeframe untuk semua ticker sekaligus.
+
+    Return dict ``ticker -> sinyal`` hanya untuk ticker yang lolos di minimal
+    satu timeframe dan ``confidence`` (porsi timeframe yang lolos) ≥
+    ``min_confidence``. Angka harga/volume sinyal diambil dari timeframe
+    terpanjang yang lolos.
+    """
+    with _lock:
+        tickers = list(_tickers)
+        first_p, last_p, first_v, last_v, mean_p, mean_v, ups, ready = ([] for _ in range(8))
+        for f in _frames.values():
+            oldest, head = (f["head"] + 1) % BARS, f["head"]
+            first_p.append(f["price"][:, oldest])
+            last_p.append(f["price"][:, head])
+            first_v.append(f["volume"][:, oldest])
+            last_v.append(f["volume"][:, head])
+            mean_p.append(f["sum_p"] / BARS)
+            mean_v.append(f["sum_v"] / BARS)
+            ups.append(f["ups"].copy())
+            ready.append(f["count"] == BARS)
+    if not tickers:
+        return {}
+
+    # Matriks ticker × timeframe
+    first_p, last_p, first_v, last_v, mean_p, mean_v, ups, ready = (
+        np.column_stack(a) for a in (first_p, last_p, first_v, last_v, mean_p, mean_v, ups, ready)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_change = np.where(first_p > 0, (last_p / first_p - 1) * 100, 0.0)
+        volume_change = np.where(first_v > 0, (last_v / first_v - 1) * 100, 0.0)
+    fired = (
+        ready &
+        (ups >= min_consecutive_up) &
+        (price_change >= price_threshold) &
+        (volume_change >= volume_threshold) &
+        (last_p > mean_p * (1 + price_delta / 100)) &
+        (last_v > mean_v * spike_factor)
+    )
+    confidence = fired.mean(axis=1)
+    names = [name for name, _ in TIMEFRAMES]
+
+    signals = {}
+    for i in np.flatnonzero(fired.any(axis=1) & (confidence >= min_confidence)):
+        cols = np.flatnonzero(fired[i])
+        j = cols[-1]
+        signals[tickers[i]] = {
+            "timeframes": [names[c] for c in cols],
+            "confidence": float(confidence[i]),
+            "harga_sebelum": float(first_p[i, j]),
+            "harga_sekarang": float(last_p[i, j]),
+            "kenaikan_harga": float(price_change[i, j]),
+            "kenaikan_volume": float(volume_change[i, j]),
+            "ma_harga": float(mean_p[i, j]),
+            "ma_volume": float(mean_v[i, j]),
+            "consecutive_up": int(ups[i, j]),
+        }
+    return signals
+
+
+def status():
+    with _lock:
+        return {
+            "tickers": len(_tickers),
+            "ready": {name: int((f["count"] == BARS).sum()) for name, f in _frames.items()},
+        }
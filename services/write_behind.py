@@ -0,0 +1,379 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import psycopg2
+import psycopg2.pool
+
+from services import database_pg, metrics
+
+# --- Konfigurasi Write-Behind ---
+FLUSH_INTERVAL = 0.5      # detik
+MAX_BATCH = 5000          # record per flush
+MAX_QUEUE = 50_000        # record di memori; lebih dari ini antrian dipindah ke spill disk
+RECOVERY_INTERVAL = 5     # detik antar percobaan replay spill
+SPILL_DIR = os.environ.get("PUMP_SPILL_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".spill"))
+SEGMENT_BYTES = 16 * 1024 * 1024
+NOTIFY_MAX_AGE = 60       # detik; NOTIFY dari spill yang lebih tua dari ini tidak dikirim ulang
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+# Hanya error koneksi yang di-spill & di-replay; error lain (IntegrityError,
+# DataError, payload rusak) tidak akan sembuh dengan retry → dead letter
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, psycopg2.pool.PoolError)
+
+_queue = deque()          # (kind, enqueued_at, payload) — append/popleft O(1)
+_wake = threading.Event()
+_lock = threading.Lock()
+_spill_lock = threading.RLock()   # spill bisa ditulis thread flush & submit (overflow)
+_state = {
+    "spilling": False,    # True selama masih ada segment spill yang belum di-replay
+    "spilled": 0,         # jumlah record di segment spill
+    "spill_oldest": None, # enqueued_at record spill tertua
+    "flushed": 0,
+    "overflows": 0,
+    "dead_letters": 0,
+    "last_error": None,
+    "last_flush": None,
+}
+_thread = None
+
+
+def _to_dt(ts):
+    return datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+
+
+# --- Handler per jenis record ---
+# Payload harus JSON-serializable karena bisa di-spill ke disk.
+def _flush_ticker_history(payloads):
+    for p in payloads:
+        database_pg.save_snapshot(p["rows"], source=p["source"], ts=_to_dt(p["ts"]))
+
+
+def _flush_orderbook(payloads):
+    for p in payloads:
+        records = [(r[0], bytes.fromhex(r[1]), *r[2:]) for r in p["records"]]
+        database_pg.save_orderbook_batch(records, ts=_to_dt(p["ts"]))
+
+
+def _flush_orderbook_prune(payloads):
+    # Beberapa prune tertunda cukup dijalankan sekali
+    database_pg.prune_orderbook(min(p["days"] for p in payloads))
+
+
+def _flush_pump_open(payloads):
+    for p in payloads:
+        database_pg.open_pump_episode(p["data"], p["episode_id"], ts=_to_dt(p["ts"]))
+
+
+def _flush_pump_update(payloads):
+    for p in payloads:
+        database_pg.update_pump_episode(p["episode_id"], p["peak_price"], p["peak_volume"], p["duration_sec"])
+
+
+def _flush_pump_close(payloads):
+    for p in payloads:
+        database_pg.close_pump_episode(
+            p["episode_id"], p["peak_price"], p["peak_volume"], p["duration_sec"], ts=_to_dt(p["ts"])
+        )
+
+
+def _flush_price_event(payloads):
+    for p in payloads:
+        database_pg.save_price_event_log(p["data"], ts=_to_dt(p["ts"]))
+
+
+def _flush_coverage(payloads):
+    for p in payloads:
+        database_pg.save_coverage([tuple(i) for i in p["intervals"]], source=p["source"])
+
+
+def _flush_tick_outlier(payloads):
+    for p in payloads:
+        database_pg.save_tick_outliers(
+            [(r[0], _to_dt(r[1]), *r[2:]) for r in p["records"]], source=p["source"]
+        )
+
+
+def _flush_notify(payloads):
+    for p in payloads:
+        if time.time() - p["payload"]["ts"] > NOTIFY_MAX_AGE:
+            continue
+        database_pg.execute_query("SELECT pg_notify(%s, %s)", (p["channel"], json.dumps(p["payload"])))
+
+
+HANDLERS = {
+    "ticker_history": _flush_ticker_history,
+    "orderbook": _flush_orderbook,
+    "orderbook_prune": _flush_orderbook_prune,
+    "pump_open": _flush_pump_open,
+    "pump_update": _flush_pump_update,
+    "pump_close": _flush_pump_close,
+    "price_event": _flush_price_event,
+    "coverage": _flush_coverage,
+    "tick_outlier": _flush_tick_outlier,
+    "notify": _flush_notify,
+}
+
+
+# --- API ---
+def submit(kind, payload):
+    """Antrikan satu write; O(1), tidak pernah menunggu DB.
+
+    Spill biasa hanya terjadi saat DB error; bila DB lambat tapi tetap bisa
+    dijangkau, antrian dibatasi MAX_QUEUE dan kelebihannya dipindah ke disk
+    supaya memori proses tidak tumbuh tanpa batas.
+    """
+    _queue.append((kind, time.time(), payload))
+    if len(_queue) > MAX_QUEUE:
+        _overflow()
+    _wake.set()
+
+
+def _overflow():
+    with _spill_lock:
+        if len(_queue) <= MAX_QUEUE:
+            return        # sudah dipindah thread lain
+        items = _drain(len(_queue))
+        try:
+            # Segment baru: segment yang sedang di-replay thread flush tidak disentuh
+            _spill(items, new_segment=True)
+        except OSError as e:
+            _queue.extendleft(reversed(items))
+            print(f"❌ Gagal memindah antrian write-behind ke disk: {e}")
+            return
+    with _lock:
+        _state["overflows"] += 1
+    metrics.incr("write_behind_overflows_total")
+    print(f"⚠️ Antrian write-behind > {MAX_QUEUE}, {len(items)} record dipindah ke {SPILL_DIR}")
+
+
+def stats():
+    """Ukuran & umur backlog (antrian memori + spill disk)."""
+    now = time.time()
+    with _lock:
+        oldest = _queue[0][1] if _queue else None
+        if _state["spill_oldest"] is not None:
+            oldest = min(oldest or now, _state["spill_oldest"])
+        return {
+            "queued": len(_queue),
+            "spilled": _state["spilled"],
+            "backlog": len(_queue) + _state["spilled"],
+            "oldest_age": now - oldest if oldest else 0.0,
+            "spilling": _state["spilling"],
+            "flushed": _state["flushed"],
+            "overflows": _state["overflows"],
+            "dead_letters": _state["dead_letters"],
+            "last_error": _state["last_error"],
+            "last_flush": _state["last_flush"],
+        }
+
+
+# --- Flush ---
+def _dead_letter(item, error):
+    """Simpan record yang gagal permanen ke file dead letter (untuk diperiksa manual)."""
+    kind, enqueued_at, payload = item
+    with _lock:
+        _state["dead_letters"] += 1
+        _state["last_error"] = f"{kind}: {error}"
+    metrics.incr("write_behind_dead_letters_total")
+    print(f"❌ Record write-behind {kind} dibuang ke dead letter: {error}")
+    try:
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        with open(os.path.join(SPILL_DIR, DEAD_LETTER_FILE), "a") as f:
+            f.write(json.dumps({"k": kind, "t": enqueued_at, "p": payload, "error": str(error)}, default=str) + "\n")
+    except (OSError, TypeError, ValueError) as e:
+        print(f"❌ Gagal menulis dead letter: {e}")
+
+
+def _write_items(items, on_written=None):
+    """Tulis record berurutan, satu transaksi per record.
+
+    Berhenti di error transient dan return ``(jumlah selesai, error)`` supaya
+    hanya record yang belum masuk yang di-spill/di-replay (insert tanpa ON
+    CONFLICT seperti price_event_log tidak terduplikasi). Record yang gagal
+    karena error lain masuk dead letter dan dihitung selesai.
+    """
+    for done, (kind, enqueued_at, payload) in enumerate(items):
+        try:
+            HANDLERS[kind]([payload])
+        except TRANSIENT_ERRORS as e:
+            return done, e
+        except Exception as e:
+            _dead_letter((kind, enqueued_at, payload), e)
+        if on_written is not None:
+            on_written(done + 1)
+    return len(items), None
+
+
+def _drain(limit=MAX_BATCH):
+    items = []
+    while _queue and len(items) < limit:
+        items.append(_queue.popleft())
+    return items
+
+
+# --- Spill ---
+def _segments():
+    return sorted(glob.glob(os.path.join(SPILL_DIR, "seg-*.jsonl")))
+
+
+def _spill(items, new_segment=False):
+    """Append record ke segment aktif (append-only, satu JSON per baris)."""
+    with _spill_lock:
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        segments = _segments()
+        path = segments[-1] if segments and not new_segment else None
+        if path is None or os.path.getsize(path) > SEGMENT_BYTES:
+            # Nama diurutkan menurut waktu enqueue record pertama, jadi urutan
+            # replay tetap urutan submit walau segment dibuat tidak berurutan
+            first = items[0][1] if items else time.time()
+            path = os.path.join(SPILL_DIR, f"seg-{int(first * 1e9)}-{time.time_ns()}.jsonl")
+        with open(path, "a") as f:
+            for kind, enqueued_at, payload in items:
+                f.write(json.dumps({"k": kind, "t": enqueued_at, "p": payload}, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    with _lock:
+        _state["spilling"] = True
+        _state["spilled"] += len(items)
+        if _state["spill_oldest"] is None and items:
+            _state["spill_oldest"] = items[0][1]
+
+
+def _load_segment(path):
+    items = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # baris terakhir bisa terpotong saat crash
+            items.append((rec["k"], rec["t"], rec["p"]))
+    return items
+
+
+def _read_pos(path):
+    try:
+        with open(path + ".pos") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_pos(path, pos):
+    with open(path + ".pos", "w") as f:
+        f.write(str(pos))
+
+
+def _scan_spill():
+    """Hitung ulang jumlah & umur record spill yang belum di-replay."""
+    total = 0
+    oldest = None
+    for path in _segments():
+        items = _load_segment(path)[_read_pos(path):]
+        total += len(items)
+        if oldest is None and items:
+            oldest = items[0][1]
+    with _lock:
+        _state["spilled"] = total
+        _state["spill_oldest"] = oldest
+        _state["spilling"] = total > 0 or bool(_segments())
+
+
+def _replay():
+    """Replay segment spill berurutan; posisi disimpan per record agar bisa dilanjutkan tanpa duplikat."""
+    for path in _segments():
+        items = _load_segment(path)
+        pos = _read_pos(path)
+
+        def written(n, path=path, start=pos):
+            _write_pos(path, start + n)
+            with _lock:
+                _state["spilled"] = max(0, _state["spilled"] - 1)
+                _state["flushed"] += 1
+
+        _, error = _write_items(items[pos:], written)
+        if error is not None:
+            raise error
+        os.remove(path)
+        if os.path.exists(path + ".pos"):
+            os.remove(path + ".pos")
+    _scan_spill()
+
+
+def _flush_once():
+    with _lock:
+        spilling = _state["spilling"]
+    if spilling:
+        # Urutan dijaga: selama spill belum habis, record baru ikut ke disk
+        with _spill_lock:
+            items = _drain()
+            if items:
+                _spill(items)
+        return
+    items = _drain()
+    if not items:
+        return
+    done, error = _write_items(items)
+    with _lock:
+        _state["flushed"] += done
+        _state["last_flush"] = time.time()
+    if error is not None:
+        # Hanya record yang belum masuk yang di-spill; segment baru karena
+        # overflow dari submit bisa sudah berisi record yang lebih baru
+        with _spill_lock:
+            _spill(items[done:] + _drain(len(_queue)), new_segment=True)
+        with _lock:
+            _state["last_error"] = str(error)
+        print(f"⚠️ DB tidak tersedia, write di-spill ke {SPILL_DIR}: {error}")
+
+
+def _flush_loop():
+    last_recovery = 0.0
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        if _state["spilling"] and time.monotonic() - last_recovery >= RECOVERY_INTERVAL:
+            last_recovery = time.monotonic()
+            try:
+                _replay()
+                with _lock:
+                    _state["last_error"] = None
+                print("✅ Spill write-behind berhasil di-replay")
+            except Exception as e:
+                _scan_spill()
+                with _lock:
+                    _state["last_error"] = str(e)
+        try:
+            _flush_once()
+        except Exception as e:
+            with _lock:
+                _state["last_error"] = str(e)
+            print(f"❌ Flush write-behind gagal: {e}")
+
+
+def ensure_started():
+    """Start thread flush sekali per proses; spill lama dari run sebelumnya ikut di-replay."""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+    _scan_spill()
+    with _lock:
+        _thread = threading.Thread(target=_flush_loop, name="write-behind", daemon=True)
+        _thread.start()
+
+
+def flush(timeout=10.0):
+    """Tunggu sampai antrian memori kosong (dipakai saat shutdown/tes)."""
+    deadline = time.monotonic() + timeout
+    while _queue and time.monotonic() < deadline:
+        _wake.set()
+        time.sleep(0.05)
+    return not _queue